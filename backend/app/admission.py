@@ -0,0 +1,218 @@
+"""
+Upload Admission Control
+
+Uploads used to be enqueued unconditionally; during bulk onboarding the
+broker queue grew without bound and every tenant's end-to-end latency
+climbed with it. Before enqueueing, the upload endpoints check the broker
+backlog:
+
+    queue_depth               LLEN of the lane queues in Redis, plus bulk
+                              documents held by the fair scheduler; single
+                              uploads are only checked against the
+                              interactive queue
+    task_seconds              EWMA of process_document wall time, recorded
+                              by the workers in Redis
+    estimated_drain_seconds   queue_depth * task_seconds / worker slots
+
+An upload is rejected with 429 and a Retry-After header once the depth or
+the estimated wait passes its limit. Admission fails open: if Redis cannot
+be read the upload is accepted.
+"""
+import logging
+import math
+import os
+from typing import Dict, Any, Optional
+
+import redis
+
+from app.metrics import metrics
+from app.scheduling import LANES, PENDING_KEY
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_REDIS_URL = os.getenv("ADMISSION_REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0"))
+ADMISSION_QUEUES = tuple(os.getenv("ADMISSION_QUEUES", ",".join(LANES)).split(","))
+ADMISSION_MAX_QUEUE_DEPTH = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "500"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "900"))
+# Documents processed concurrently across all workers
+ADMISSION_WORKER_SLOTS = int(os.getenv("ADMISSION_WORKER_SLOTS", "4"))
+# Task time assumed until workers have reported one
+ADMISSION_DEFAULT_TASK_SECONDS = float(os.getenv("ADMISSION_DEFAULT_TASK_SECONDS", "30"))
+ADMISSION_EWMA_ALPHA = float(os.getenv("ADMISSION_EWMA_ALPHA", "0.2"))
+
+TASK_SECONDS_KEY = "admission:task_seconds"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the broker backlog is over its limit; retry_after is in seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueMonitor:
+    """
+    Broker backlog and task time estimates.
+
+    Usage:
+        monitor = QueueMonitor(redis_client)
+        monitor.check()                    # raises QueueFullError when over the limit
+        monitor.record_task_seconds(12.5)  # worker side, after each document
+    """
+
+    def __init__(
+        self,
+        client,
+        queues=ADMISSION_QUEUES,
+        held_key: Optional[str] = PENDING_KEY,
+        max_queue_depth: int = ADMISSION_MAX_QUEUE_DEPTH,
+        max_wait_seconds: float = ADMISSION_MAX_WAIT_SECONDS,
+        worker_slots: int = ADMISSION_WORKER_SLOTS,
+        default_task_seconds: float = ADMISSION_DEFAULT_TASK_SECONDS,
+        alpha: float = ADMISSION_EWMA_ALPHA
+    ):
+        self.client = client
+        self.queues = tuple(queues)
+        self.held_key = held_key
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+        self.worker_slots = max(1, worker_slots)
+        self.default_task_seconds = default_task_seconds
+        self.alpha = alpha
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Documents waiting per broker queue, plus "held" by the fair scheduler."""
+        pipe = self.client.pipeline(transaction=False)
+        for queue in self.queues:
+            pipe.llen(queue)
+        if self.held_key:
+            pipe.get(self.held_key)
+        values = pipe.execute()
+        depths = {queue: int(value) for queue, value in zip(self.queues, values)}
+        if self.held_key:
+            depths["held"] = max(0, int(values[-1] or 0))
+        return depths
+
+    def task_seconds(self) -> float:
+        value = self.client.get(TASK_SECONDS_KEY)
+        return float(value) if value is not None else self.default_task_seconds
+
+    def record_task_seconds(self, seconds: float) -> None:
+        """Fold one task's wall time into the shared EWMA (best effort)."""
+        try:
+            previous = self.client.get(TASK_SECONDS_KEY)
+            if previous is None:
+                value = seconds
+            else:
+                # Concurrent workers may overwrite each other's update; the estimate tolerates it
+                value = self.alpha * seconds + (1 - self.alpha) * float(previous)
+            self.client.set(TASK_SECONDS_KEY, f"{value:.4f}")
+        except Exception as e:
+            logger.warning(f"Failed to record task time: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        """Current backlog, task time estimate and estimated drain time."""
+        depths = self.queue_depths()
+        depth = sum(depths.values())
+        task_seconds = self.task_seconds()
+        return {
+            "queues": depths,
+            "queue_depth": depth,
+            "task_seconds": round(task_seconds, 3),
+            "worker_slots": self.worker_slots,
+            "estimated_drain_seconds": round(depth * task_seconds / self.worker_slots, 1),
+            "max_queue_depth": self.max_queue_depth,
+            "max_wait_seconds": self.max_wait_seconds
+        }
+
+    def check(self, lane: Optional[str] = None, incoming: int = 1) -> Dict[str, Any]:
+        """
+        Admit or reject an upload of incoming documents against the current
+        backlog: the last of them must still be within the limits.
+
+        With a lane, only that queue's depth counts: single uploads go to the
+        interactive lane and do not wait behind bulk work, so a bulk backlog
+        must not turn them away. Without one (bulk uploads) the whole backlog
+        counts, documents held by the fair scheduler included.
+
+        A batch larger than the depth limit is only admitted into an empty
+        queue, so it is not rejected forever.
+
+        Returns:
+            The status() the decision was based on
+
+        Raises:
+            QueueFullError: depth or estimated wait is over its limit
+        """
+        status = self.status()
+        queued = status["queues"].get(lane, 0) if lane else status["queue_depth"]
+        # Documents ahead of the last incoming one
+        depth = queued + max(incoming, 1) - 1
+        task_seconds = max(status["task_seconds"], 1e-3)
+        drain = depth * status["task_seconds"] / self.worker_slots
+
+        if queued == 0 or (depth < self.max_queue_depth and drain < self.max_wait_seconds):
+            metrics.incr("admission.accepted")
+            return status
+
+        # Time until the backlog is back under both limits
+        excess_depth = depth - self.max_queue_depth + 1
+        retry_after = max(
+            excess_depth * task_seconds / self.worker_slots,
+            drain - self.max_wait_seconds,
+            1
+        )
+        metrics.incr("admission.rejected")
+        raise QueueFullError(
+            f"Processing queue is full ({queued} documents waiting, about {int(drain)}s to drain"
+            f"{f' with {incoming} more' if incoming > 1 else ''})",
+            retry_after=int(math.ceil(retry_after))
+        )
+
+
+class UploadAdmission:
+    """
+    Admission check used by the API; disabled or unreachable Redis admits everything.
+    """
+
+    def __init__(self, monitor: Optional[QueueMonitor], enabled: bool = ADMISSION_ENABLED):
+        self.monitor = monitor
+        self.enabled = enabled
+
+    def check(self, lane: Optional[str] = None, incoming: int = 1) -> None:
+        if not self.enabled or self.monitor is None:
+            return
+        try:
+            self.monitor.check(lane, incoming)
+        except QueueFullError:
+            raise
+        except Exception as e:
+            # Fail open: a broken backlog reading must not block uploads
+            logger.warning(f"Admission check skipped: {e}")
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        if self.monitor is None:
+            return None
+        try:
+            return self.monitor.status()
+        except Exception as e:
+            logger.warning(f"Queue status unavailable: {e}")
+            return None
+
+    def record_task_seconds(self, seconds: float) -> None:
+        if self.monitor is not None:
+            self.monitor.record_task_seconds(seconds)
+
+
+_admission: Optional[UploadAdmission] = None
+
+
+def get_admission() -> UploadAdmission:
+    """Process-wide admission control (API) / task time recorder (workers)."""
+    global _admission
+    if _admission is None:
+        client = redis.Redis.from_url(ADMISSION_REDIS_URL, socket_connect_timeout=1.0, socket_timeout=1.0)
+        _admission = UploadAdmission(QueueMonitor(client))
+    return _admission
@@ -0,0 +1,157 @@
+"""
+Precomputed Bill Aggregates
+
+Damages summaries total charged and allowed amounts of a case's bills by
+provider, CPT code and date range. bill_aggregates holds, per case, one row
+per (provider, CPT code, date of service) with the line item count and the
+charged / allowed totals.
+
+Rows are maintained with deltas: when a bill completes, fails or is edited,
+its contribution (its line_items grouped the same way) is taken before and
+after its rows are replaced, and only the difference is applied, in the
+transaction of the document's write. Summaries read the aggregate rows of
+the case only, so their cost depends on the number of distinct
+provider / code / date groups, not on how many bills the case holds.
+"""
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Any, Optional, Tuple
+
+from sqlalchemy import Select, func, inspect, select
+
+from app.metrics import metrics
+from app.models import BillAggregate, LineItem
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_GROUPS = {
+    "provider": BillAggregate.provider,
+    "cpt_code": BillAggregate.cpt_code,
+    "service_date": BillAggregate.service_date
+}
+
+GroupKey = Tuple[Optional[str], Optional[str], Optional[date]]
+# (line items, charged, allowed)
+Totals = Tuple[int, Decimal, Decimal]
+
+
+def _decimal(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal("0")
+
+
+def document_contribution(db, document_id: int) -> Dict[GroupKey, Totals]:
+    """A bill's line items grouped as in bill_aggregates (one GROUP BY on its line_items)."""
+    rows = db.execute(
+        select(
+            LineItem.provider,
+            LineItem.cpt_code,
+            LineItem.service_date,
+            func.count(LineItem.id),
+            func.sum(LineItem.charged_amount),
+            func.sum(LineItem.allowed_amount)
+        )
+        .where(LineItem.document_id == document_id)
+        .group_by(LineItem.provider, LineItem.cpt_code, LineItem.service_date)
+    ).all()
+    return {
+        (provider, cpt_code, service_date): (count, _decimal(charged), _decimal(allowed))
+        for provider, cpt_code, service_date, count, charged, allowed in rows
+    }
+
+
+def apply_contribution_change(
+    db,
+    case_id: int,
+    before: Dict[GroupKey, Totals],
+    after: Dict[GroupKey, Totals]
+) -> int:
+    """
+    Apply the difference between a bill's old and new contribution to the
+    case's aggregate rows (creating and deleting rows as groups appear and
+    empty). Callers hold the case lock; flushed with their transaction.
+
+    Returns:
+        Number of aggregate rows changed
+    """
+    zero: Totals = (0, Decimal("0"), Decimal("0"))
+    deltas = {}
+    for key in before.keys() | after.keys():
+        delta = tuple(new - old for new, old in zip(after.get(key, zero), before.get(key, zero)))
+        if any(delta):
+            deltas[key] = delta
+
+    for (provider, cpt_code, service_date), (line_items, charged, allowed) in deltas.items():
+        row = db.scalars(select(BillAggregate).where(
+            BillAggregate.case_id == case_id,
+            BillAggregate.provider.is_not_distinct_from(provider),
+            BillAggregate.cpt_code.is_not_distinct_from(cpt_code),
+            BillAggregate.service_date.is_not_distinct_from(service_date)
+        )).first()
+        if row is None:
+            row = BillAggregate(
+                case_id=case_id, provider=provider, cpt_code=cpt_code, service_date=service_date,
+                line_items=0, charged_amount=Decimal("0"), allowed_amount=Decimal("0")
+            )
+            db.add(row)
+        row.line_items += line_items
+        row.charged_amount = _decimal(row.charged_amount) + charged
+        row.allowed_amount = _decimal(row.allowed_amount) + allowed
+        if row.line_items <= 0:
+            if inspect(row).persistent:
+                db.delete(row)
+            else:
+                db.expunge(row)
+
+    db.flush()
+    if deltas:
+        metrics.incr("bill_aggregates.rows_changed", len(deltas))
+        logger.info(f"Applied {len(deltas)} bill aggregate changes to case {case_id}")
+    return len(deltas)
+
+
+def summary_query(
+    case_id: int,
+    group_by: Optional[str] = None,
+    provider: Optional[str] = None,
+    cpt: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> Select:
+    """
+    Totals of a case's bills over its aggregate rows: one row per group_by
+    value (see SUMMARY_GROUPS), or a single row for the whole case.
+
+    Date filters are inclusive and drop line items without a parseable date.
+    """
+    columns = [
+        func.coalesce(func.sum(BillAggregate.line_items), 0).label("line_items"),
+        func.coalesce(func.sum(BillAggregate.charged_amount), 0).label("charged_amount"),
+        func.coalesce(func.sum(BillAggregate.allowed_amount), 0).label("allowed_amount")
+    ]
+    key = SUMMARY_GROUPS[group_by] if group_by else None
+    query = select(key.label("key"), *columns) if key is not None else select(*columns)
+    query = query.where(BillAggregate.case_id == case_id)
+    if provider:
+        query = query.where(BillAggregate.provider == provider)
+    if cpt:
+        query = query.where(BillAggregate.cpt_code == cpt.strip().upper())
+    if date_from:
+        query = query.where(BillAggregate.service_date >= date_from)
+    if date_to:
+        query = query.where(BillAggregate.service_date <= date_to)
+    if key is not None:
+        query = query.group_by(key).order_by(func.sum(BillAggregate.charged_amount).desc(), key)
+    return query
+
+
+def summary_response(row) -> Dict[str, Any]:
+    response = {
+        "line_items": int(row.line_items),
+        "charged_amount": round(float(row.charged_amount), 2),
+        "allowed_amount": round(float(row.allowed_amount), 2)
+    }
+    if "key" in row._fields:
+        key = row.key
+        response = {"key": key.isoformat() if isinstance(key, date) else key, **response}
+    return response
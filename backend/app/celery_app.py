@@ -1,4 +1,5 @@
 from celery import Celery
+from kombu import Queue
 import os
 
 # Initialize Celery
@@ -14,6 +15,13 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    # Priority lanes (app/scheduling.py); run a worker on "interactive" alone
+    # so small documents never wait behind bulk work
+    task_queues=(Queue('interactive'), Queue('bulk')),
+    task_default_queue='interactive',
+    # Long tasks: a worker reserves one document at a time, so queued
+    # documents stay visible to (and fairly ordered for) other workers
+    worker_prefetch_multiplier=int(os.getenv("CELERY_PREFETCH_MULTIPLIER", "1")),
 )
 
 # Import tasks to register them
@@ -0,0 +1,205 @@
+"""
+Map-Reduce Chunked Extraction
+
+Long medical records exceed model context limits, and a single extraction
+call serializes the whole record into one slow request. ChunkedExtractor
+splits the OCR text on page boundaries (with overlapping pages so encounters
+that straddle a boundary are seen whole), extracts the chunks concurrently
+and merges the partial chronologies, deduplicating events that describe the
+same encounter (same date, provider and encounter type).
+
+Extraction latency then scales with the largest chunk, not the record length.
+"""
+import logging
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.verification_service import canonical_date
+
+logger = logging.getLogger(__name__)
+
+LLM_CHUNK_MAX_CHARS = int(os.getenv("LLM_CHUNK_MAX_CHARS", "24000"))
+LLM_CHUNK_OVERLAP_PAGES = int(os.getenv("LLM_CHUNK_OVERLAP_PAGES", "1"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+class TextChunk:
+    """A contiguous run of pages sent to the LLM in one call."""
+
+    def __init__(self, first_page: int, last_page: int, text: str):
+        self.first_page = first_page
+        self.last_page = last_page
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"TextChunk(pages {self.first_page}-{self.last_page}, {len(self.text)} chars)"
+
+
+def split_into_chunks(
+    page_texts: List[str],
+    max_chars: int = LLM_CHUNK_MAX_CHARS,
+    overlap_pages: int = LLM_CHUNK_OVERLAP_PAGES
+) -> List[TextChunk]:
+    """
+    Group pages into chunks of at most max_chars, overlapping by whole pages.
+
+    A single page longer than max_chars becomes several chunks split at
+    whitespace. Page numbers are 1-based indexes into page_texts.
+    """
+    chunks = []
+    start = 0
+    covered = -1  # Last page already in a chunk
+
+    while start < len(page_texts):
+        end = start
+        size = len(page_texts[start])
+        while end + 1 < len(page_texts) and size + 1 + len(page_texts[end + 1]) <= max_chars:
+            end += 1
+            size += 1 + len(page_texts[end])
+
+        if end <= covered:
+            # Only carried-over overlap fits (the next page is too long): skip past it
+            start = covered + 1
+            continue
+        covered = end
+
+        if start == end and size > max_chars:
+            chunks.extend(
+                TextChunk(start + 1, start + 1, piece)
+                for piece in _split_long_text(page_texts[start], max_chars)
+            )
+        else:
+            chunks.append(TextChunk(start + 1, end + 1, "\n".join(page_texts[start:end + 1]) + "\n"))
+
+        if end + 1 >= len(page_texts):
+            break
+        # Step back by the overlap, but always make progress
+        start = max(start + 1, end + 1 - overlap_pages)
+
+    return chunks
+
+
+def _split_long_text(text: str, max_chars: int) -> List[str]:
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut])
+        text = text[cut:].lstrip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def _normalize_date(value: Any) -> str:
+    # Partial dates keep their text: completing them from today would give the
+    # same encounter a different key depending on when it was processed
+    return canonical_date(str(value)) or str(value).strip()
+
+
+def _normalize_name(value: Any) -> str:
+    return _NON_ALNUM.sub(" ", str(value or "").lower()).strip()
+
+
+def event_key(event: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Identity of an encounter: (date, provider, encounter type), normalized."""
+    return (
+        _normalize_date(event.get("date", "")),
+        _normalize_name(event.get("provider")),
+        _normalize_name(event.get("encounter_type"))
+    )
+
+
+def merge_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Deduplicate events describing the same encounter.
+
+    Duplicates keep the longest summary and the union of diagnosis codes.
+    The result is ordered by date.
+    """
+    merged: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+    for event in events:
+        key = event_key(event)
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = {**event, "diagnosis_codes": list(event.get("diagnosis_codes", []))}
+            continue
+
+        if len(event.get("summary", "")) > len(existing.get("summary", "")):
+            existing["summary"] = event["summary"]
+        for code in event.get("diagnosis_codes", []):
+            if code not in existing["diagnosis_codes"]:
+                existing["diagnosis_codes"].append(code)
+
+    return sorted(merged.values(), key=lambda event: event_key(event)[0])
+
+
+def merge_chronologies(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce per-chunk chronologies into a single MedicalChronology dict."""
+    names = Counter(p.get("patient_name") for p in partials if p.get("patient_name"))
+    events = [event for partial in partials for event in partial.get("events", [])]
+
+    return {
+        "patient_name": names.most_common(1)[0][0] if names else "",
+        "events": merge_events(events)
+    }
+
+
+class ChunkedExtractor:
+    """
+    Map-reduce chronology extraction over page-aligned chunks.
+    """
+
+    def __init__(
+        self,
+        llm_service,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_chars: int = LLM_CHUNK_MAX_CHARS,
+        overlap_pages: int = LLM_CHUNK_OVERLAP_PAGES
+    ):
+        self.llm_service = llm_service
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_chars = max_chars
+        self.overlap_pages = overlap_pages
+        self.last_chunk_count = 0
+
+    def extract_chronology(self, page_texts: List[str], chunks: Optional[List[TextChunk]] = None) -> Dict[str, Any]:
+        """
+        Extract a chronology from OCR page texts, chunking when needed.
+
+        Args:
+            page_texts: OCR text of each page, in page order
+            chunks: Chunks already split from page_texts (split here when omitted)
+
+        Returns:
+            dict: Merged chronology matching MedicalChronology
+        """
+        if chunks is None:
+            chunks = split_into_chunks(page_texts, self.max_chars, self.overlap_pages)
+        self.last_chunk_count = len(chunks)
+
+        if len(chunks) <= 1:
+            text = chunks[0].text if chunks else ""
+            return self.llm_service.extract_chronology(text)
+
+        logger.info(
+            f"ChunkedExtractor: {len(page_texts)} pages in {len(chunks)} chunks, "
+            f"concurrency {self.max_concurrency}"
+        )
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(chunks))) as pool:
+            partials = list(pool.map(lambda chunk: self.llm_service.extract_chronology(chunk.text), chunks))
+
+        merged = merge_chronologies(partials)
+        logger.info(
+            f"ChunkedExtractor: merged {sum(len(p.get('events', [])) for p in partials)} "
+            f"events into {len(merged['events'])}"
+        )
+        return merged
@@ -1,11 +1,56 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/medical_mvp")
 
-engine = create_engine(DATABASE_URL)
+# Connection pool settings (per process; sync engine in workers, async engine in the API)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Prepared statements cached per asyncpg connection (0 behind PgBouncer in transaction mode)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+
+def pool_options(url: str) -> dict:
+    """QueuePool settings for server databases; SQLite keeps SQLAlchemy's defaults."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def async_database_url(url: str) -> str:
+    """The async driver URL for a sync one (postgresql:// -> postgresql+asyncpg://)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        parsed = parsed.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+    elif parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+
+# Optional streaming replica for read-only endpoints (app/read_routing.py)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL") or None
+ASYNC_DATABASE_REPLICA_URL = os.getenv(
+    "ASYNC_DATABASE_REPLICA_URL",
+    async_database_url(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else ""
+) or None
+
+# Sync engine: Celery workers, upload endpoints, scripts
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -16,3 +61,70 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async engines: read endpoints of the API process. Created on first use, so
+# worker processes never import the async driver or open its pool.
+_async_engine = None
+_async_session_factory = None
+_async_replica_engine = None
+_async_replica_session_factory = None
+
+
+def _create_async_engine(url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    connect_args = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        connect_args["statement_cache_size"] = DB_STATEMENT_CACHE_SIZE
+    return create_async_engine(url, connect_args=connect_args, **pool_options(url))
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = _create_async_engine(ASYNC_DATABASE_URL)
+    return _async_engine
+
+
+def get_async_session_factory():
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        # expire_on_commit=False: attributes stay readable after commit without lazy IO
+        _async_session_factory = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_session_factory
+
+
+def replica_configured() -> bool:
+    return ASYNC_DATABASE_REPLICA_URL is not None
+
+
+def get_async_replica_session_factory():
+    """Sessions on the read replica (sessions are marked with info["replica"] = True)."""
+    global _async_replica_engine, _async_replica_session_factory
+    if _async_replica_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_replica_engine = _create_async_engine(ASYNC_DATABASE_REPLICA_URL)
+        _async_replica_session_factory = async_sessionmaker(
+            _async_replica_engine, autoflush=False, expire_on_commit=False, info={"replica": True}
+        )
+    return _async_replica_session_factory
+
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    global _async_engine, _async_session_factory, _async_replica_engine, _async_replica_session_factory
+    for async_engine in (_async_engine, _async_replica_engine):
+        if async_engine is not None:
+            await async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+    _async_replica_engine = None
+    _async_replica_session_factory = None
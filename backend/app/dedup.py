@@ -0,0 +1,275 @@
+"""
+Near-Duplicate Page and Document Detection
+
+Case files often contain the same record several times (re-faxed,
+re-scanned, merged from several providers). Every page gets a MinHash
+signature of its word shingles; signatures are split into LSH bands stored
+in page_signature_bands, so candidate duplicates are found with one indexed
+lookup instead of comparing against every page ever seen.
+
+- Pages repeated within a document are dropped from the LLM input
+- A document whose pages are near-duplicates of an already completed
+  document reuses that document's extraction result (no LLM calls)
+- The duplicate ratio of every document, and of every bulk upload batch
+  (summed from the documents' counts), is reported
+"""
+import hashlib
+import logging
+import os
+import re
+import struct
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.metrics import metrics
+from app.models import Document, DocumentStatus, PageSignature, PageSignatureBand
+
+logger = logging.getLogger(__name__)
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "32"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+DEDUP_MIN_SHINGLES = int(os.getenv("DEDUP_MIN_SHINGLES", "5"))
+# Estimated Jaccard similarity above which two pages are the same page
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+# Fraction of a document's pages that must duplicate one earlier document to reuse its extraction
+DEDUP_DOCUMENT_THRESHOLD = float(os.getenv("DEDUP_DOCUMENT_THRESHOLD", "0.9"))
+# Band hashes per candidate lookup query (bind parameter limits)
+DEDUP_QUERY_BATCH = int(os.getenv("DEDUP_QUERY_BATCH", "10000"))
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str, size: int = DEDUP_SHINGLE_SIZE) -> set:
+    """Set of hashed word k-shingles of case-folded alphanumeric tokens."""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < size:
+        return {_hash32(" ".join(tokens))} if tokens else set()
+    return {_hash32(" ".join(tokens[i:i + size])) for i in range(len(tokens) - size + 1)}
+
+
+def _hash32(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHasher:
+    """MinHash with num_perm universal hash permutations (a * x + b mod p)."""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, seed: int = 1):
+        digest = hashlib.blake2b(f"minhash-{seed}".encode(), digest_size=8).digest()
+        state = int.from_bytes(digest, "little")
+        self.permutations: List[Tuple[int, int]] = []
+        for _ in range(num_perm):
+            # Deterministic parameters, so signatures stay comparable across workers
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            a = (state >> 3) % (_MERSENNE_PRIME - 1) + 1
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            b = (state >> 3) % _MERSENNE_PRIME
+            self.permutations.append((a, b))
+
+    def signature(self, shingle_set: set) -> List[int]:
+        """MinHash signature of a shingle set (empty sets get an all-max signature)."""
+        if not shingle_set:
+            return [_MAX_HASH] * len(self.permutations)
+        return [
+            min((a * x + b) % _MERSENNE_PRIME for x in shingle_set) & _MAX_HASH
+            for a, b in self.permutations
+        ]
+
+
+def similarity(signature_a: List[int], signature_b: List[int]) -> float:
+    """Estimated Jaccard similarity: fraction of equal MinHash values."""
+    equal = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return equal / len(signature_a)
+
+
+def band_hashes(signature: List[int], bands: int = DEDUP_BANDS) -> List[str]:
+    """Split a signature into LSH bands; returns one "<band>:<hash>" key per band."""
+    rows = len(signature) // bands
+    keys = []
+    for band in range(bands):
+        values = signature[band * rows:(band + 1) * rows]
+        digest = hashlib.blake2b(pack_signature(values), digest_size=12).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+
+def pack_signature(signature: List[int]) -> bytes:
+    return struct.pack(f"<{len(signature)}I", *signature)
+
+
+def unpack_signature(data: bytes) -> List[int]:
+    return list(struct.unpack(f"<{len(data) // 4}I", data))
+
+
+class DedupIndex:
+    """
+    Persistent LSH index over page signatures.
+
+    Usage:
+        index = DedupIndex(db)
+        report, page_texts = index.process_document(document, page_texts)
+    """
+
+    def __init__(
+        self,
+        db,
+        hasher: Optional[MinHasher] = None,
+        bands: int = DEDUP_BANDS,
+        threshold: float = DEDUP_THRESHOLD,
+        document_threshold: float = DEDUP_DOCUMENT_THRESHOLD
+    ):
+        self.db = db
+        self.hasher = hasher or MinHasher()
+        self.bands = bands
+        self.threshold = threshold
+        self.document_threshold = document_threshold
+
+    def find_duplicate(self, signature: List[int], exclude_document_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Most similar indexed page above the threshold, or None.
+
+        Returns:
+            {"document_id", "page_number", "similarity"}
+        """
+        return self.find_duplicates([signature], exclude_document_id)[0]
+
+    def find_duplicates(
+        self,
+        signatures: List[List[int]],
+        exclude_document_id: Optional[int] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        find_duplicate for many signatures with one lookup of all their band
+        hashes (split into DEDUP_QUERY_BATCH sized IN lists for huge documents).
+        """
+        page_keys = [band_hashes(signature, self.bands) for signature in signatures]
+        all_keys = sorted({key for keys in page_keys for key in keys})
+
+        candidates_by_key: Dict[str, List[PageSignature]] = {}
+        for start in range(0, len(all_keys), DEDUP_QUERY_BATCH):
+            query = (
+                self.db.query(PageSignatureBand.band_hash, PageSignature)
+                .join(PageSignature, PageSignatureBand.page_signature_id == PageSignature.id)
+                .filter(PageSignatureBand.band_hash.in_(all_keys[start:start + DEDUP_QUERY_BATCH]))
+            )
+            if exclude_document_id is not None:
+                query = query.filter(PageSignature.document_id != exclude_document_id)
+            for band_hash, candidate in query.all():
+                candidates_by_key.setdefault(band_hash, []).append(candidate)
+
+        unpacked: Dict[int, List[int]] = {}
+        matches = []
+        for signature, keys in zip(signatures, page_keys):
+            candidates = {c.id: c for key in keys for c in candidates_by_key.get(key, [])}
+            best = None
+            for candidate in candidates.values():
+                if candidate.id not in unpacked:
+                    unpacked[candidate.id] = unpack_signature(candidate.signature)
+                score = similarity(signature, unpacked[candidate.id])
+                if score >= self.threshold and (best is None or score > best["similarity"]):
+                    best = {"document_id": candidate.document_id, "page_number": candidate.page_number, "similarity": score}
+            matches.append(best)
+        return matches
+
+    def add_page(self, document_id: int, page_number: int, signature: List[int]) -> None:
+        """Index a page (flushed with the caller's transaction)."""
+        row = PageSignature(document_id=document_id, page_number=page_number, signature=pack_signature(signature))
+        self.db.add(row)
+        self.db.flush()
+        self.db.add_all(
+            PageSignatureBand(band_hash=key, page_signature_id=row.id)
+            for key in band_hashes(signature, self.bands)
+        )
+
+    def remove_document(self, document_id: int) -> None:
+        """Drop a document's pages from the index (before reprocessing it)."""
+        ids = [row.id for row in self.db.query(PageSignature.id).filter(PageSignature.document_id == document_id)]
+        if ids:
+            self.db.query(PageSignatureBand).filter(PageSignatureBand.page_signature_id.in_(ids)).delete(synchronize_session=False)
+            self.db.query(PageSignature).filter(PageSignature.id.in_(ids)).delete(synchronize_session=False)
+
+    def process_document(self, document: Document, page_texts: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Check every page against the index and index the document's pages.
+
+        Pages repeated within the document are blanked in the returned
+        page_texts (one entry per page is kept, so page numbers still line
+        up). Pages matching other documents are reported; when most of them
+        match one completed document, that document is returned as
+        duplicate_of_document so its extraction can be reused.
+
+        Returns:
+            (report, page_texts)
+        """
+        self.remove_document(document.id)
+
+        seen: List[Tuple[int, List[int]]] = []
+        unique: List[List[int]] = []
+        cross_matches: Dict[int, int] = {}
+        within, cross = 0, 0
+        deduplicated = list(page_texts)
+
+        for page_number, text in enumerate(page_texts, start=1):
+            shingle_set = shingles(text)
+            if len(shingle_set) < DEDUP_MIN_SHINGLES:
+                # Blank and near-empty pages would all look alike
+                continue
+            signature = self.hasher.signature(shingle_set)
+
+            if any(similarity(signature, earlier) >= self.threshold for _, earlier in seen):
+                within += 1
+                deduplicated[page_number - 1] = ""
+            else:
+                unique.append(signature)
+            seen.append((page_number, signature))
+        indexed = len(seen)
+
+        # Other documents' pages for all pages at once (this document's are excluded)
+        for match in self.find_duplicates(unique, exclude_document_id=document.id) if unique else []:
+            if match:
+                cross += 1
+                cross_matches[match["document_id"]] = cross_matches.get(match["document_id"], 0) + 1
+
+        for page_number, signature in seen:
+            self.add_page(document.id, page_number, signature)
+
+        duplicate_of = None
+        if cross_matches and indexed:
+            source_id, matched = max(cross_matches.items(), key=lambda item: item[1])
+            source = self.db.query(Document).filter(Document.id == source_id).first()
+            if (
+                matched / indexed >= self.document_threshold
+                and source is not None
+                and source.status == DocumentStatus.COMPLETED
+                and source.extraction_result
+            ):
+                duplicate_of = source_id
+
+        report = {
+            "pages": len(page_texts),
+            "indexed_pages": indexed,
+            "duplicate_pages_within_document": within,
+            "duplicate_pages_across_documents": cross,
+            "duplicate_ratio": round((within + cross) / indexed, 4) if indexed else 0.0,
+            "duplicate_of_document": duplicate_of
+        }
+        metrics.incr("dedup.pages", indexed)
+        metrics.incr("dedup.duplicate_pages", within + cross)
+        logger.info(f"Dedup report for document {document.id}: {report}")
+        return report, deduplicated
+
+
+def strip_links(extraction_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an extraction result without source_refs / _match_summary, ready to re-link."""
+
+    def strip(value):
+        if isinstance(value, dict):
+            return {k: strip(v) for k, v in value.items() if k not in ("source_refs", "_match_summary", "_partial")}
+        if isinstance(value, list):
+            return [strip(v) for v in value]
+        return value
+
+    return strip(extraction_result)
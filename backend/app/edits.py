@@ -0,0 +1,152 @@
+"""
+Extraction Edits
+
+Reviewers correct extraction results (a misread amount, a missing CPT
+code, a wrong date). An edit replaces top-level fields of a completed
+document's extraction_result and, in the same transaction, everything
+derived from it: the materialized events / line items, the case timeline
+and bill aggregates (app.materialization.replace_document_rows) and the
+pre-encoded API response body.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import select, update
+
+from app.materialization import MATERIALIZATION_ENABLED, replace_document_rows
+from app.metrics import metrics
+from app.models import Case, Document, DocumentStatus, DocumentType
+from app.read_routing import get_recent_writes
+from app.response_cache import get_response_cache
+from app.schemas import BillLineItem, MedicalEvent
+from app.serialization import document_response, encode_json
+
+logger = logging.getLogger(__name__)
+
+# Editable top-level fields of each document type and the schema of their items
+EDITABLE_FIELDS = {
+    DocumentType.CHRONOLOGY: {"patient_name": None, "events": MedicalEvent},
+    DocumentType.BILL: {"invoice_number": None, "total_amount": None, "provider": None, "line_items": BillLineItem}
+}
+
+
+class ExtractionEditError(ValueError):
+    """An edit that cannot be applied; status_code is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def validate_changes(document_type: DocumentType, changes: Dict[str, Any]) -> None:
+    """
+    Check an edit against the extraction schema of the document type.
+
+    List items are validated without their source_refs, which are kept as
+    sent (clients send back the refs of items they did not re-locate).
+    """
+    fields = EDITABLE_FIELDS[document_type]
+    if not changes:
+        raise ExtractionEditError("No changes given")
+    unknown = sorted(set(changes) - set(fields))
+    if unknown:
+        raise ExtractionEditError(
+            f"Fields not editable on {document_type.value} documents: {', '.join(unknown)}"
+        )
+
+    for name, value in changes.items():
+        item_schema = fields[name]
+        if item_schema is None:
+            if name == "total_amount" and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise ExtractionEditError("total_amount must be a number")
+            if name != "total_amount" and value is not None and not isinstance(value, str):
+                raise ExtractionEditError(f"{name} must be a string")
+            continue
+        if not isinstance(value, list):
+            raise ExtractionEditError(f"{name} must be a list")
+        for index, item in enumerate(value):
+            if not isinstance(item, dict):
+                raise ExtractionEditError(f"{name}[{index}] must be an object")
+            try:
+                item_schema.model_validate({key: item[key] for key in item if key != "source_refs"})
+            except ValidationError as e:
+                raise ExtractionEditError(f"Invalid {name}[{index}]: {e.errors()[0]['msg']}") from e
+
+
+def edit_extraction(
+    db,
+    document_id: int,
+    changes: Dict[str, Any],
+    expected_updated_at: Optional[str] = None
+) -> Optional[bytes]:
+    """
+    Apply an edit to a completed document and commit it.
+
+    The documents row (and its case's row, first, as the worker does) is
+    locked (FOR UPDATE) from the read of its extraction_result to the commit, so concurrent edits (and an edit racing
+    the worker's final write) apply one after the other instead of one
+    silently overwriting the other. With expected_updated_at (the
+    updated_at the client last read, e.g. from If-Match), the edit is only
+    applied to that version.
+
+    Returns:
+        The new pre-encoded GET /api/v1/documents/{id} response body, or
+        None if the document does not exist
+
+    Raises:
+        ExtractionEditError: 409 unless the document is COMPLETED or when it
+            changed since expected_updated_at, 400 for fields that are not
+            editable or do not match the schema
+    """
+    # Same lock order as the worker's final write (case row, then documents row)
+    case_id = db.scalar(select(Document.case_id).where(Document.id == document_id))
+    if case_id:
+        db.execute(select(Case.id).where(Case.id == case_id).with_for_update())
+    document = db.scalars(
+        select(Document).where(Document.id == document_id).with_for_update().execution_options(populate_existing=True)
+    ).first()
+    if document is None:
+        db.rollback()
+        return None
+    try:
+        return _apply_edit(db, document, changes, expected_updated_at)
+    except ExtractionEditError:
+        db.rollback()
+        raise
+
+
+def _apply_edit(db, document: Document, changes: Dict[str, Any], expected_updated_at: Optional[str]) -> bytes:
+    if expected_updated_at is not None and document.updated_at.isoformat() != expected_updated_at:
+        raise ExtractionEditError(
+            f"Document {document.id} changed since {expected_updated_at} (now {document.updated_at.isoformat()})",
+            status_code=409
+        )
+    if document.status != DocumentStatus.COMPLETED or document.document_type not in EDITABLE_FIELDS:
+        raise ExtractionEditError(f"Document {document.id} has no completed extraction to edit", status_code=409)
+    validate_changes(document.document_type, changes)
+
+    document_id = document.id
+    extraction_result = {**(document.extraction_result or {}), **changes}
+    edited_at = datetime.utcnow()
+    response_body = encode_json(document_response(
+        document_id, document.filename, document.status, document.created_at, edited_at,
+        document.document_type, extraction_result, document.ocr_result
+    ))
+
+    if MATERIALIZATION_ENABLED:
+        replace_document_rows(db, document_id, document.case_id, document.document_type, extraction_result)
+    db.execute(update(Document).where(Document.id == document_id).values(
+        extraction_result=extraction_result,
+        response_body=response_body,
+        updated_at=edited_at
+    ))
+    db.commit()
+    # The reviewer reads the corrected summaries next: listing reads go to the primary too
+    get_recent_writes().mark([document_id], listing=True)
+    get_response_cache().invalidate([document_id])
+
+    metrics.incr("edits.applied")
+    logger.info(f"Edited {', '.join(sorted(changes))} of document {document_id}")
+    return response_body
@@ -0,0 +1,303 @@
+"""
+Bulk Export of Extractions
+
+Billing audits want every line item or event of a case or a date range,
+which can be millions of rows; building that in memory (or through
+/api/v1/documents) would exhaust the API. Exports read the materialized
+line_items / events tables (app/materialization.py) with a server-side
+cursor, batch by batch (EXPORT_BATCH_SIZE rows), and encode each batch as
+soon as it arrives:
+
+    csv       header line, then one line per row
+    ndjson    one JSON object per line
+    parquet   one row group per batch (pyarrow, imported on first use)
+
+Memory stays bounded by one batch whatever the size of the export. The
+API sends the chunks with chunked transfer encoding
+(GET /api/v1/export/{kind}); the CLI writes them to a file or stdout:
+
+    python -m app.export line_items --case-id 12 --format parquet -o case-12.parquet
+"""
+import argparse
+import csv
+import io
+import logging
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional, Sequence
+
+import orjson
+from sqlalchemy import Select, select
+
+from app.metrics import metrics
+from app.models import Document, Event, LineItem
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+# Exported columns of each kind: (name, column, type)
+EXPORT_COLUMNS = {
+    "line_items": (
+        ("document_id", LineItem.document_id, "int"),
+        ("case_id", Document.case_id, "int"),
+        ("filename", Document.filename, "string"),
+        ("position", LineItem.position, "int"),
+        ("service_date", LineItem.service_date, "date"),
+        ("date_text", LineItem.date_text, "string"),
+        ("cpt_code", LineItem.cpt_code, "string"),
+        ("description", LineItem.description, "string"),
+        ("charged_amount", LineItem.charged_amount, "decimal"),
+        ("allowed_amount", LineItem.allowed_amount, "decimal"),
+        ("provider", LineItem.provider, "string"),
+        ("invoice_number", LineItem.invoice_number, "string")
+    ),
+    "events": (
+        ("document_id", Event.document_id, "int"),
+        ("case_id", Document.case_id, "int"),
+        ("filename", Document.filename, "string"),
+        ("position", Event.position, "int"),
+        ("event_date", Event.event_date, "date"),
+        ("date_text", Event.date_text, "string"),
+        ("provider", Event.provider, "string"),
+        ("encounter_type", Event.encounter_type, "string"),
+        ("summary", Event.summary, "string"),
+        ("diagnosis_codes", Event.diagnosis_codes, "list")
+    )
+}
+
+EXPORT_MODELS = {"line_items": LineItem, "events": Event}
+EXPORT_DATE_COLUMNS = {"line_items": LineItem.service_date, "events": Event.event_date}
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+def export_query(
+    kind: str,
+    case_id: Optional[int] = None,
+    document_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> Select:
+    """
+    Rows of an export in primary key order (a document's rows stay together).
+
+    Date filters are inclusive and drop rows without a parseable date.
+    """
+    model = EXPORT_MODELS[kind]
+    query = select(*(column.label(name) for name, column, _ in EXPORT_COLUMNS[kind])).join(
+        Document, Document.id == model.document_id
+    )
+    if case_id is not None:
+        query = query.where(Document.case_id == case_id)
+    if document_id is not None:
+        query = query.where(model.document_id == document_id)
+    if date_from:
+        query = query.where(EXPORT_DATE_COLUMNS[kind] >= date_from)
+    if date_to:
+        query = query.where(EXPORT_DATE_COLUMNS[kind] <= date_to)
+    # yield_per streams the rows through a server-side cursor
+    return query.order_by(model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+# --- Writers ---
+
+class CSVExportWriter:
+    """CSV with a header line; dates ISO formatted, lists joined with ";"."""
+
+    def __init__(self, columns: Sequence[tuple]):
+        self.columns = columns
+
+    def start(self) -> bytes:
+        return self._encode([[name for name, _, _ in self.columns]])
+
+    def write(self, rows: List[Sequence[Any]]) -> bytes:
+        return self._encode([[self._value(value) for value in row] for row in rows])
+
+    def finish(self) -> bytes:
+        return b""
+
+    def _value(self, value):
+        if value is None:
+            return ""
+        if isinstance(value, date):
+            return value.isoformat()
+        if isinstance(value, list):
+            return ";".join(str(item) for item in value)
+        return value
+
+    def _encode(self, lines) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(lines)
+        return buffer.getvalue().encode("utf-8")
+
+
+class NDJSONExportWriter:
+    """One JSON object per line; amounts as numbers, as in the API responses."""
+
+    def __init__(self, columns: Sequence[tuple]):
+        self.names = [name for name, _, _ in columns]
+
+    def start(self) -> bytes:
+        return b""
+
+    def write(self, rows: List[Sequence[Any]]) -> bytes:
+        return b"".join(
+            orjson.dumps(dict(zip(self.names, row)), default=_json_default) + b"\n" for row in rows
+        )
+
+    def finish(self) -> bytes:
+        return b""
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file whose written bytes are taken out after each row group."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def take(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+class ParquetExportWriter:
+    """Parquet, one row group per batch; amounts as decimal(12, 2)."""
+
+    def __init__(self, columns: Sequence[tuple]):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        types = {
+            "int": pyarrow.int64(),
+            "string": pyarrow.string(),
+            "date": pyarrow.date32(),
+            "decimal": pyarrow.decimal128(12, 2),
+            "list": pyarrow.list_(pyarrow.string())
+        }
+        self.schema = pyarrow.schema([(name, types[kind]) for name, _, kind in columns])
+        self.sink = _DrainableSink()
+        self.writer = pyarrow.parquet.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def start(self) -> bytes:
+        return self.sink.take()
+
+    def write(self, rows: List[Sequence[Any]]) -> bytes:
+        columns = list(zip(*rows)) if rows else [[] for _ in self.schema]
+        self.writer.write_table(self.pyarrow.Table.from_arrays(
+            [self.pyarrow.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema
+        ))
+        return self.sink.take()
+
+    def finish(self) -> bytes:
+        self.writer.close()
+        return self.sink.take()
+
+
+EXPORT_WRITERS = {"csv": CSVExportWriter, "ndjson": NDJSONExportWriter, "parquet": ParquetExportWriter}
+
+
+def export_writer(kind: str, export_format: str):
+    return EXPORT_WRITERS[export_format](EXPORT_COLUMNS[kind])
+
+
+# --- Streaming ---
+
+def iter_export(db, kind: str, export_format: str, **filters) -> Iterator[bytes]:
+    """Encoded chunks of an export on a sync session (CLI, scripts)."""
+    writer = export_writer(kind, export_format)
+    rows = 0
+    yield writer.start()
+    for batch in db.execute(export_query(kind, **filters)).partitions():
+        rows += len(batch)
+        yield writer.write(batch)
+    yield writer.finish()
+    _record(kind, export_format, rows)
+
+
+async def stream_export(db, kind: str, export_format: str, **filters) -> AsyncIterator[bytes]:
+    """Encoded chunks of an export on an async session (API streaming responses)."""
+    writer = export_writer(kind, export_format)
+    rows = 0
+    yield writer.start()
+    result = await db.stream(export_query(kind, **filters))
+    async for batch in result.partitions():
+        rows += len(batch)
+        yield writer.write(batch)
+    yield writer.finish()
+    _record(kind, export_format, rows)
+
+
+def _record(kind: str, export_format: str, rows: int) -> None:
+    metrics.incr(f"export.{kind}.rows", rows)
+    logger.info(f"Exported {rows} {kind} as {export_format}")
+
+
+def write_export(db, out, kind: str, export_format: str, **filters) -> int:
+    """Write an export to a binary file object; returns the number of bytes written."""
+    written = 0
+    for chunk in iter_export(db, kind, export_format, **filters):
+        if chunk:
+            out.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    arg_parser = argparse.ArgumentParser(description="Export materialized line items or events")
+    arg_parser.add_argument("kind", choices=list(EXPORT_COLUMNS))
+    arg_parser.add_argument("--format", dest="export_format", choices=list(EXPORT_WRITERS), default="csv")
+    arg_parser.add_argument("--case-id", type=int)
+    arg_parser.add_argument("--document-id", type=int)
+    arg_parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="YYYY-MM-DD (inclusive)")
+    arg_parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="YYYY-MM-DD (inclusive)")
+    arg_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = arg_parser.parse_args(argv)
+
+    from app.database import SessionLocal
+
+    filters = {
+        "case_id": args.case_id,
+        "document_id": args.document_id,
+        "date_from": args.date_from,
+        "date_to": args.date_to
+    }
+    with SessionLocal() as db:
+        if args.output:
+            with open(args.output, "wb") as out:
+                written = write_export(db, out, args.kind, args.export_format, **filters)
+        else:
+            written = write_export(db, sys.stdout.buffer, args.kind, args.export_format, **filters)
+            sys.stdout.buffer.flush()
+    print(f"Wrote {written:,} bytes", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Bulk Document Ingestion
+
+Onboarding a case file means hundreds of PDFs. Instead of one request, one
+single-row transaction and one task dispatch per PDF, a bulk upload:
+
+- accepts many PDFs and/or zip archives of PDFs in one request
+- inserts all Document rows (and their UploadBatch) in one transaction
+- is handed to the bulk lane's fair scheduler with one Redis pipeline
+  (app.tasks.dispatch_documents)
+
+Batch progress is one GROUP BY over the indexed documents.batch_id column.
+"""
+import logging
+import os
+import shutil
+import zipfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app.models import Document, DocumentStatus, UploadBatch
+
+logger = logging.getLogger(__name__)
+
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "1000"))
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed", "multipart/x-zip"}
+
+
+class BulkUploadError(ValueError):
+    """Raised when a bulk upload cannot be accepted (no PDFs, too many files, bad archive)."""
+
+
+def unique_path(upload_dir: Path, filename: str) -> Path:
+    """Path for filename in upload_dir, adding _1, _2, ... if the name is taken."""
+    file_path = upload_dir / filename
+    counter = 1
+    while file_path.exists():
+        name_parts = filename.rsplit(".", 1)
+        if len(name_parts) == 2:
+            file_path = upload_dir / f"{name_parts[0]}_{counter}.{name_parts[1]}"
+        else:
+            file_path = upload_dir / f"{filename}_{counter}"
+        counter += 1
+    return file_path
+
+
+def is_zip_upload(filename: Optional[str], content_type: Optional[str]) -> bool:
+    return content_type in ZIP_CONTENT_TYPES or (filename or "").lower().endswith(".zip")
+
+
+def is_pdf_upload(filename: Optional[str], content_type: Optional[str]) -> bool:
+    return content_type == "application/pdf" or (filename or "").lower().endswith(".pdf")
+
+
+def save_uploads(uploads, upload_dir: Path, max_files: int = BULK_MAX_FILES) -> Tuple[List[Tuple[str, Path]], List[str]]:
+    """
+    Save uploaded PDFs and the PDFs inside uploaded zip archives.
+
+    Args:
+        uploads: Objects with filename, content_type and a binary file attribute
+            (FastAPI UploadFile)
+        upload_dir: Destination directory
+        max_files: Maximum number of PDFs accepted in one batch
+
+    Returns:
+        (saved, skipped): saved is a list of (filename, path); skipped lists
+        names of files that are not PDFs
+    """
+    saved: List[Tuple[str, Path]] = []
+    skipped: List[str] = []
+
+    def save(filename: str, source) -> None:
+        if len(saved) >= max_files:
+            raise BulkUploadError(f"Too many files: at most {max_files} PDFs per batch")
+        file_path = unique_path(upload_dir, filename)
+        with file_path.open("wb") as buffer:
+            shutil.copyfileobj(source, buffer)
+        saved.append((filename, file_path))
+
+    try:
+        for upload in uploads:
+            if is_zip_upload(upload.filename, upload.content_type):
+                try:
+                    archive = zipfile.ZipFile(upload.file)
+                except zipfile.BadZipFile:
+                    raise BulkUploadError(f"Invalid zip archive: {upload.filename}")
+                with archive:
+                    for member in archive.infolist():
+                        # Flatten directories; never write outside upload_dir
+                        name = os.path.basename(member.filename)
+                        if member.is_dir() or not name or name.startswith("."):
+                            continue
+                        if not name.lower().endswith(".pdf"):
+                            skipped.append(f"{upload.filename}/{member.filename}")
+                            continue
+                        with archive.open(member) as source:
+                            save(name, source)
+            elif is_pdf_upload(upload.filename, upload.content_type):
+                save(os.path.basename(upload.filename), upload.file)
+            else:
+                skipped.append(upload.filename)
+    except Exception:
+        # All or nothing: do not leave files without Document rows behind
+        for _, file_path in saved:
+            file_path.unlink(missing_ok=True)
+        raise
+
+    return saved, skipped
+
+
+def create_batch(
+    db,
+    saved: List[Tuple[str, Path]],
+    skipped: Optional[List[str]] = None,
+    tenant_id: Optional[str] = None,
+    case_id: Optional[int] = None
+) -> Tuple[UploadBatch, List[Document]]:
+    """
+    Insert an UploadBatch and one QUEUED Document per saved file in a single transaction.
+    """
+    batch = UploadBatch(document_count=len(saved), skipped_files=skipped or None)
+    db.add(batch)
+    db.flush()
+
+    documents = [
+        Document(
+            filename=filename,
+            status=DocumentStatus.QUEUED,
+            file_path=str(file_path),
+            batch_id=batch.id,
+            tenant_id=tenant_id,
+            case_id=case_id
+        )
+        for filename, file_path in saved
+    ]
+    db.add_all(documents)
+    db.commit()
+
+    logger.info(f"Created batch {batch.id} with {len(documents)} documents")
+    return batch, documents
+
+
+def batch_progress(db, batch_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Aggregate status of a batch, or None if it does not exist.
+
+    Counts and the duplicate page ratio of the documents processed so far
+    come from a single GROUP BY on documents.batch_id; no document rows are
+    loaded.
+    """
+    batch = db.query(UploadBatch).filter(UploadBatch.id == batch_id).first()
+    if not batch:
+        return None
+
+    rows = (
+        db.query(
+            Document.status,
+            func.count(Document.id),
+            func.sum(Document.dedup_indexed_pages),
+            func.sum(Document.dedup_duplicate_pages)
+        )
+        .filter(Document.batch_id == batch_id)
+        .group_by(Document.status)
+        .all()
+    )
+    counts = {status.value: 0 for status in DocumentStatus}
+    indexed_pages, duplicate_pages = 0, 0
+    for status, count, indexed, duplicates in rows:
+        counts[status.value] = count
+        indexed_pages += indexed or 0
+        duplicate_pages += duplicates or 0
+
+    total = sum(counts.values())
+    finished = counts[DocumentStatus.COMPLETED.value] + counts[DocumentStatus.FAILED.value]
+    return {
+        "batch_id": batch.id,
+        "created_at": batch.created_at.isoformat(),
+        "document_count": total,
+        "status_counts": counts,
+        "progress": round(finished / total, 4) if total else 1.0,
+        "done": finished == total,
+        "skipped_files": batch.skipped_files or [],
+        "dedup": {
+            "indexed_pages": indexed_pages,
+            "duplicate_pages": duplicate_pages,
+            "duplicate_ratio": round(duplicate_pages / indexed_pages, 4) if indexed_pages else 0.0
+        }
+    }
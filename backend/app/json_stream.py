@@ -0,0 +1,105 @@
+"""
+Incremental JSON Parsing
+
+Parses a JSON document that arrives in arbitrary text fragments (an LLM
+token stream) and emits each object of one top-level array as soon as that
+object's closing brace arrives, e.g. every event of
+
+    {"patient_name": "...", "events": [{...}, {...}, ...]}
+
+without waiting for the rest of the document.
+"""
+import json
+from typing import Dict, Any, List, Optional
+
+
+class IncrementalItemParser:
+    """
+    Emits completed objects of ``document[array_key]`` while text is fed in.
+
+    Usage:
+        parser = IncrementalItemParser("events")
+        for delta in stream:
+            for event in parser.feed(delta):
+                ...
+        document = parser.finish()
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._last_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._started = False
+        self._start = 0
+        self._end = 0
+        self.items_emitted = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Consume a fragment of the document.
+
+        Returns:
+            Objects of the target array completed by this fragment
+        """
+        self._text += text
+        completed = []
+        text_value = self._text
+
+        for i in range(self._pos, len(text_value)):
+            char = text_value[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._item_start is None:
+                        self._last_key = json.loads(text_value[self._string_start:i + 1])
+                continue
+
+            if not self._started:
+                # Skip anything before the document (prose, markdown fences)
+                if char != "{":
+                    continue
+                self._started = True
+                self._start = i
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                if char == "[" and self._depth == 1 and self._last_key == self.array_key:
+                    self._array_depth = self._depth + 1
+                elif char == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._item_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    completed.append(json.loads(text_value[self._item_start:i + 1]))
+                    self._item_start = None
+                elif char == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                    self._array_depth = None
+                if self._depth == 0:
+                    self._end = i
+            elif char == "," and self._depth == 1:
+                self._last_key = None
+
+        self._pos = len(text_value)
+        self.items_emitted += len(completed)
+        return completed
+
+    def finish(self) -> Dict[str, Any]:
+        """Parse and return the complete document once the stream has ended."""
+        if not self._started or self._depth != 0:
+            raise ValueError("Incomplete JSON document in stream")
+        return json.loads(self._text[self._start:self._end + 1])
@@ -0,0 +1,265 @@
+"""
+LLM Response Cache
+
+LLM calls are the most expensive and slowest step per document. Reprocessing,
+retries and duplicate documents would otherwise pay for the same call again.
+CachedLLMService wraps any LLM service (MockLLMService, ClaudeAPIService)
+and caches responses keyed on:
+
+    operation : classify_document / extract_chronology / extract_bill
+    model     : model name of the wrapped service
+    prompt    : prompt version of the wrapped service
+    text hash : SHA-256 of the whitespace-normalized OCR text
+
+Storage backends:
+- "redis": shared across workers; entries expire after LLM_CACHE_TTL and
+  Redis evicts by LRU when maxmemory-policy is allkeys-lru
+- "disk":  one file per entry under LLM_CACHE_DIR, TTL plus LRU eviction
+  down to LLM_CACHE_MAX_ENTRIES
+- "none":  caching disabled
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterator, Optional
+
+import redis
+
+from app.llm_service import LLMAPIError, parse_json_response
+from app.metrics import get_shared_stats, metrics
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "disk")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", "/code/uploads/llm_cache"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_REDIS_URL = os.getenv("LLM_CACHE_REDIS_URL", os.getenv("REDIS_URL", "redis://redis:6379/2"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def text_hash(text: str) -> str:
+    """Hash of OCR text, insensitive to whitespace differences between OCR runs."""
+    normalized = _WHITESPACE.sub(" ", text).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class DiskCacheStore:
+    """
+    File-per-entry cache with TTL expiry and LRU eviction.
+
+    Each file starts with its write time on the first line. Reads refresh
+    the file's mtime, so eviction removes the least recently used entries first.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        ttl: int = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES
+    ):
+        self.directory = Path(directory or LLM_CACHE_DIR)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._entries = sum(1 for _ in self.directory.glob("*.json"))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            written_at, value = path.read_text(encoding="utf-8").split("\n", 1)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if time.time() - float(written_at) > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+
+        os.utime(path)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        path = self._path(key)
+        # A temp file of our own: workers filling the same key must not write into one file
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False
+        ) as tmp_file:
+            tmp_file.write(f"{time.time()}\n{value}")
+        existed = path.exists()
+        Path(tmp_file.name).replace(path)
+
+        if not existed:
+            self._entries += 1
+            if self._entries > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries down to 90% of max_entries."""
+        entries = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        target = int(self.max_entries * 0.9)
+        for path in entries[:max(0, len(entries) - target)]:
+            path.unlink(missing_ok=True)
+            metrics.incr("llm_cache.evictions")
+        self._entries = min(len(entries), target)
+
+
+class RedisCacheStore:
+    """Redis-backed cache shared by all workers; entries expire after ttl."""
+
+    def __init__(self, url: str = LLM_CACHE_REDIS_URL, ttl: int = LLM_CACHE_TTL):
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str) -> None:
+        self.client.set(key, value, ex=self.ttl)
+
+
+class CachedLLMService:
+    """
+    Caching wrapper exposing the same interface as MockLLMService.
+
+    Streaming calls share cache entries with the corresponding extract_* call.
+    """
+
+    def __init__(self, llm_service, store):
+        self.llm_service = llm_service
+        self.store = store
+        self.model = getattr(llm_service, "model", "unknown")
+        self.prompt_version = getattr(llm_service, "prompt_version", "unversioned")
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    def cache_key(self, operation: str, ocr_text: str) -> str:
+        return f"llmcache:{operation}:{self.model}:{self.prompt_version}:{text_hash(ocr_text)}"
+
+    def classify_document(self, ocr_text: str) -> str:
+        return self._cached("classify_document", ocr_text, self.llm_service.classify_document)
+
+    def extract_chronology(self, ocr_text: str) -> Dict[str, Any]:
+        return self._cached("extract_chronology", ocr_text, self.llm_service.extract_chronology)
+
+    def extract_bill(self, ocr_text: str) -> Dict[str, Any]:
+        return self._cached("extract_bill", ocr_text, self.llm_service.extract_bill)
+
+    def stream_chronology(self, ocr_text: str) -> Iterator[str]:
+        return self._cached_stream("extract_chronology", ocr_text, self.llm_service.stream_chronology)
+
+    def stream_bill(self, ocr_text: str) -> Iterator[str]:
+        return self._cached_stream("extract_bill", ocr_text, self.llm_service.stream_bill)
+
+    def __getattr__(self, name: str):
+        # Anything not cached goes straight to the service
+        return getattr(self.llm_service, name)
+
+    def _cached(self, operation: str, ocr_text: str, compute: Callable[[str], Any]) -> Any:
+        key = self.cache_key(operation, ocr_text)
+        cached = self._read(operation, key)
+        if cached is not None:
+            return json.loads(cached)
+
+        result = compute(ocr_text)
+        self._write(key, json.dumps(result))
+        return result
+
+    def _cached_stream(self, operation: str, ocr_text: str, stream: Callable[[str], Iterator[str]]) -> Iterator[str]:
+        """
+        Streaming variant sharing cache entries with the blocking call.
+
+        A hit replays the cached JSON as a single fragment; a miss passes the
+        fragments through and stores the assembled document once the stream ends.
+        """
+        key = self.cache_key(operation, ocr_text)
+        cached = self._read(operation, key)
+        if cached is not None:
+            yield cached
+            return
+
+        fragments = []
+        for fragment in stream(ocr_text):
+            fragments.append(fragment)
+            yield fragment
+
+        try:
+            result = parse_json_response("".join(fragments))
+        except (LLMAPIError, ValueError) as e:
+            logger.warning(f"Not caching unparseable {operation} stream: {e}")
+            return
+        self._write(key, json.dumps(result))
+
+    def _read(self, operation: str, key: str) -> Optional[str]:
+        try:
+            cached = self.store.get(key)
+        except Exception as e:
+            # A broken cache must never fail the pipeline
+            logger.warning(f"LLM cache read failed: {e}")
+            self.stats["errors"] += 1
+            cached = None
+
+        outcome = "hits" if cached is not None else "misses"
+        self.stats[outcome] += 1
+        metrics.incr(f"llm_cache.{operation}.{outcome}")
+        # Shared across workers: read by GET /api/v1/cache/stats
+        get_shared_stats().incr("llm_cache", f"{operation}.{outcome}")
+        if cached is not None:
+            logger.info(f"LLM cache hit for {operation}")
+        return cached
+
+    def _write(self, key: str, value: str) -> None:
+        try:
+            self.store.set(key, value)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+            self.stats["errors"] += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return round(self.stats["hits"] / lookups, 2) if lookups else 0.0
+
+
+def llm_cache_stats() -> Optional[Dict[str, Any]]:
+    """LLM cache hits and misses of all workers, per operation and in total, with hit rate."""
+    counts = get_shared_stats().read("llm_cache")
+    if counts is None:
+        return None
+    operations: Dict[str, Dict[str, int]] = {}
+    for field, value in counts.items():
+        operation, _, outcome = field.rpartition(".")
+        operations.setdefault(operation, {"hits": 0, "misses": 0})[outcome] = value
+    hits = sum(operation["hits"] for operation in operations.values())
+    misses = sum(operation["misses"] for operation in operations.values())
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "operations": operations
+    }
+
+
+def with_llm_cache(llm_service, backend: str = LLM_CACHE_BACKEND):
+    """
+    Wrap an LLM service with the configured cache backend.
+
+    Args:
+        llm_service: Service to wrap
+        backend: "redis", "disk" or "none"
+    """
+    if backend == "none":
+        return llm_service
+    if backend == "redis":
+        return CachedLLMService(llm_service, RedisCacheStore())
+    if backend == "disk":
+        return CachedLLMService(llm_service, DiskCacheStore())
+    raise ValueError(f"Unknown LLM cache backend: {backend}")
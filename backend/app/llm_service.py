@@ -1,15 +1,30 @@
 """
 LLM Service for document classification and extraction.
 
-Currently uses MockLLMService for testing without API keys.
-Can be replaced with real Claude API integration later.
+Uses MockLLMService for testing without API keys, or ClaudeAPIService for
+the real Claude Messages API (selected with LLM_BACKEND).
 """
 import json
 import logging
-from typing import Dict, Any
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+import redis
+import requests
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
+# Model used for extraction and the version of the prompts sent to it.
+# Bump PROMPT_VERSION whenever a prompt changes so cached responses are not reused.
+LLM_MODEL = os.getenv("LLM_MODEL", "claude-3-5-sonnet-20241022")
+PROMPT_VERSION = "v1"
+
 
 class MockLLMService:
     """
@@ -17,6 +32,9 @@ class MockLLMService:
     Used for testing the pipeline without requiring actual LLM API calls.
     """
     
+    model = "mock"
+    prompt_version = PROMPT_VERSION
+    
     def classify_document(self, ocr_text: str) -> str:
         """
         Classify document type based on OCR text.
@@ -145,23 +163,312 @@ class MockLLMService:
         
         logger.info(f"MockLLMService: Extracted {len(mock_bill['line_items'])} line items")
         return mock_bill
+    
+    def stream_chronology(self, ocr_text: str) -> Iterator[str]:
+        """Stream the mock chronology as JSON text fragments, like ClaudeAPIService."""
+        return self._stream_json(self.extract_chronology(ocr_text))
+    
+    def stream_bill(self, ocr_text: str) -> Iterator[str]:
+        """Stream the mock bill as JSON text fragments, like ClaudeAPIService."""
+        return self._stream_json(self.extract_bill(ocr_text))
+    
+    def _stream_json(self, document: Dict[str, Any], chunk_size: int = 64) -> Iterator[str]:
+        text = json.dumps(document)
+        for i in range(0, len(text), chunk_size):
+            yield text[i:i + chunk_size]
+
+
+# --- Real Claude API implementation ---
+
+CLASSIFY_PROMPT = """You classify medical documents.
+Reply with exactly one word: CHRONOLOGY for medical records (visits, notes,
+diagnoses, procedures) or BILL for billing documents (invoices, itemized
+charges, CPT codes, amounts due)."""
+
+CHRONOLOGY_PROMPT = """You extract a medical chronology from OCR text of a medical record.
+Reply with JSON only, no prose, in this shape:
+{"patient_name": str, "events": [{"date": "YYYY-MM-DD", "provider": str,
+"encounter_type": str, "summary": str, "diagnosis_codes": [ICD-10 codes]}]}
+List events in date order. Only use facts present in the text."""
+
+BILL_PROMPT = """You extract itemized charges from OCR text of a medical bill.
+Reply with JSON only, no prose, in this shape:
+{"invoice_number": str, "total_amount": number, "line_items": [{"date_of_service":
+"YYYY-MM-DD", "cpt_code": str or null, "description": str, "charged_amount": number,
+"allowed_amount": number or null}]}
+Only use facts present in the text."""
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "mock")
+LLM_API_BASE_URL = os.getenv("LLM_API_BASE_URL", "https://api.anthropic.com")
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "4096"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+# In-flight request caps: per worker process, and across all workers (0 = no global cap)
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+LLM_GLOBAL_MAX_IN_FLIGHT = int(os.getenv("LLM_GLOBAL_MAX_IN_FLIGHT", "0"))
+LLM_SEMAPHORE_REDIS_URL = os.getenv("LLM_SEMAPHORE_REDIS_URL", os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+
+class LLMAPIError(Exception):
+    """Raised when the LLM API fails with a non-retryable error or retries run out."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RedisSemaphore:
+    """
+    Cross-process counting semaphore backed by a Redis sorted set.
+    
+    Holders are scored by the time they last renewed their slot; entries
+    older than ``lease`` seconds are expired, so a crashed worker cannot leak
+    a slot forever. A live holder renews every ``lease / 3`` seconds, so a
+    call that outlasts the lease (slow streaming, retries) keeps its slot.
+    """
+
+    def __init__(self, client, name: str, limit: int, lease: float = 60.0, poll_interval: float = 0.05):
+        self.client = client
+        self.name = name
+        self.limit = limit
+        self.lease = lease
+        self.poll_interval = poll_interval
+
+    @contextmanager
+    def acquire(self):
+        token = str(uuid.uuid4())
+        while True:
+            now = time.time()
+            pipe = self.client.pipeline()
+            pipe.zremrangebyscore(self.name, "-inf", now - self.lease)
+            pipe.zadd(self.name, {token: now})
+            pipe.zrank(self.name, token)
+            _, _, rank = pipe.execute()
+            if rank is not None and rank < self.limit:
+                break
+            self.client.zrem(self.name, token)
+            time.sleep(self.poll_interval)
+        
+        released = threading.Event()
+        renewer = threading.Thread(target=self._renew, args=(token, released), daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            released.set()
+            renewer.join()
+            self.client.zrem(self.name, token)
+
+    def _renew(self, token: str, released: threading.Event):
+        """Refresh the holder's score until the slot is released."""
+        while not released.wait(self.lease / 3):
+            try:
+                # xx: never re-add a slot that has already expired
+                if not self.client.zadd(self.name, {token: time.time()}, xx=True, ch=True):
+                    logger.warning(f"RedisSemaphore: lease of {self.name} expired while held")
+                    return
+            except redis.RedisError as e:
+                logger.warning(f"RedisSemaphore: could not renew lease of {self.name}: {e}")
 
 
-# Future: Real Claude API implementation
 class ClaudeAPIService:
     """
-    Real Claude API integration (to be implemented).
+    Claude Messages API client with the same interface as MockLLMService.
+    
+    - One pooled requests.Session per instance (keep-alive connection reuse)
+    - In-flight requests capped per worker process and, optionally, globally
+      across workers through a Redis semaphore
+    - 429 / 5xx / connection errors retried with full-jitter exponential
+      backoff, honoring Retry-After
+    - stream_chronology / stream_bill yield text deltas as they arrive (SSE)
+    """
     
-    Usage:
-        from anthropic import Anthropic
+    prompt_version = PROMPT_VERSION
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = LLM_API_BASE_URL,
+        model: str = LLM_MODEL,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        global_max_in_flight: int = LLM_GLOBAL_MAX_IN_FLIGHT,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base_delay: float = LLM_RETRY_BASE_DELAY,
+        retry_max_delay: float = LLM_RETRY_MAX_DELAY,
+        timeout: float = LLM_TIMEOUT
+    ):
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY", "")
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.timeout = timeout
         
-        client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, max_in_flight))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json"
+        })
         
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=4096,
-            system=CHRONOLOGY_PROMPT,
-            messages=[{"role": "user", "content": ocr_text}]
-        )
-    """
-    pass
+        self._local_slots = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._global_slots = None
+        if global_max_in_flight > 0:
+            self._global_slots = RedisSemaphore(
+                redis.Redis.from_url(LLM_SEMAPHORE_REDIS_URL),
+                f"llm:inflight:{self.model}",
+                global_max_in_flight
+            )
+        
+        self.stats = {"requests": 0, "retries": 0, "errors": 0}
+    
+    # --- Public interface (same as MockLLMService) ---
+
+    def classify_document(self, ocr_text: str) -> str:
+        answer = self._complete(CLASSIFY_PROMPT, ocr_text, max_tokens=5).strip().upper()
+        return "BILL" if answer.startswith("BILL") else "CHRONOLOGY"
+
+    def extract_chronology(self, ocr_text: str) -> Dict[str, Any]:
+        return parse_json_response(self._complete(CHRONOLOGY_PROMPT, ocr_text))
+
+    def extract_bill(self, ocr_text: str) -> Dict[str, Any]:
+        return parse_json_response(self._complete(BILL_PROMPT, ocr_text))
+
+    def stream_chronology(self, ocr_text: str) -> Iterator[str]:
+        """Yield the chronology JSON as text deltas while the model generates it."""
+        return self._stream(CHRONOLOGY_PROMPT, ocr_text)
+
+    def stream_bill(self, ocr_text: str) -> Iterator[str]:
+        """Yield the bill JSON as text deltas while the model generates it."""
+        return self._stream(BILL_PROMPT, ocr_text)
+    
+    # --- Transport ---
+
+    def _payload(self, system: str, ocr_text: str, max_tokens: int, stream: bool) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "system": system,
+            "messages": [{"role": "user", "content": ocr_text}],
+            "stream": stream
+        }
+
+    @contextmanager
+    def _slot(self):
+        """Hold one per-worker (and global, if configured) in-flight slot."""
+        with self._local_slots:
+            if self._global_slots is None:
+                yield
+            else:
+                with self._global_slots.acquire():
+                    yield
+
+    def _complete(self, system: str, ocr_text: str, max_tokens: int = LLM_MAX_TOKENS) -> str:
+        payload = self._payload(system, ocr_text, max_tokens, stream=False)
+        with self._post_with_retries(payload, stream=False) as response:
+            body = response.json()
+        return "".join(block.get("text", "") for block in body.get("content", []))
+
+    def _stream(self, system: str, ocr_text: str, max_tokens: int = LLM_MAX_TOKENS) -> Iterator[str]:
+        payload = self._payload(system, ocr_text, max_tokens, stream=True)
+        with self._post_with_retries(payload, stream=True) as response:
+            with response:
+                for event in iter_sse_events(response.iter_lines(decode_unicode=True)):
+                    if event.get("type") == "content_block_delta":
+                        text = event.get("delta", {}).get("text")
+                        if text:
+                            yield text
+                    elif event.get("type") == "error":
+                        raise LLMAPIError(f"Stream error: {event.get('error')}")
+
+    @contextmanager
+    def _post_with_retries(self, payload: Dict[str, Any], stream: bool) -> Iterator[requests.Response]:
+        """
+        POST with retries, yielding the successful response.
+
+        Each attempt holds an in-flight slot, kept while the caller reads the
+        response; the slot is released during the backoff sleep, so callers
+        waiting out a rate limit do not starve those that could proceed.
+        """
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            with self._slot():
+                self.stats["requests"] += 1
+                try:
+                    response = self.session.post(
+                        f"{self.base_url}/v1/messages",
+                        json=payload,
+                        stream=stream,
+                        timeout=self.timeout
+                    )
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = LLMAPIError(f"LLM request failed: {e}")
+                else:
+                    if response.status_code < 400:
+                        yield response
+                        return
+                    
+                    error = LLMAPIError(
+                        f"LLM API returned {response.status_code}: {response.text[:200]}",
+                        status_code=response.status_code
+                    )
+                    retry_after = response.headers.get("retry-after")
+                    response.close()
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        self.stats["errors"] += 1
+                        raise error
+            
+            if attempt == self.max_retries:
+                break
+            
+            self.stats["retries"] += 1
+            delay = self._retry_delay(attempt, retry_after)
+            logger.warning(f"ClaudeAPIService: {error}; retrying in {delay:.2f}s")
+            time.sleep(delay)
+        
+        self.stats["errors"] += 1
+        raise error
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+
+def iter_sse_events(lines: Iterator[str]) -> Iterator[Dict[str, Any]]:
+    """Decode the JSON payloads of a server-sent events stream."""
+    for line in lines:
+        if line and line.startswith("data:"):
+            data = line[5:].strip()
+            if data and data != "[DONE]":
+                yield json.loads(data)
+
+
+def parse_json_response(text: str) -> Dict[str, Any]:
+    """Parse a JSON reply, tolerating surrounding prose or markdown fences."""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end == -1:
+        raise LLMAPIError(f"LLM reply is not JSON: {text[:200]}")
+    return json.loads(text[start:end + 1])
+
+
+def get_llm_service():
+    """Instantiate the LLM service selected by LLM_BACKEND ("mock" or "claude")."""
+    if LLM_BACKEND == "mock":
+        return MockLLMService()
+    if LLM_BACKEND == "claude":
+        return ClaudeAPIService()
+    raise ValueError(f"Unknown LLM backend: {LLM_BACKEND}")
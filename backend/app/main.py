@@ -1,19 +1,55 @@
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, Header, Query, Response, Body
+from typing import Any, Dict, List, Optional
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+from datetime import date
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import os
 import shutil
+import time
 from pathlib import Path
 
-from app.schemas import MedicalChronology, MedicalBill
-from app.database import get_db, engine, Base
-from app.models import Document, DocumentStatus
-from app.tasks import process_document
+from app.schemas import MedicalChronology, MedicalBill, CaseCreate
+from app.database import get_db, dispose_async_engine, engine, Base
+from app.models import Case, Document, DocumentStatus, SourceRef
+from app.page_store import OCRPageStore
+from app.admission import QueueFullError, get_admission
+from app.stage_state import get_stage_state, merge_stage_state
+from app.read_routing import (
+    get_recent_writes, get_document_read_db, get_listing_read_db, get_document_for_read, get_document_version
+)
+from app.response_cache import get_response_cache
+from app.llm_cache import llm_cache_stats
+from app.serialization import document_row_response, encode_json
+from app.materialization import (
+    TOTALS_GROUPS, events_query, line_items_query, line_item_totals_query, source_refs_query, group_source_refs,
+    event_response, line_item_response, totals_response
+)
+from app.timeline import InvalidCursorError, timeline_query, timeline_page, entry_response
+from app.bill_aggregates import SUMMARY_GROUPS, summary_query, summary_response
+from app.edits import ExtractionEditError, edit_extraction
+from app.export import EXPORT_COLUMNS, EXPORT_MEDIA_TYPES, stream_export
+from app.search import (
+    SEARCH_KINDS, is_code, hit_terms, page_text_query, code_query, provider_query, owner_refs_query,
+    load_hit_pages, page_hit, owner_hits
+)
+from app.ingestion import BulkUploadError, unique_path, save_uploads, create_batch, batch_progress
+from app.scheduling import LANE_BULK, LANE_INTERACTIVE, choose_lane, estimate_pages, lane_latency_stats
+from app.tasks import enqueue_document, dispatch_documents
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Medical Verification MVP")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await dispose_async_engine()
+
+app = FastAPI(title="Medical Verification MVP", lifespan=lifespan)
 
 # Configure CORS
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
@@ -33,27 +69,51 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 def read_root():
     return {"status": "healthy", "service": "medical-verification-mvp"}
 
+def admit_upload(lane: Optional[str] = None, incoming: int = 1):
+    """
+    Reject uploads of incoming documents with 429 while the processing queue
+    (only the given lane's queue, or the whole backlog) cannot take them.
+    """
+    try:
+        get_admission().check(lane, incoming)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+def require_case(db: Session, case_id: Optional[int]):
+    """404 unless case_id is None or an existing case."""
+    if case_id is not None and db.get(Case, case_id) is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+
 @app.get("/health")
 def health_check(db: Session = Depends(get_db)):
-    """Health check endpoint that verifies database connectivity"""
+    """Health check endpoint that verifies database connectivity and reports the queue backlog"""
+    queue = get_admission().status()
     try:
         # Test database connection
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
         return {
             "status": "ok",
             "database": "connected",
-            "service": "medical-verification-mvp"
+            "service": "medical-verification-mvp",
+            "queue": queue
         }
     except Exception as e:
         return {
             "status": "degraded",
             "database": "disconnected",
-            "error": str(e)
+            "error": str(e),
+            "queue": queue
         }
 
 @app.post("/api/v1/documents/upload")
-async def upload_document(
+def upload_document(
     file: UploadFile = File(...),
+    case_id: Optional[int] = Form(None),
+    x_tenant_id: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
@@ -62,7 +122,11 @@ async def upload_document(
     - Validates file type (must be PDF)
     - Saves file to uploads/ directory
     - Creates database record with QUEUED status
-    - Triggers Celery task for processing
+    - Triggers Celery task for processing, in the interactive lane unless
+      the document is longer than INTERACTIVE_MAX_PAGES
+    - X-Tenant-ID header: tenant the document is scheduled fairly under
+    - case_id form field: case whose timeline the document's chronology joins
+    - Returns 429 with Retry-After while the processing queue is full
     """
     # Validate file type
     if file.content_type != "application/pdf":
@@ -71,19 +135,13 @@ async def upload_document(
             detail=f"Invalid file type: {file.content_type}. Only PDF files are accepted."
         )
     
-    # Generate safe filename
+    # Check the interactive backlog before anything is written (bulk work does not delay single uploads)
+    admit_upload(LANE_INTERACTIVE)
+    require_case(db, case_id)
+    
+    # Generate safe filename (duplicate names get a numeric suffix)
     filename = file.filename
-    file_path = UPLOAD_DIR / filename
-    
-    # Handle duplicate filenames
-    counter = 1
-    while file_path.exists():
-        name_parts = filename.rsplit(".", 1)
-        if len(name_parts) == 2:
-            file_path = UPLOAD_DIR / f"{name_parts[0]}_{counter}.{name_parts[1]}"
-        else:
-            file_path = UPLOAD_DIR / f"{filename}_{counter}"
-        counter += 1
+    file_path = unique_path(UPLOAD_DIR, filename)
     
     # Save file to disk
     try:
@@ -99,25 +157,112 @@ async def upload_document(
     document = Document(
         filename=filename,
         status=DocumentStatus.QUEUED,
-        file_path=str(file_path)
+        file_path=str(file_path),
+        tenant_id=x_tenant_id,
+        case_id=case_id
     )
     db.add(document)
     db.commit()
     db.refresh(document)
+    get_recent_writes().mark([document.id], listing=True)
     
-    # Trigger Celery task
-    process_document.delay(document.id)
+    # Trigger Celery task in the lane matching the document size
+    page_count = estimate_pages(str(file_path))
+    lane = choose_lane(page_count)
+    enqueue_document(document.id, lane, tenant_id=x_tenant_id, pages=page_count)
     
     return {
         "message": "Document uploaded successfully",
         "document_id": document.id,
         "filename": document.filename,
         "status": document.status.value,
+        "lane": lane,
+        "case_id": document.case_id,
         "created_at": document.created_at.isoformat()
     }
 
+@app.post("/api/v1/documents/bulk")
+def upload_documents_bulk(
+    files: List[UploadFile] = File(...),
+    case_id: Optional[int] = Form(None),
+    x_tenant_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload many PDFs (or zip archives of PDFs) as one batch.
+    
+    - Saves every PDF to uploads/ (zip archives are unpacked, non-PDFs skipped)
+    - Creates all Document records in a single transaction
+    - Hands all documents to the bulk lane's per-tenant fair scheduler
+      (X-Tenant-ID header, default tenant if absent)
+    - case_id form field: case whose timeline the documents join
+    - Returns a batch ID for GET /api/v1/batches/{batch_id}
+    - Returns 429 with Retry-After while the processing queue is full
+    """
+    # Every file of the batch counts against the backlog
+    admit_upload(incoming=len(files))
+    require_case(db, case_id)
+    
+    try:
+        saved, skipped = save_uploads(files, UPLOAD_DIR)
+    except BulkUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to save files: {str(e)}"
+        )
+    
+    if len(saved) > len(files):
+        # Zip archives held more PDFs than were counted up front
+        try:
+            admit_upload(incoming=len(saved))
+        except HTTPException:
+            for _, file_path in saved:
+                file_path.unlink(missing_ok=True)
+            raise
+    
+    if not saved:
+        raise HTTPException(status_code=400, detail="No PDF files in upload")
+    
+    batch, documents = create_batch(db, saved, skipped, tenant_id=x_tenant_id, case_id=case_id)
+    get_recent_writes().mark([document.id for document in documents], listing=True)
+    dispatch_documents(
+        [
+            # File size estimate: opening every PDF would slow the request down
+            {"document_id": document.id, "pages": estimate_pages(document.file_path, exact=False)}
+            for document in documents
+        ],
+        tenant_id=x_tenant_id
+    )
+    
+    return {
+        "message": "Batch uploaded successfully",
+        "batch_id": batch.id,
+        "document_count": len(documents),
+        "document_ids": [document.id for document in documents],
+        "lane": LANE_BULK,
+        "skipped_files": skipped,
+        "created_at": batch.created_at.isoformat()
+    }
+
+@app.get("/api/v1/batches/{batch_id}")
+def get_batch(batch_id: int, db: Session = Depends(get_db)):
+    """
+    Get aggregate progress of a bulk upload.
+    
+    Returns document counts per status and the fraction finished, computed
+    with one GROUP BY query (no per-document rows are loaded).
+    """
+    progress = batch_progress(db, batch_id)
+    
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return progress
+
 @app.get("/api/v1/documents/{document_id}")
-def get_document(document_id: int, db: Session = Depends(get_db)):
+async def get_document(document_id: int, db: AsyncSession = Depends(get_document_read_db)):
     """
     Get document status and details.
     
@@ -125,33 +270,144 @@ def get_document(document_id: int, db: Session = Depends(get_db)):
         - Basic document metadata
         - Processing status
         - Document type (CHRONOLOGY or BILL) when classified
-        - Extraction result (structured JSON) when completed
+        - Extraction result (structured JSON) when completed; while extraction
+          is streaming, the items linked so far with "_partial": true
         - OCR result (raw) for debugging
+        - Pipeline stage while processing (from the stage state, not the DB)
+    
+    Served from the read replica unless the document was written within
+    READ_YOUR_WRITES_SECONDS. COMPLETED documents are answered with the
+    body encoded by the worker (documents.response_body), from the response
+    cache while the row's updated_at is unchanged, without decoding or
+    re-encoding the JSON.
     """
-    document = db.query(Document).filter(Document.id == document_id).first()
+    version = await get_document_version(db, document_id)
+    
+    if not version:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    response_cache = get_response_cache()
+    cacheable = version.status == DocumentStatus.COMPLETED
+    if cacheable:
+        body = await response_cache.get(document_id, version.updated_at.isoformat())
+        if body is None:
+            body = (await db.execute(
+                select(Document.response_body).where(Document.id == document_id)
+            )).scalar()
+            if body is not None:
+                await response_cache.set(document_id, version.updated_at.isoformat(), body)
+        if body is not None:
+            return Response(content=body, media_type="application/json")
+    
+    # In-flight documents (and ones completed before response_body existed)
+    document = await get_document_for_read(db, document_id)
     
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    response = {
-        "document_id": document.id,
-        "filename": document.filename,
-        "status": document.status.value,
-        "created_at": document.created_at.isoformat(),
-        "updated_at": document.updated_at.isoformat(),
-        "document_type": document.document_type.value if document.document_type else None,
-        "extraction_result": document.extraction_result,
-        "ocr_result": document.ocr_result
+    response = document_row_response(document)
+    
+    # Intermediate results are only in the stage state until the final write
+    if document.status in (DocumentStatus.PROCESSING, DocumentStatus.FAILED):
+        state = await run_in_threadpool(get_stage_state().get, document.id)
+        merge_stage_state(response, state)
+    
+    body = encode_json(response)
+    if document.status == DocumentStatus.COMPLETED:
+        await response_cache.set(document.id, document.updated_at.isoformat(), body)
+    
+    return Response(content=body, media_type="application/json")
+
+@app.patch("/api/v1/documents/{document_id}/extraction")
+def edit_document_extraction(
+    document_id: int,
+    changes: Dict[str, Any] = Body(...),
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Correct fields of a completed document's extraction result.
+    
+    The body holds the top-level fields to replace: patient_name / events
+    for chronologies, invoice_number / total_amount / provider / line_items
+    for bills (lists are replaced whole). Events, line items, the case
+    timeline and bill aggregates are updated in the same transaction.
+    
+    If-Match: the updated_at of the version the edit was made on; 409 if
+    the document changed since.
+    
+    Returns the updated document (as GET /api/v1/documents/{id}).
+    """
+    try:
+        body = edit_extraction(db, document_id, changes, if_match.strip('"') if if_match else None)
+    except ExtractionEditError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    if body is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    return Response(content=body, media_type="application/json")
+
+@app.get("/api/v1/cache/stats")
+async def get_cache_stats():
+    """
+    Response cache hit rate, size and eviction / invalidation counts
+    across all API processes, and LLM cache hits / misses across all workers.
+    """
+    return {
+        "response_cache": await get_response_cache().stats(),
+        "llm_cache": await run_in_threadpool(llm_cache_stats)
     }
+
+@app.get("/api/v1/lanes/stats")
+async def get_lane_stats():
+    """
+    Queue wait and time-to-result of the interactive and bulk lanes, across
+    all workers (count, average, bucketed median / 95th percentile).
+    """
+    return await run_in_threadpool(lane_latency_stats)
+
+@app.get("/api/v1/documents/{document_id}/pages/{page_number}")
+async def get_document_page(document_id: int, page_number: int, db: AsyncSession = Depends(get_document_read_db)):
+    """
+    Get the OCR output (words and bounding boxes) for a single page.
+    
+    Pages are read from the on-disk page store written by the worker,
+    so the viewer never has to download the OCR result of the whole document.
+    """
+    document = await get_document_for_read(db, document_id)
+    
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    page_store = OCRPageStore.for_document(document.id)
+    page = await run_in_threadpool(
+        lambda: page_store.get_page(page_number) if page_store.exists() else None
+    )
     
-    return response
+    if page is None:
+        raise HTTPException(status_code=404, detail="Page not found")
+    
+    return page
 
 @app.get("/api/v1/documents")
-def list_documents(db: Session = Depends(get_db)):
+async def list_documents(db: AsyncSession = Depends(get_listing_read_db)):
     """
     List all documents.
+    
+    Only the listed columns are selected; OCR and extraction payloads are
+    never loaded.
     """
-    documents = db.query(Document).order_by(Document.created_at.desc()).all()
+    result = await db.execute(
+        select(
+            Document.id,
+            Document.filename,
+            Document.status,
+            Document.document_type,
+            Document.created_at
+        ).order_by(Document.created_at.desc())
+    )
+    documents = result.all()
     
     return {
         "count": len(documents),
@@ -167,6 +423,296 @@ def list_documents(db: Session = Depends(get_db)):
         ]
     }
 
+@app.get("/api/v1/events")
+async def list_events(
+    icd: Optional[str] = None,
+    provider: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    document_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_listing_read_db)
+):
+    """
+    Chronology events across all completed documents, in date order.
+    
+    Filters (all optional, combined): ICD-10 code, exact provider, date range
+    (inclusive), document. Served from the materialized events tables, so no
+    extraction_result is loaded.
+    """
+    events = (await db.execute(
+        events_query(icd, provider, date_from, date_to, document_id, limit, offset)
+    )).scalars().all()
+    refs = {}
+    if events:
+        refs = group_source_refs(
+            (await db.execute(source_refs_query(SourceRef.event_id, [event.id for event in events]))).scalars(),
+            "event_id"
+        )
+    
+    return {
+        "count": len(events),
+        "limit": limit,
+        "offset": offset,
+        "events": [event_response(event, refs.get(event.id)) for event in events]
+    }
+
+@app.get("/api/v1/line-items")
+async def list_line_items(
+    cpt: Optional[str] = None,
+    provider: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    document_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_listing_read_db)
+):
+    """
+    Bill line items across all completed documents, in date of service order.
+    
+    Filters (all optional, combined): CPT code, exact provider, date of
+    service range (inclusive), document.
+    """
+    items = (await db.execute(
+        line_items_query(cpt, provider, date_from, date_to, document_id, limit, offset)
+    )).scalars().all()
+    refs = {}
+    if items:
+        refs = group_source_refs(
+            (await db.execute(source_refs_query(SourceRef.line_item_id, [item.id for item in items]))).scalars(),
+            "line_item_id"
+        )
+    
+    return {
+        "count": len(items),
+        "limit": limit,
+        "offset": offset,
+        "line_items": [line_item_response(item, refs.get(item.id)) for item in items]
+    }
+
+@app.get("/api/v1/line-items/totals")
+async def get_line_item_totals(
+    group_by: str = "provider",
+    cpt: Optional[str] = None,
+    provider: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    document_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_listing_read_db)
+):
+    """
+    Line item count and charged / allowed totals per provider, CPT code or
+    document (group_by), over the line items matching the filters.
+    
+    One GROUP BY over line_items.
+    """
+    if group_by not in TOTALS_GROUPS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be one of: {', '.join(TOTALS_GROUPS)}"
+        )
+    
+    rows = (await db.execute(
+        line_item_totals_query(group_by, cpt, provider, date_from, date_to, document_id)
+    )).all()
+    
+    return {
+        "group_by": group_by,
+        "totals": [totals_response(row) for row in rows]
+    }
+
+@app.get("/api/v1/export/{kind}")
+async def export_extractions(
+    kind: str,
+    format: str = "csv",
+    case_id: Optional[int] = None,
+    document_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_listing_read_db)
+):
+    """
+    Export all line_items or events matching the filters as CSV, NDJSON or
+    Parquet.
+    
+    Rows are read with a server-side cursor and sent batch by batch with
+    chunked transfer encoding, so exports of millions of rows run in
+    constant memory.
+    """
+    if kind not in EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {kind}")
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+    if case_id is not None and await db.get(Case, case_id) is None:
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    filename = f"{kind}{f'-case-{case_id}' if case_id is not None else ''}.{format}"
+    return StreamingResponse(
+        stream_export(
+            db, kind, format,
+            case_id=case_id, document_id=document_id, date_from=date_from, date_to=date_to
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.post("/api/v1/cases")
+def create_case(case: CaseCreate, x_tenant_id: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """
+    Create a case. Documents uploaded with its case_id feed its timeline.
+    """
+    row = Case(name=case.name, patient_name=case.patient_name, tenant_id=x_tenant_id)
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    # Listing reads (timelines included) go to the primary until the replica has the case
+    get_recent_writes().mark([], listing=True)
+    
+    return {
+        "case_id": row.id,
+        "name": row.name,
+        "patient_name": row.patient_name,
+        "created_at": row.created_at.isoformat()
+    }
+
+@app.get("/api/v1/cases/{case_id}/timeline")
+async def get_case_timeline(
+    case_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_listing_read_db)
+):
+    """
+    A case's treatment timeline across all its documents, in date order.
+    
+    Each entry is one encounter, merged from every document reporting it
+    (sources lists the documents and events). Pages are fetched with the
+    next_cursor of the previous page; date_from / date_to (inclusive)
+    restrict the timeline to dated entries in the range.
+    """
+    case = await db.get(Case, case_id)
+    
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    try:
+        query = timeline_query(case_id, date_from, date_to, cursor, limit)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    entries, next_cursor = timeline_page((await db.execute(query)).scalars().all(), limit)
+    
+    return {
+        "case_id": case.id,
+        "name": case.name,
+        "patient_name": case.patient_name,
+        "count": len(entries),
+        "entries": [entry_response(entry) for entry in entries],
+        "next_cursor": next_cursor
+    }
+
+@app.get("/api/v1/cases/{case_id}/bills/summary")
+async def get_case_bill_summary(
+    case_id: int,
+    group_by: Optional[str] = None,
+    provider: Optional[str] = None,
+    cpt: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_listing_read_db)
+):
+    """
+    Charged / allowed totals of a case's bills, overall and per provider,
+    CPT code or date of service (group_by), over the line items matching
+    the filters.
+    
+    Read from the case's precomputed bill aggregates: the cost does not
+    grow with the number of bills in the case.
+    """
+    if group_by is not None and group_by not in SUMMARY_GROUPS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be one of: {', '.join(SUMMARY_GROUPS)}"
+        )
+    
+    case = await db.get(Case, case_id)
+    
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    totals = (await db.execute(summary_query(case_id, None, provider, cpt, date_from, date_to))).one()
+    groups = []
+    if group_by:
+        groups = (await db.execute(summary_query(case_id, group_by, provider, cpt, date_from, date_to))).all()
+    
+    return {
+        "case_id": case.id,
+        "group_by": group_by,
+        "totals": summary_response(totals),
+        "groups": [summary_response(row) for row in groups]
+    }
+
+@app.get("/api/v1/search")
+async def search_documents(
+    q: str = Query(..., min_length=2, max_length=200),
+    kinds: str = ",".join(SEARCH_KINDS),
+    document_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_listing_read_db)
+):
+    """
+    Search OCR text, extracted codes and provider names of all completed documents.
+    
+    - text: pages whose OCR text matches q (words, "phrases", -exclusions),
+      best first, with a snippet and the boxes of the matching words
+    - codes: events with ICD-10 code q and line items with CPT code q
+    - providers: events / line items whose provider name contains q
+    
+    kinds selects any of these (comma separated); each returns up to limit
+    hits. Every hit carries the document, page and bounding boxes.
+    """
+    started = time.perf_counter()
+    requested = [kind.strip() for kind in kinds.split(",") if kind.strip()]
+    unknown = [kind for kind in requested if kind not in SEARCH_KINDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown search kinds: {', '.join(unknown)} (expected {', '.join(SEARCH_KINDS)})"
+        )
+    
+    hits = []
+    owner_statements = []
+    if "codes" in requested and is_code(q):
+        owner_statements += code_query(q, document_id, limit)
+    if "providers" in requested and not is_code(q):
+        owner_statements += provider_query(q, document_id, limit)
+    owner_rows = []
+    for statement in owner_statements:
+        owner_rows += (await db.execute(statement)).all()
+    refs_statement = owner_refs_query(owner_rows)
+    if refs_statement is not None:
+        hits += owner_hits(owner_rows, (await db.execute(refs_statement)).scalars().all())
+    
+    text_statement = page_text_query(q, db.bind.dialect.name, document_id, limit) if "text" in requested else None
+    if text_statement is not None:
+        rows = (await db.execute(text_statement)).all()
+        pages = await run_in_threadpool(load_hit_pages, rows)
+        terms = hit_terms(q)
+        hits += [page_hit(row, page, terms) for row, page in zip(rows, pages)]
+    
+    return {
+        "query": q,
+        "count": len(hits),
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+        "hits": hits
+    }
+
 # Placeholder endpoints to demonstrate schema usage
 @app.post("/chronology/mock", response_model=MedicalChronology)
 def create_mock_chronology(data: MedicalChronology):
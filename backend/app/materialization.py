@@ -0,0 +1,384 @@
+"""
+Relational Materialization of Extraction Results
+
+documents.extraction_result is one JSON blob per document, so questions
+across documents ("all bills with CPT 99214", "events between two dates",
+"total charges per provider") meant loading and scanning every document.
+When a document completes, its extraction is also written to normalized
+tables:
+
+    events            one row per chronology event (date, provider indexed)
+    event_diagnoses   one row per ICD-10 code of an event (code indexed)
+    line_items        one row per bill line item (date, CPT code, provider indexed)
+    source_refs       one row per source location of an extracted field
+
+Rows are inserted in bulk (one INSERT per table) in the transaction of the
+document's final write, replacing the rows of an earlier run, so they are
+always consistent with extraction_result. replace_document_rows also keeps
+the case timeline (app/timeline.py) and bill aggregates
+(app/bill_aggregates.py) derived from them current. The query builders
+below back the /api/v1/events and /api/v1/line-items endpoints.
+"""
+import logging
+import os
+from datetime import date
+from typing import Dict, Any, Iterable, List, Optional
+
+from sqlalchemy import Select, delete, func, insert, select
+
+from app.bill_aggregates import apply_contribution_change, document_contribution
+from app.chunked_extraction import event_key
+from app.metrics import metrics
+from app.models import Case, DocumentType, Event, EventDiagnosis, LineItem, SourceRef
+from app.timeline import document_event_keys, update_case_timeline
+from app.verification_service import canonical_date
+
+logger = logging.getLogger(__name__)
+
+MATERIALIZATION_ENABLED = os.getenv("MATERIALIZATION_ENABLED", "true").lower() in ("1", "true", "yes")
+
+TOTALS_GROUPS = {
+    "provider": LineItem.provider,
+    "cpt_code": LineItem.cpt_code,
+    "document_id": LineItem.document_id
+}
+
+
+def parse_date(value) -> Optional[date]:
+    """
+    Date of an extracted date string ("YYYY-MM-DD" or anything dateutil reads), or None.
+
+    Partial dates ("March 2024", "03/15") are None; date_text keeps them.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    canonical = canonical_date(value)
+    return date.fromisoformat(canonical) if canonical else None
+
+
+def parse_amount(value) -> Optional[float]:
+    """Number of an extracted amount (number or text like "$1,250.00"), or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace("$", "").replace(",", "").strip())
+        except ValueError:
+            return None
+    return None
+
+
+def normalize_code(value) -> Optional[str]:
+    """CPT / ICD code as stored and queried (trimmed, upper case)."""
+    if value is None:
+        return None
+    code = str(value).strip().upper()
+    return code or None
+
+
+def clear_document(db, document_id: int) -> None:
+    """Delete a document's materialized rows (not committed)."""
+    for model in (SourceRef, EventDiagnosis, Event, LineItem):
+        db.execute(delete(model).where(model.document_id == document_id))
+
+
+def materialize_extraction(
+    db,
+    document_id: int,
+    document_type: DocumentType,
+    extraction_result: Dict[str, Any]
+) -> Dict[str, int]:
+    """
+    Replace a document's materialized rows with those of extraction_result.
+
+    Flushed with the caller's transaction; the caller commits together with
+    the document's final write.
+
+    Returns:
+        Row counts per table
+    """
+    clear_document(db, document_id)
+    counts = {"events": 0, "event_diagnoses": 0, "line_items": 0, "source_refs": 0}
+    # Header fields (patient name, invoice number, total) are linked to the document only
+    ref_rows = _ref_rows(document_id, extraction_result.get("source_refs", []))
+
+    if document_type == DocumentType.CHRONOLOGY:
+        events = [event for event in extraction_result.get("events", []) if isinstance(event, dict)]
+        event_ids = _insert_document_rows(db, Event, document_id, [
+            {
+                "document_id": document_id,
+                "position": position,
+                "event_date": parse_date(event.get("date")),
+                "date_text": event.get("date"),
+                "provider": event.get("provider"),
+                "encounter_type": event.get("encounter_type"),
+                "summary": event.get("summary"),
+                "diagnosis_codes": event.get("diagnosis_codes") or [],
+                "event_key": "|".join(event_key(event))
+            }
+            for position, event in enumerate(events)
+        ])
+        diagnosis_rows = []
+        for event_id, event in zip(event_ids, events):
+            codes = {normalize_code(code) for code in event.get("diagnosis_codes") or []} - {None}
+            diagnosis_rows.extend(
+                {"event_id": event_id, "document_id": document_id, "code": code} for code in sorted(codes)
+            )
+            ref_rows.extend(_ref_rows(document_id, event.get("source_refs", []), event_id=event_id))
+        _insert_rows(db, EventDiagnosis, diagnosis_rows)
+        counts["events"] = len(event_ids)
+        counts["event_diagnoses"] = len(diagnosis_rows)
+
+    elif document_type == DocumentType.BILL:
+        items = [item for item in extraction_result.get("line_items", []) if isinstance(item, dict)]
+        provider = extraction_result.get("provider")
+        invoice_number = extraction_result.get("invoice_number")
+        item_ids = _insert_document_rows(db, LineItem, document_id, [
+            {
+                "document_id": document_id,
+                "position": position,
+                "service_date": parse_date(item.get("date_of_service")),
+                "date_text": item.get("date_of_service"),
+                "cpt_code": normalize_code(item.get("cpt_code")),
+                "description": item.get("description"),
+                "charged_amount": parse_amount(item.get("charged_amount")),
+                "allowed_amount": parse_amount(item.get("allowed_amount")),
+                "provider": item.get("provider") or provider,
+                "invoice_number": invoice_number
+            }
+            for position, item in enumerate(items)
+        ])
+        for item_id, item in zip(item_ids, items):
+            ref_rows.extend(_ref_rows(document_id, item.get("source_refs", []), line_item_id=item_id))
+        counts["line_items"] = len(item_ids)
+
+    _insert_rows(db, SourceRef, ref_rows)
+    counts["source_refs"] = len(ref_rows)
+
+    for table, count in counts.items():
+        metrics.incr(f"materialization.{table}", count)
+    logger.info(f"Materialized document {document_id}: {counts}")
+    return counts
+
+
+def replace_document_rows(
+    db,
+    document_id: int,
+    case_id: Optional[int],
+    document_type: Optional[DocumentType] = None,
+    extraction_result: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Replace (without a result: delete) a document's materialized rows and
+    update what is derived from them for its case: the timeline entries of
+    its encounters and the bill aggregates of its line items.
+
+    The case row is locked (FOR UPDATE) so documents of one case finishing
+    together update its timeline and aggregates one after the other. Not
+    committed.
+    """
+    if case_id:
+        db.execute(select(Case.id).where(Case.id == case_id).with_for_update())
+        stale_keys = document_event_keys(db, document_id)
+        contribution = document_contribution(db, document_id)
+
+    if extraction_result is None:
+        clear_document(db, document_id)
+    else:
+        materialize_extraction(db, document_id, document_type, extraction_result)
+
+    if case_id:
+        update_case_timeline(db, case_id, stale_keys | document_event_keys(db, document_id))
+        apply_contribution_change(db, case_id, contribution, document_contribution(db, document_id))
+
+
+def _insert_rows(db, model, rows: List[Dict[str, Any]]) -> None:
+    """One multi-row INSERT (Core executemany: None values do not split the batch)."""
+    if rows:
+        db.execute(insert(model.__table__), rows)
+
+
+def _insert_document_rows(db, model, document_id: int, rows: List[Dict[str, Any]]) -> List[int]:
+    """
+    Bulk INSERT a document's rows and return their primary keys in row (position) order.
+
+    The keys are read back by (document_id, position) with one SELECT:
+    INSERT .. RETURNING in parameter order is not batched on every backend.
+    """
+    if not rows:
+        return []
+    _insert_rows(db, model, rows)
+    ids = db.execute(
+        select(model.id).where(model.document_id == document_id).order_by(model.position)
+    ).scalars().all()
+    return list(ids)
+
+
+def _ref_rows(
+    document_id: int,
+    refs: Iterable[Dict[str, Any]],
+    event_id: Optional[int] = None,
+    line_item_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    rows = []
+    for ref in refs:
+        if not isinstance(ref, dict) or ref.get("page_number") is None:
+            continue
+        bbox = ref.get("bounding_box") or {}
+        rows.append({
+            "document_id": document_id,
+            "event_id": event_id,
+            "line_item_id": line_item_id,
+            "field": ref.get("field"),
+            "page_number": ref["page_number"],
+            "left": bbox.get("left"),
+            "top": bbox.get("top"),
+            "width": bbox.get("width"),
+            "height": bbox.get("height"),
+            "confidence": ref.get("confidence"),
+            "matched_text": ref.get("matched_text")
+        })
+    return rows
+
+
+# --- Queries ---
+
+def events_query(
+    icd: Optional[str] = None,
+    provider: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    document_id: Optional[int] = None,
+    limit: int = 100,
+    offset: int = 0
+) -> Select:
+    """Events matching all given filters, in date order, undated last (dates inclusive)."""
+    query = select(Event)
+    if icd:
+        query = query.where(Event.id.in_(
+            select(EventDiagnosis.event_id).where(EventDiagnosis.code == normalize_code(icd))
+        ))
+    if provider:
+        query = query.where(Event.provider == provider)
+    if date_from:
+        query = query.where(Event.event_date >= date_from)
+    if date_to:
+        query = query.where(Event.event_date <= date_to)
+    if document_id is not None:
+        query = query.where(Event.document_id == document_id)
+    return query.order_by(Event.event_date.asc().nulls_last(), Event.id).limit(limit).offset(offset)
+
+
+def _line_item_filters(query, cpt, provider, date_from, date_to, document_id):
+    if cpt:
+        query = query.where(LineItem.cpt_code == normalize_code(cpt))
+    if provider:
+        query = query.where(LineItem.provider == provider)
+    if date_from:
+        query = query.where(LineItem.service_date >= date_from)
+    if date_to:
+        query = query.where(LineItem.service_date <= date_to)
+    if document_id is not None:
+        query = query.where(LineItem.document_id == document_id)
+    return query
+
+
+def line_items_query(
+    cpt: Optional[str] = None,
+    provider: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    document_id: Optional[int] = None,
+    limit: int = 100,
+    offset: int = 0
+) -> Select:
+    """Line items matching all given filters, in date of service order (dates inclusive)."""
+    query = _line_item_filters(select(LineItem), cpt, provider, date_from, date_to, document_id)
+    return query.order_by(LineItem.service_date.asc().nulls_last(), LineItem.id).limit(limit).offset(offset)
+
+
+def line_item_totals_query(
+    group_by: str = "provider",
+    cpt: Optional[str] = None,
+    provider: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    document_id: Optional[int] = None
+) -> Select:
+    """Count and charged / allowed sums of matching line items per group_by value (see TOTALS_GROUPS)."""
+    key = TOTALS_GROUPS[group_by]
+    query = select(
+        key.label("key"),
+        func.count(LineItem.id).label("line_items"),
+        func.sum(LineItem.charged_amount).label("charged_amount"),
+        func.sum(LineItem.allowed_amount).label("allowed_amount")
+    )
+    query = _line_item_filters(query, cpt, provider, date_from, date_to, document_id)
+    return query.group_by(key).order_by(func.sum(LineItem.charged_amount).desc().nulls_last(), key)
+
+
+def source_refs_query(column, owner_ids: List[int]) -> Select:
+    """Source refs of the given events (column=SourceRef.event_id) or line items (SourceRef.line_item_id)."""
+    return select(SourceRef).where(column.in_(owner_ids)).order_by(SourceRef.id)
+
+
+def group_source_refs(refs: Iterable[SourceRef], attribute: str) -> Dict[int, List[Dict[str, Any]]]:
+    """Source refs keyed by their owner's ID, in the API's source_refs format."""
+    grouped: Dict[int, List[Dict[str, Any]]] = {}
+    for ref in refs:
+        grouped.setdefault(getattr(ref, attribute), []).append({
+            "field": ref.field,
+            "page_number": ref.page_number,
+            "bounding_box": {"left": ref.left, "top": ref.top, "width": ref.width, "height": ref.height},
+            "confidence": ref.confidence,
+            "matched_text": ref.matched_text
+        })
+    return grouped
+
+
+def _amount(value) -> Optional[float]:
+    # Numeric columns load as Decimal (SQLite sums as float)
+    return round(float(value), 2) if value is not None else None
+
+
+def event_response(event: Event, source_refs: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    return {
+        "event_id": event.id,
+        "document_id": event.document_id,
+        "date": event.event_date.isoformat() if event.event_date else event.date_text,
+        "provider": event.provider,
+        "encounter_type": event.encounter_type,
+        "summary": event.summary,
+        "diagnosis_codes": event.diagnosis_codes or [],
+        "source_refs": source_refs or []
+    }
+
+
+def line_item_response(item: LineItem, source_refs: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    return {
+        "line_item_id": item.id,
+        "document_id": item.document_id,
+        "date_of_service": item.service_date.isoformat() if item.service_date else item.date_text,
+        "cpt_code": item.cpt_code,
+        "description": item.description,
+        "charged_amount": _amount(item.charged_amount),
+        "allowed_amount": _amount(item.allowed_amount),
+        "provider": item.provider,
+        "invoice_number": item.invoice_number,
+        "source_refs": source_refs or []
+    }
+
+
+def totals_response(row) -> Dict[str, Any]:
+    return {
+        "key": row.key,
+        "line_items": row.line_items,
+        "charged_amount": _amount(row.charged_amount),
+        "allowed_amount": _amount(row.allowed_amount)
+    }
@@ -0,0 +1,157 @@
+"""
+Metrics: an in-process registry and Redis-backed shared counters.
+
+`metrics` holds lightweight counters and value summaries for pipeline
+instrumentation (cache hit rates, setup times, queue latencies). Each API or
+worker process keeps its own registry, so it serves benchmarks, tests and
+per-process debugging only.
+
+Numbers operators need across all processes go to SharedStats as well: one
+Redis hash per stats name, incremented with HINCRBY by every worker and read
+by the API (GET /api/v1/cache/stats, GET /api/v1/lanes/stats). Latencies
+are kept as count, sum and a fixed-bucket histogram, all updated with HINCRBY.
+"""
+import logging
+import os
+import threading
+from typing import Dict, Any, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+METRICS_REDIS_URL = os.getenv("METRICS_REDIS_URL", os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+# Upper bounds (seconds) of the histogram buckets of shared latency observations
+SHARED_LATENCY_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 900, 3600)
+
+
+class Metrics:
+    """Thread-safe counters and observations (count / sum / min / max)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._observations: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            summary = self._observations.get(name)
+            if summary is None:
+                self._observations[name] = {"count": 1, "sum": value, "min": value, "max": value}
+                return
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["min"] = min(summary["min"], value)
+            summary["max"] = max(summary["max"], value)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of all counters and observation summaries (with averages)."""
+        with self._lock:
+            observations = {
+                name: {**summary, "avg": summary["sum"] / summary["count"]}
+                for name, summary in self._observations.items()
+            }
+            return {"counters": dict(self._counters), "observations": observations}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+# Process-wide registry
+metrics = Metrics()
+
+
+class SharedStats:
+    """
+    Counters shared by all API and worker processes, in Redis hashes
+    named stats:<name>. Failures are logged and never raised: statistics
+    must not fail the pipeline. A client of None disables them.
+    """
+
+    def __init__(self, client=None):
+        self.client = client
+
+    def incr(self, name: str, field: str, amount: int = 1) -> None:
+        if self.client is None:
+            return
+        try:
+            self.client.hincrby(f"stats:{name}", field, amount)
+        except Exception as e:
+            logger.warning(f"Shared stats {name} not updated: {e}")
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Add a latency to the count, sum and histogram of a stats hash."""
+        if self.client is None:
+            return
+        bucket = next((f"le_{bound}" for bound in SHARED_LATENCY_BUCKETS if seconds <= bound), "le_inf")
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hincrby(f"stats:{name}", "count", 1)
+            pipe.hincrby(f"stats:{name}", "sum_ms", int(seconds * 1000))
+            pipe.hincrby(f"stats:{name}", bucket, 1)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Shared stats {name} not updated: {e}")
+
+    def latency_summary(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Count, average and bucket upper bounds of the median and 95th percentile
+        of a latency recorded with observe(); None when Redis is unavailable.
+        """
+        counts = self.read(name)
+        if counts is None:
+            return None
+        total = counts.get("count", 0)
+        buckets = {str(bound): counts.get(f"le_{bound}", 0) for bound in SHARED_LATENCY_BUCKETS}
+        buckets["inf"] = counts.get("le_inf", 0)
+
+        def percentile_bound(fraction: float) -> Optional[float]:
+            seen = 0
+            for bound, count in buckets.items():
+                seen += count
+                if total and seen >= fraction * total:
+                    return float(bound)
+            return None
+
+        return {
+            "count": total,
+            "avg_seconds": round(counts.get("sum_ms", 0) / 1000 / total, 3) if total else None,
+            "p50_seconds_at_most": percentile_bound(0.5),
+            "p95_seconds_at_most": percentile_bound(0.95),
+            "buckets": buckets
+        }
+
+    def read(self, name: str) -> Optional[Dict[str, int]]:
+        """All fields of a stats hash, or None when Redis is unavailable."""
+        if self.client is None:
+            return None
+        try:
+            raw = self.client.hgetall(f"stats:{name}")
+        except Exception as e:
+            logger.warning(f"Shared stats {name} unavailable: {e}")
+            return None
+        return {field.decode("utf-8"): int(value) for field, value in raw.items()}
+
+
+_shared_stats: Optional[SharedStats] = None
+
+
+def get_shared_stats() -> SharedStats:
+    """Process-wide shared stats on METRICS_REDIS_URL."""
+    global _shared_stats
+    if _shared_stats is None:
+        _shared_stats = SharedStats(
+            redis.Redis.from_url(METRICS_REDIS_URL, socket_connect_timeout=1.0, socket_timeout=1.0)
+        )
+    return _shared_stats
@@ -1,8 +1,25 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum as SQLEnum, JSON
+from sqlalchemy import (
+    Column, Integer, String, Text, Date, DateTime, Float, Numeric, Enum as SQLEnum, JSON, ForeignKey, LargeBinary, Index,
+    DDL, UniqueConstraint, event, func, literal_column
+)
+from sqlalchemy.orm import deferred
 from datetime import datetime
 import enum
 from app.database import Base
 
+# Text search configuration of the page_texts full-text index (app/search.py)
+SEARCH_CONFIG = "english"
+
+
+def search_vector(column):
+    """to_tsvector expression of the full-text index (queries must use the same expression to hit it)."""
+    return func.to_tsvector(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), column)
+
+
+def _trigram_index(name, column):
+    # Postgres only: substring / ILIKE lookups (codes, provider names)
+    return Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}).ddl_if(dialect="postgresql")
+
 class DocumentStatus(enum.Enum):
     QUEUED = "QUEUED"
     PROCESSING = "PROCESSING"
@@ -13,6 +30,25 @@ class DocumentType(enum.Enum):
     CHRONOLOGY = "CHRONOLOGY"
     BILL = "BILL"
 
+class UploadBatch(Base):
+    """A group of documents uploaded together (e.g. a whole case file)"""
+    __tablename__ = "upload_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    document_count = Column(Integer, nullable=False, default=0)
+    skipped_files = Column(JSON, nullable=True)  # Names of uploaded files that were not PDFs
+
+class Case(Base):
+    """A case / patient: documents whose chronologies form one timeline"""
+    __tablename__ = "cases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    patient_name = Column(String, nullable=True)
+    tenant_id = Column(String, nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
 class Document(Base):
     __tablename__ = "documents"
 
@@ -25,3 +61,155 @@ class Document(Base):
     ocr_result = Column(String, nullable=True)  # Store OCR result JSON as text
     document_type = Column(SQLEnum(DocumentType), nullable=True)  # CHRONOLOGY or BILL
     extraction_result = Column(JSON, nullable=True)  # Structured extraction data (chronology or bill)
+    batch_id = Column(Integer, ForeignKey("upload_batches.id"), nullable=True, index=True)  # Set for bulk uploads
+    tenant_id = Column(String, nullable=True, index=True)  # Firm / tenant for fair scheduling
+    response_body = deferred(Column(LargeBinary, nullable=True))  # Pre-encoded GET response JSON of a COMPLETED document
+    case_id = Column(Integer, ForeignKey("cases.id"), nullable=True, index=True)  # Case timeline the document feeds
+    dedup_indexed_pages = Column(Integer, nullable=True)  # Pages checked for near-duplicates (summed per batch)
+    dedup_duplicate_pages = Column(Integer, nullable=True)  # Of those, duplicates within or across documents
+
+
+class PageSignature(Base):
+    """MinHash signature of one page's OCR text (near-duplicate index)"""
+    __tablename__ = "page_signatures"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    page_number = Column(Integer, nullable=False)
+    signature = Column(LargeBinary, nullable=False)  # Packed unsigned 32-bit MinHash values
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class PageSignatureBand(Base):
+    """LSH band hash of a page signature; pages sharing any band are duplicate candidates"""
+    __tablename__ = "page_signature_bands"
+
+    id = Column(Integer, primary_key=True, index=True)
+    band_hash = Column(String(32), nullable=False)  # "<band index>:<hash of the band's rows>"
+    page_signature_id = Column(Integer, ForeignKey("page_signatures.id", ondelete="CASCADE"), nullable=False)
+
+    __table_args__ = (Index("ix_page_signature_bands_band_hash", "band_hash"),)
+
+
+# --- Materialized extraction results (app/materialization.py) ---
+
+class Event(Base):
+    """One chronology event of a COMPLETED document"""
+    __tablename__ = "events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # Index in extraction_result["events"]
+    event_date = Column(Date, nullable=True, index=True)  # None if the extracted date does not parse
+    date_text = Column(String, nullable=True)  # Date as extracted
+    provider = Column(String, nullable=True, index=True)
+    encounter_type = Column(String, nullable=True)
+    summary = Column(Text, nullable=True)
+    diagnosis_codes = Column(JSON, nullable=True)  # For display; queried through event_diagnoses
+    event_key = Column(String, nullable=True, index=True)  # Encounter identity "date|provider|type" (case timeline dedup)
+
+    __table_args__ = (_trigram_index("ix_events_provider_trgm", "provider"),)
+
+class EventDiagnosis(Base):
+    """ICD-10 code of an event (one row per code, indexed for code lookups)"""
+    __tablename__ = "event_diagnoses"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    code = Column(String(16), nullable=False, index=True)
+
+class LineItem(Base):
+    """One bill line item of a COMPLETED document"""
+    __tablename__ = "line_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # Index in extraction_result["line_items"]
+    service_date = Column(Date, nullable=True, index=True)
+    date_text = Column(String, nullable=True)
+    cpt_code = Column(String(16), nullable=True, index=True)
+    description = Column(Text, nullable=True)
+    charged_amount = Column(Numeric(12, 2), nullable=True)
+    allowed_amount = Column(Numeric(12, 2), nullable=True)
+    provider = Column(String, nullable=True, index=True)  # Billing provider, when the extraction names one
+    invoice_number = Column(String, nullable=True)
+
+    __table_args__ = (_trigram_index("ix_line_items_provider_trgm", "provider"),)
+
+class SourceRef(Base):
+    """Source location of an extracted field (event, line item or document header field)"""
+    __tablename__ = "source_refs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=True, index=True)
+    line_item_id = Column(Integer, ForeignKey("line_items.id", ondelete="CASCADE"), nullable=True, index=True)
+    field = Column(String, nullable=True)
+    page_number = Column(Integer, nullable=False)
+    left = Column(Float, nullable=True)
+    top = Column(Float, nullable=True)
+    width = Column(Float, nullable=True)
+    height = Column(Float, nullable=True)
+    confidence = Column(Float, nullable=True)
+    matched_text = Column(Text, nullable=True)
+
+
+class CaseTimelineEntry(Base):
+    """One encounter of a case timeline: the merge of the events reporting it across the case's documents"""
+    __tablename__ = "case_timeline_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    case_id = Column(Integer, ForeignKey("cases.id", ondelete="CASCADE"), nullable=False)
+    event_key = Column(String, nullable=False)
+    event_date = Column(Date, nullable=True)
+    date_text = Column(String, nullable=True)
+    provider = Column(String, nullable=True)
+    encounter_type = Column(String, nullable=True)
+    summary = Column(Text, nullable=True)
+    diagnosis_codes = Column(JSON, nullable=True)
+    sources = Column(JSON, nullable=False)  # [{"document_id", "event_id"}, ...] of the merged events
+    source_count = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("case_id", "event_key", name="uq_case_timeline_entries_case_key"),
+        # Date range scans and keyset pagination within a case
+        Index("ix_case_timeline_entries_case_date", "case_id", "event_date", "id"),
+    )
+
+
+class BillAggregate(Base):
+    """Line item count and totals of a case's bills per (provider, CPT code, date of service)"""
+    __tablename__ = "bill_aggregates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    case_id = Column(Integer, ForeignKey("cases.id", ondelete="CASCADE"), nullable=False)
+    provider = Column(String, nullable=True)
+    cpt_code = Column(String(16), nullable=True)
+    service_date = Column(Date, nullable=True)
+    line_items = Column(Integer, nullable=False, default=0)
+    charged_amount = Column(Numeric(14, 2), nullable=False, default=0)
+    allowed_amount = Column(Numeric(14, 2), nullable=False, default=0)  # Items without an allowed amount count as 0
+
+    __table_args__ = (
+        Index("ix_bill_aggregates_case_group", "case_id", "provider", "cpt_code", "service_date"),
+    )
+
+
+class PageText(Base):
+    """OCR text of one page of a COMPLETED document (search index)"""
+    __tablename__ = "page_texts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    page_number = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_page_texts_search", search_vector(text), postgresql_using="gin").ddl_if(dialect="postgresql"),
+        _trigram_index("ix_page_texts_text_trgm", "text"),
+    )
+
+
+# Trigram indexes need the pg_trgm extension before any table is created
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
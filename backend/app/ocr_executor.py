@@ -0,0 +1,184 @@
+"""
+Page-level OCR Executor
+
+Runs OCR on many pages of a document concurrently and yields the results
+back in page order. Three execution modes are supported:
+
+- "thread":  ThreadPoolExecutor, for I/O-bound engines (HTTP OCR APIs)
+- "process": ProcessPoolExecutor, for CPU-bound local engines
+- "async":   submit/poll against an AsyncOCRBackend (Textract-style); pages
+             are submitted as jobs and polled, no thread waits per page
+
+At most ``max_in_flight`` pages are pending at once, so results are streamed
+with memory bounded by the window size, not the document size.
+
+Process mode needs a process that may start children. Celery prefork
+workers are daemonic and cannot, so inside them (or any other daemonic
+process) "process" is downgraded to "thread" with a warning; run the worker
+with ``--pool threads`` or ``--pool solo`` to get a real process pool.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, Union
+
+from app.ocr_service import OCRBackend, AsyncOCRBackend
+
+logger = logging.getLogger(__name__)
+
+OCR_EXECUTOR = os.getenv("OCR_EXECUTOR", "thread")
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", "4"))
+OCR_POLL_INTERVAL = float(os.getenv("OCR_POLL_INTERVAL", "0.5"))
+
+EXECUTOR_MODES = ("thread", "process", "async")
+
+
+def _ocr_page(backend: OCRBackend, file_path: str, page_number: int) -> Dict[str, Any]:
+    """Module-level so it can be pickled for the process pool."""
+    return backend.ocr_page(file_path, page_number)
+
+
+def _in_daemon_process() -> bool:
+    """True in daemonic processes (Celery prefork children are billiard daemons)."""
+    if multiprocessing.current_process().daemon:
+        return True
+    try:
+        from billiard.process import current_process
+    except ImportError:
+        return False
+    return bool(current_process().daemon)
+
+
+class _PendingJob:
+    """A page submitted to an AsyncOCRBackend that has not been collected yet."""
+
+    def __init__(self, job_id: str, page_number: int):
+        self.job_id = job_id
+        self.page_number = page_number
+
+
+class PageExecutor:
+    """
+    Concurrent, order-preserving page OCR on top of an OCRBackend.
+    """
+
+    def __init__(
+        self,
+        backend: OCRBackend,
+        mode: str = OCR_EXECUTOR,
+        max_workers: int = OCR_MAX_WORKERS,
+        poll_interval: float = OCR_POLL_INTERVAL,
+        persistent: bool = False
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown OCR executor mode: {mode}")
+        if mode == "async" and not isinstance(backend, AsyncOCRBackend):
+            raise ValueError(f"{type(backend).__name__} does not support submit/poll")
+        if mode == "process" and _in_daemon_process():
+            logger.warning("OCR executor: daemonic worker processes cannot start a process pool; using threads")
+            mode = "thread"
+
+        self.backend = backend
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight = self.max_workers * 2
+        self.poll_interval = poll_interval
+        # A persistent executor (one per worker process) keeps its pool across documents
+        self.persistent = persistent
+        self._pool = None
+
+    def map_pages(
+        self,
+        file_path: str,
+        items: Iterable[Union[int, Dict[str, Any]]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        OCR pages concurrently, yielding results in input order.
+
+        Args:
+            file_path: Path to the document file
+            items: Page numbers to OCR. Already-extracted page dicts may be
+                interleaved and are passed through in place, which lets
+                callers mix text-layer pages with OCR'd pages.
+
+        Yields:
+            OCR page dicts in the order of ``items``
+        """
+        if self.mode == "async":
+            yield from self._map_async(file_path, items)
+        else:
+            yield from self._map_pool(file_path, items)
+
+    def _map_pool(self, file_path: str, items) -> Iterator[Dict[str, Any]]:
+        if self.persistent:
+            yield from self._map_window(self._get_pool(), file_path, items)
+            return
+
+        with self._new_pool() as pool:
+            yield from self._map_window(pool, file_path, items)
+
+    def _map_window(self, pool, file_path: str, items) -> Iterator[Dict[str, Any]]:
+        window = deque()
+
+        for item in items:
+            if isinstance(item, int):
+                item = pool.submit(_ocr_page, self.backend, file_path, item)
+            window.append(item)
+
+            while len(window) >= self.max_in_flight:
+                yield self._resolve(window.popleft())
+
+        while window:
+            yield self._resolve(window.popleft())
+
+    def _new_pool(self):
+        pool_cls = ThreadPoolExecutor if self.mode == "thread" else ProcessPoolExecutor
+        return pool_cls(max_workers=self.max_workers)
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = self._new_pool()
+        return self._pool
+
+    def close(self) -> None:
+        """Shut down the persistent pool, if any."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def _map_async(self, file_path: str, items) -> Iterator[Dict[str, Any]]:
+        window = deque()
+
+        for item in items:
+            if isinstance(item, int):
+                item = _PendingJob(self.backend.submit_page(file_path, item), item)
+            window.append(item)
+
+            while len(window) >= self.max_in_flight:
+                yield self._resolve(window.popleft())
+
+        while window:
+            yield self._resolve(window.popleft())
+
+    def _resolve(self, entry) -> Dict[str, Any]:
+        """Block until the oldest window entry is available."""
+        if isinstance(entry, Future):
+            return entry.result()
+
+        if isinstance(entry, _PendingJob):
+            while True:
+                page = self.backend.get_page_result(entry.job_id)
+                if page is not None:
+                    return page
+                time.sleep(self.poll_interval)
+
+        return entry
+
+    def iter_pages(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """OCR every page of the file concurrently, in page order."""
+        page_count = self.backend.page_count(file_path)
+        logger.info(f"PageExecutor: OCR of {page_count} pages ({self.mode}, {self.max_workers} workers)")
+        return self.map_pages(file_path, range(1, page_count + 1))
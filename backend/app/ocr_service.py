@@ -1,13 +1,165 @@
+"""
+OCR Service
+
+Defines the OCRBackend interface used by the document pipeline, the mock /
+local stand-in backend, and backend selection by configuration.
+
+A backend only needs to OCR a single page; app.ocr_executor.PageExecutor runs
+pages concurrently on a thread or process pool (or via submit/poll for
+Textract-style services) and reassembles them in page order.
+
+Document-level job services (DocumentJobOCRBackend) are driven by the
+submit_ocr / poll_ocr_job Celery tasks instead, so no worker slot is held
+while the remote engine is busy.
+"""
+import os
 import time
 import json
-from typing import Dict, Any
+import uuid
+from typing import Dict, Any, Iterator, List, Optional, Protocol, runtime_checkable
+
+import pdfplumber
+import requests
+
+# Backend selection and local stand-in latency
+OCR_BACKEND = os.getenv("OCR_BACKEND", "mock")
+MOCK_OCR_PAGE_LATENCY = float(os.getenv("MOCK_OCR_PAGE_LATENCY", "2.0"))
+OCR_SERVICE_URL = os.getenv("OCR_SERVICE_URL", "http://localhost:8100")
+
+
+def page_text(page: Dict[str, Any]) -> str:
+    """Join the words of a single OCR page into plain text for the LLM."""
+    return " ".join(word["text"] for word in page.get("words", []))
+
+
+@runtime_checkable
+class OCRBackend(Protocol):
+    """Interface every OCR engine implements: OCR one page of a file."""
+    
+    def page_count(self, file_path: str) -> int:
+        ...
+    
+    def ocr_page(self, file_path: str, page_number: int) -> Dict[str, Any]:
+        ...
+
+
+@runtime_checkable
+class AsyncOCRBackend(OCRBackend, Protocol):
+    """
+    Textract-style engine: pages are submitted as jobs and polled for results,
+    so no local thread has to wait on the engine.
+    """
+    
+    def submit_page(self, file_path: str, page_number: int) -> str:
+        ...
+    
+    def get_page_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the OCR page once the job is done, None while it is running."""
+        ...
+
+
+@runtime_checkable
+class DocumentJobOCRBackend(Protocol):
+    """
+    Remote engine that OCRs a whole document as one long-running job
+    (e.g. Textract StartDocumentTextDetection / GetDocumentTextDetection).
+    """
+    
+    def submit_document(self, file_path: str, page_numbers: Optional[List[int]] = None) -> str:
+        ...
+    
+    def get_job_status(self, job_id: str) -> str:
+        """One of IN_PROGRESS, SUCCEEDED or FAILED."""
+        ...
+    
+    def iter_job_pages(self, job_id: str) -> Iterator[Dict[str, Any]]:
+        """Stream the pages of a SUCCEEDED job in page order."""
+        ...
+
+
+MOCK_PAGE = {
+    "page_number": 1,
+    "width": 612,
+    "height": 792,
+    "words": [
+        {
+            "text": "Medical",
+            "confidence": 0.99,
+            "bounding_box": {"left": 50, "top": 50, "width": 80, "height": 20}
+        },
+        {
+            "text": "Record",
+            "confidence": 0.98,
+            "bounding_box": {"left": 135, "top": 50, "width": 70, "height": 20}
+        },
+        {
+            "text": "Patient:",
+            "confidence": 0.99,
+            "bounding_box": {"left": 50, "top": 100, "width": 60, "height": 18}
+        },
+        {
+            "text": "John",
+            "confidence": 0.97,
+            "bounding_box": {"left": 115, "top": 100, "width": 40, "height": 18}
+        },
+        {
+            "text": "Doe",
+            "confidence": 0.98,
+            "bounding_box": {"left": 160, "top": 100, "width": 35, "height": 18}
+        },
+        {
+            "text": "Date:",
+            "confidence": 0.99,
+            "bounding_box": {"left": 50, "top": 130, "width": 45, "height": 18}
+        },
+        {
+            "text": "2024-01-15",
+            "confidence": 0.96,
+            "bounding_box": {"left": 100, "top": 130, "width": 90, "height": 18}
+        },
+        {
+            "text": "Diagnosis:",
+            "confidence": 0.98,
+            "bounding_box": {"left": 50, "top": 160, "width": 80, "height": 18}
+        },
+        {
+            "text": "M54.5",
+            "confidence": 0.95,
+            "bounding_box": {"left": 135, "top": 160, "width": 55, "height": 18}
+        },
+        {
+            "text": "Low",
+            "confidence": 0.99,
+            "bounding_box": {"left": 195, "top": 160, "width": 35, "height": 18}
+        },
+        {
+            "text": "back",
+            "confidence": 0.99,
+            "bounding_box": {"left": 235, "top": 160, "width": 40, "height": 18}
+        },
+        {
+            "text": "pain",
+            "confidence": 0.98,
+            "bounding_box": {"left": 280, "top": 160, "width": 35, "height": 18}
+        }
+    ]
+}
+
 
 class MockOCRService:
     """
     Mock OCR service that simulates AWS Textract without requiring actual AWS credentials.
     Returns dummy OCR output with bounding boxes to test the async worker infrastructure.
+    
+    Doubles as the local stand-in backend: each page takes ``page_latency``
+    seconds, either blocking (ocr_page) or as a submitted job (submit_page /
+    get_page_result), so page-level concurrency can be exercised offline.
     """
     
+    def __init__(self, page_latency: float = MOCK_OCR_PAGE_LATENCY):
+        self.page_latency = page_latency
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+    
     def process_document(self, file_path: str) -> Dict[str, Any]:
         """
         Simulates OCR processing with a delay.
@@ -18,83 +170,130 @@ class MockOCRService:
         Returns:
             Mock OCR result with words and bounding boxes
         """
-        # Simulate processing time
-        time.sleep(2)
-        
-        # Return mock OCR data with realistic structure
-        mock_result = {
+        return {
             "status": "SUCCESS",
-            "pages": [
-                {
-                    "page_number": 1,
-                    "width": 612,
-                    "height": 792,
-                    "words": [
-                        {
-                            "text": "Medical",
-                            "confidence": 0.99,
-                            "bounding_box": {"left": 50, "top": 50, "width": 80, "height": 20}
-                        },
-                        {
-                            "text": "Record",
-                            "confidence": 0.98,
-                            "bounding_box": {"left": 135, "top": 50, "width": 70, "height": 20}
-                        },
-                        {
-                            "text": "Patient:",
-                            "confidence": 0.99,
-                            "bounding_box": {"left": 50, "top": 100, "width": 60, "height": 18}
-                        },
-                        {
-                            "text": "John",
-                            "confidence": 0.97,
-                            "bounding_box": {"left": 115, "top": 100, "width": 40, "height": 18}
-                        },
-                        {
-                            "text": "Doe",
-                            "confidence": 0.98,
-                            "bounding_box": {"left": 160, "top": 100, "width": 35, "height": 18}
-                        },
-                        {
-                            "text": "Date:",
-                            "confidence": 0.99,
-                            "bounding_box": {"left": 50, "top": 130, "width": 45, "height": 18}
-                        },
-                        {
-                            "text": "2024-01-15",
-                            "confidence": 0.96,
-                            "bounding_box": {"left": 100, "top": 130, "width": 90, "height": 18}
-                        },
-                        {
-                            "text": "Diagnosis:",
-                            "confidence": 0.98,
-                            "bounding_box": {"left": 50, "top": 160, "width": 80, "height": 18}
-                        },
-                        {
-                            "text": "M54.5",
-                            "confidence": 0.95,
-                            "bounding_box": {"left": 135, "top": 160, "width": 55, "height": 18}
-                        },
-                        {
-                            "text": "Low",
-                            "confidence": 0.99,
-                            "bounding_box": {"left": 195, "top": 160, "width": 35, "height": 18}
-                        },
-                        {
-                            "text": "back",
-                            "confidence": 0.99,
-                            "bounding_box": {"left": 235, "top": 160, "width": 40, "height": 18}
-                        },
-                        {
-                            "text": "pain",
-                            "confidence": 0.98,
-                            "bounding_box": {"left": 280, "top": 160, "width": 35, "height": 18}
-                        }
-                    ]
-                }
-            ],
+            "pages": list(self.iter_pages(file_path)),
             "processed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
             "file_path": file_path
         }
+    
+    def iter_pages(
+        self,
+        file_path: str,
+        page_numbers: Optional[List[int]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Simulates OCR processing, yielding one page at a time.
+        
+        Callers that consume pages as they are produced only ever hold a
+        single page in memory, regardless of document length.
+        
+        Args:
+            file_path: Path to the document file
+            page_numbers: Only OCR these pages (default: every page)
+            
+        Yields:
+            Mock OCR page with words and bounding boxes
+        """
+        if page_numbers is None:
+            page_numbers = range(1, self.page_count(file_path) + 1)
+        
+        for page_number in page_numbers:
+            yield self.ocr_page(file_path, page_number)
+    
+    def page_count(self, file_path: str) -> int:
+        """Number of pages in the PDF (1 if the file is not a parseable PDF)."""
+        try:
+            with pdfplumber.open(file_path) as pdf:
+                return len(pdf.pages)
+        except Exception:
+            return 1
+    
+    def ocr_page(self, file_path: str, page_number: int) -> Dict[str, Any]:
+        """Simulate OCR of a single page; the mock has one canned page."""
+        # Simulate processing time
+        time.sleep(self.page_latency)
+        
+        return {**MOCK_PAGE, "page_number": page_number}
+    
+    def submit_page(self, file_path: str, page_number: int) -> str:
+        """Start a simulated OCR job that completes after page_latency."""
+        job_id = str(uuid.uuid4())
+        self._jobs[job_id] = {
+            "page_number": page_number,
+            "ready_at": time.monotonic() + self.page_latency
+        }
+        return job_id
+    
+    def get_page_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs[job_id]
+        if time.monotonic() < job["ready_at"]:
+            return None
         
-        return mock_result
+        del self._jobs[job_id]
+        return {**MOCK_PAGE, "page_number": job["page_number"]}
+
+
+class HTTPOCRBackend:
+    """
+    Client for an asynchronous, Textract-style OCR HTTP service.
+    
+    API:
+        POST /jobs                       {"file_path", "page_numbers"} -> {"job_id"}
+        GET  /jobs/{job_id}              -> {"status", "page_count"}
+        GET  /jobs/{job_id}/pages        ?offset=&limit= -> {"pages", "next_offset"}
+    """
+    
+    def __init__(self, base_url: str = OCR_SERVICE_URL, page_size: int = 50, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+        self.timeout = timeout
+        self.session = requests.Session()
+    
+    def submit_document(self, file_path: str, page_numbers: Optional[List[int]] = None) -> str:
+        response = self.session.post(
+            f"{self.base_url}/jobs",
+            json={"file_path": file_path, "page_numbers": page_numbers},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()["job_id"]
+    
+    def get_job_status(self, job_id: str) -> str:
+        response = self.session.get(f"{self.base_url}/jobs/{job_id}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["status"]
+    
+    def iter_job_pages(self, job_id: str) -> Iterator[Dict[str, Any]]:
+        """Fetch results one batch of pages at a time."""
+        offset = 0
+        while offset is not None:
+            response = self.session.get(
+                f"{self.base_url}/jobs/{job_id}/pages",
+                params={"offset": offset, "limit": self.page_size},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            body = response.json()
+            yield from body["pages"]
+            offset = body.get("next_offset")
+
+
+# Registry of OCR backends selectable via OCR_BACKEND
+OCR_BACKENDS = {
+    "mock": MockOCRService,
+    "http": HTTPOCRBackend,
+}
+
+
+def get_ocr_backend(name: Optional[str] = None):
+    """
+    Instantiate the configured OCR backend.
+    
+    Args:
+        name: Backend name (defaults to the OCR_BACKEND setting)
+    """
+    name = name or OCR_BACKEND
+    if name not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name}")
+    return OCR_BACKENDS[name]()
@@ -0,0 +1,137 @@
+"""
+OCR Page Store
+
+Append-only, on-disk storage for OCR output. Each page is written as one JSON
+line as soon as the OCR engine produces it, so the worker never has to hold
+the whole document's OCR result (or its serialized form) in memory.
+
+The store is re-iterable and yields pages lazily, which means it can be passed
+anywhere an in-memory ``ocr_map["pages"]`` list was used before, e.g.:
+
+    link_verification(extraction, {"pages": store}, file_id)
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OCR_STORE_DIR = Path(os.getenv("OCR_STORE_DIR", "/code/uploads/ocr"))
+
+
+class OCRPageStore:
+    """
+    JSON-lines page store with a byte-offset index for random page access.
+
+    Layout:
+        <name>.jsonl  one OCR page dict per line, in page order
+        <name>.idx    {"<page_number>": <byte offset>, ...}
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".idx")
+        self._offsets: Dict[int, int] = {}
+        self._file = None
+        self._index_loaded = False
+
+    @classmethod
+    def for_document(cls, document_id: int, variant: Optional[str] = None) -> "OCRPageStore":
+        """
+        Return the page store for a document inside ``OCR_STORE_DIR``.
+
+        Args:
+            document_id: ID of the document
+            variant: Name of an auxiliary store, e.g. "text" for text-layer
+                pages held while an OCR job runs
+        """
+        name = f"{document_id}.{variant}" if variant else str(document_id)
+        return cls(OCR_STORE_DIR / f"{name}.jsonl")
+
+    # --- Writing ---
+
+    def open_for_write(self) -> "OCRPageStore":
+        """Truncate the store and prepare it for appending pages."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("wb")
+        self._offsets = {}
+        self._index_loaded = True
+        return self
+
+    def append(self, page: Dict[str, Any]) -> None:
+        """Write a single page to disk and record its offset."""
+        if self._file is None:
+            raise RuntimeError("Page store is not open for writing")
+
+        self._offsets[int(page.get("page_number", len(self._offsets) + 1))] = self._file.tell()
+        self._file.write(json.dumps(page, separators=(",", ":")).encode("utf-8"))
+        self._file.write(b"\n")
+
+    def close(self) -> None:
+        """Flush pages and persist the offset index."""
+        if self._file is None:
+            return
+
+        self._file.close()
+        self._file = None
+        with self.index_path.open("w") as index_file:
+            json.dump({str(k): v for k, v in self._offsets.items()}, index_file)
+
+        logger.info(f"OCRPageStore: wrote {len(self._offsets)} pages to {self.path}")
+
+    def delete(self) -> None:
+        """Remove the store's files (missing files are ignored)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.path.unlink(missing_ok=True)
+        self.index_path.unlink(missing_ok=True)
+        self._offsets = {}
+
+    def __enter__(self) -> "OCRPageStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # --- Reading ---
+
+    def _load_index(self) -> None:
+        if self._index_loaded:
+            return
+
+        if self.index_path.exists():
+            with self.index_path.open() as index_file:
+                self._offsets = {int(k): v for k, v in json.load(index_file).items()}
+        self._index_loaded = True
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def __len__(self) -> int:
+        self._load_index()
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield pages one at a time; only a single page is decoded at once."""
+        with self.path.open("rb") as pages_file:
+            for line in pages_file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def page_numbers(self) -> List[int]:
+        self._load_index()
+        return sorted(self._offsets)
+
+    def get_page(self, page_number: int) -> Optional[Dict[str, Any]]:
+        """Random access to a single page via the offset index."""
+        self._load_index()
+        offset = self._offsets.get(page_number)
+        if offset is None:
+            return None
+
+        with self.path.open("rb") as pages_file:
+            pages_file.seek(offset)
+            return json.loads(pages_file.readline())
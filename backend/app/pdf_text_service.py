@@ -0,0 +1,193 @@
+"""
+PDF Text Layer Service
+
+Born-digital PDFs (e-billing exports, EHR prints) already carry a text layer.
+Reading words and bounding boxes from it takes milliseconds per page, while
+OCR takes seconds, so pages with usable text skip OCR entirely and only
+image-only pages are sent to the OCR service.
+
+Pages produced here use the same schema as the OCR output consumed by
+verification_service:
+
+    {
+        "page_number": 1,
+        "width": 612,
+        "height": 792,
+        "source": "text_layer",
+        "words": [
+            {"text": "99214", "confidence": 1.0,
+             "bounding_box": {"left": 72.0, "top": 140.5, "width": 31.2, "height": 10.0}}
+        ]
+    }
+"""
+import logging
+import os
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+# A page needs at least this many words to count as having a real text layer
+PDF_TEXT_MIN_WORDS = int(os.getenv("PDF_TEXT_MIN_WORDS", "5"))
+
+# Words emitted for glyphs without a unicode mapping, e.g. "(cid:42)"
+UNMAPPED_GLYPH_MARKER = "(cid:"
+
+
+class PDFTextExtractor:
+    """
+    Extracts words, bounding boxes and page dimensions from a PDF text layer.
+    """
+
+    def __init__(self, min_words: int = PDF_TEXT_MIN_WORDS):
+        self.min_words = min_words
+
+    def iter_pages(self, file_path: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+        """
+        Walk the PDF page by page.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Yields:
+            (page_number, page) tuples, where page is None for pages without
+            a usable text layer (scanned / image-only pages)
+        """
+        with pdfplumber.open(file_path) as pdf:
+            for page_number, pdf_page in enumerate(pdf.pages, start=1):
+                try:
+                    yield page_number, self._extract_page(pdf_page, page_number)
+                finally:
+                    # Release parsed layout objects so memory stays per-page
+                    pdf_page.close()
+
+    def _extract_page(self, pdf_page, page_number: int) -> Optional[Dict[str, Any]]:
+        """Convert one pdfplumber page to OCR page schema, or None if image-only."""
+        raw_words = pdf_page.extract_words(keep_blank_chars=False, use_text_flow=False)
+
+        words = [
+            {
+                "text": word["text"],
+                "confidence": 1.0,
+                "bounding_box": {
+                    "left": float(word["x0"]),
+                    "top": float(word["top"]),
+                    "width": float(word["x1"] - word["x0"]),
+                    "height": float(word["bottom"] - word["top"])
+                }
+            }
+            for word in raw_words
+            if UNMAPPED_GLYPH_MARKER not in word["text"]
+        ]
+
+        if len(words) < self.min_words:
+            return None
+
+        return {
+            "page_number": page_number,
+            "width": float(pdf_page.width),
+            "height": float(pdf_page.height),
+            "source": "text_layer",
+            "words": words
+        }
+
+
+def iter_document_pages(
+    file_path: str,
+    page_executor,
+    text_extractor: Optional[PDFTextExtractor] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every page of a document in order, using the PDF text layer where
+    available and falling back to OCR for image-only pages.
+
+    Image-only pages are handed to the page executor as they are found, so
+    they are OCR'd concurrently while text-layer pages pass straight through.
+
+    Args:
+        file_path: Path to the document file
+        page_executor: app.ocr_executor.PageExecutor running the OCR backend
+        text_extractor: Text layer extractor (defaults to PDFTextExtractor())
+
+    Yields:
+        OCR-schema page dicts, one at a time
+    """
+    text_extractor = text_extractor or PDFTextExtractor()
+
+    try:
+        pages = text_extractor.iter_pages(file_path)
+        first = next(pages, None)
+    except Exception as e:
+        # Not a parseable PDF: let the OCR engine handle the whole file
+        logger.warning(f"Text layer unavailable for {file_path} ({e}); using OCR for all pages")
+        for page in page_executor.iter_pages(file_path):
+            page.setdefault("source", "ocr")
+            yield page
+        return
+
+    if first is None:
+        return
+
+    counts = {"text_layer": 0, "ocr": 0}
+
+    def items():
+        for page_number, page in _chain_first(first, pages):
+            if page is not None:
+                counts["text_layer"] += 1
+                yield page
+            else:
+                counts["ocr"] += 1
+                yield page_number
+
+    for page in page_executor.map_pages(file_path, items()):
+        page.setdefault("source", "ocr")
+        yield page
+
+    logger.info(
+        f"Text layer pages: {counts['text_layer']}, OCR pages: {counts['ocr']} for {file_path}"
+    )
+
+
+def split_text_layer(
+    file_path: str,
+    text_store,
+    text_extractor: Optional[PDFTextExtractor] = None
+) -> Optional[List[int]]:
+    """
+    Write text-layer pages to a page store and report which pages need OCR.
+
+    Used ahead of a document-level OCR job, so only image-only pages are
+    submitted to the remote engine.
+
+    Args:
+        file_path: Path to the document file
+        text_store: Open OCRPageStore receiving the text-layer pages
+        text_extractor: Text layer extractor (defaults to PDFTextExtractor())
+
+    Returns:
+        Page numbers that need OCR, or None if the whole file does
+        (not a parseable PDF)
+    """
+    text_extractor = text_extractor or PDFTextExtractor()
+    ocr_page_numbers = []
+
+    try:
+        for page_number, page in text_extractor.iter_pages(file_path):
+            if page is not None:
+                text_store.append(page)
+            else:
+                ocr_page_numbers.append(page_number)
+    except Exception as e:
+        logger.warning(f"Text layer unavailable for {file_path} ({e}); using OCR for all pages")
+        # Discard any text pages written before the failure
+        text_store.close()
+        text_store.open_for_write()
+        return None
+
+    return ocr_page_numbers
+
+
+def _chain_first(first, rest):
+    yield first
+    yield from rest
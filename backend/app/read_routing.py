@@ -0,0 +1,163 @@
+"""
+Read Replica Routing
+
+With DATABASE_REPLICA_URL set, the read-only endpoints (document status,
+listing, page fetches) query the streaming replica instead of the primary
+that the Celery workers write to. Replication is asynchronous, so a client
+polling a document that was just updated could read an older row. To keep
+read-your-writes:
+
+- every write to a document marks it in Redis for READ_YOUR_WRITES_SECONDS
+  (uploads also mark the listing); marked reads go to the primary
+- a document the replica does not have yet is looked up on the primary
+- if the marks cannot be read, reads go to the primary
+
+Without a replica every read uses the primary engine.
+"""
+import logging
+import os
+from typing import Iterable, Optional
+
+import redis
+import redis.asyncio
+from sqlalchemy import select
+
+from app.database import (
+    get_async_replica_session_factory,
+    get_async_session_factory,
+    replica_configured
+)
+from app.metrics import metrics
+from app.models import Document
+
+logger = logging.getLogger(__name__)
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+RECENT_WRITES_REDIS_URL = os.getenv("RECENT_WRITES_REDIS_URL", os.getenv("REDIS_URL", "redis://redis:6379/0"))
+
+LISTING_KEY = "recent_write:listing"
+
+
+def recent_write_key(document_id: int) -> str:
+    return f"recent_write:document:{document_id}"
+
+
+class RecentWrites:
+    """
+    Short-lived "written recently" marks in Redis.
+
+    Writers (workers, upload endpoints) mark synchronously; the async read
+    path checks with its own client.
+
+    Args:
+        client: Sync Redis client (writers)
+        async_client: redis.asyncio client (readers)
+        window: Seconds a mark lives; should exceed the worst expected replica lag
+    """
+
+    def __init__(self, client=None, async_client=None, window: float = READ_YOUR_WRITES_SECONDS):
+        self.client = client
+        self.async_client = async_client
+        self.window_ms = int(window * 1000)
+
+    def mark(self, document_ids: Iterable[int], listing: bool = False) -> None:
+        """Mark documents (and optionally the listing) as just written (best effort)."""
+        if self.client is None or self.window_ms <= 0:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for document_id in document_ids:
+                pipe.set(recent_write_key(document_id), 1, px=self.window_ms)
+            if listing:
+                pipe.set(LISTING_KEY, 1, px=self.window_ms)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to mark recent writes: {e}")
+
+    async def is_recent(self, document_id: int) -> bool:
+        return await self._exists(recent_write_key(document_id))
+
+    async def listing_recent(self) -> bool:
+        return await self._exists(LISTING_KEY)
+
+    async def _exists(self, key: str) -> bool:
+        if self.async_client is None:
+            return False
+        try:
+            return bool(await self.async_client.exists(key))
+        except Exception as e:
+            # Unknown freshness: the primary is always consistent
+            logger.warning(f"Recent write check failed ({e}); reading from primary")
+            return True
+
+
+_recent_writes: Optional[RecentWrites] = None
+
+
+def get_recent_writes() -> RecentWrites:
+    """
+    Process-wide recent-write marks.
+
+    Marks are only kept when a replica is configured; otherwise every read
+    goes to the primary and no Redis round trips are made.
+    """
+    global _recent_writes
+    if _recent_writes is None:
+        if replica_configured():
+            options = {"socket_connect_timeout": 1.0, "socket_timeout": 1.0}
+            _recent_writes = RecentWrites(
+                redis.Redis.from_url(RECENT_WRITES_REDIS_URL, **options),
+                redis.asyncio.Redis.from_url(RECENT_WRITES_REDIS_URL, **options)
+            )
+        else:
+            _recent_writes = RecentWrites()
+    return _recent_writes
+
+
+async def _read_session(use_replica: bool):
+    factory = get_async_replica_session_factory() if use_replica else get_async_session_factory()
+    metrics.incr("read_routing.replica" if use_replica else "read_routing.primary")
+    async with factory() as db:
+        yield db
+
+
+async def get_document_read_db(document_id: int):
+    """Session dependency for one document's reads: replica unless the document was just written."""
+    use_replica = replica_configured() and not await get_recent_writes().is_recent(document_id)
+    async for db in _read_session(use_replica):
+        yield db
+
+
+async def get_listing_read_db():
+    """Session dependency for listings: replica unless a document was just uploaded."""
+    use_replica = replica_configured() and not await get_recent_writes().listing_recent()
+    async for db in _read_session(use_replica):
+        yield db
+
+
+async def get_document_for_read(db, document_id: int) -> Optional[Document]:
+    """
+    Load a document on a read session, falling back to the primary when the
+    replica does not have it (yet).
+    """
+    document = await db.get(Document, document_id)
+    if document is None and db.info.get("replica"):
+        metrics.incr("read_routing.replica_miss")
+        async with get_async_session_factory()() as primary:
+            document = await primary.get(Document, document_id)
+    return document
+
+
+async def get_document_version(db, document_id: int):
+    """
+    (status, updated_at) of a document, or None, with the same replica fallback.
+
+    A primary-key lookup of two columns: enough to validate cached responses
+    without loading the OCR and extraction payloads.
+    """
+    query = select(Document.status, Document.updated_at).where(Document.id == document_id)
+    version = (await db.execute(query)).first()
+    if version is None and db.info.get("replica"):
+        async with get_async_session_factory()() as primary:
+            version = (await primary.execute(query)).first()
+    return version
@@ -0,0 +1,182 @@
+"""
+Completed Document Response Cache
+
+A COMPLETED document's response never changes until the document is
+written again, yet every viewer open re-read the extraction_result JSON
+column and re-serialized it. GET /api/v1/documents/{id} now looks up the
+document's status and updated_at (a narrow primary-key read), and for
+completed documents serves the serialized JSON body from Redis:
+
+    doccache:{id}     hash {"updated_at", "body"}; a cached body is only
+                      served if its updated_at matches the row's
+    doccache:lru      sorted set id -> last access time; once it holds more
+                      than RESPONSE_CACHE_MAX_ENTRIES documents the least
+                      recently used are evicted
+    doccache:stats    hash of hit / miss / store / eviction / invalidation counts
+                      across all API processes
+
+Every write to a document (app.tasks._update_document, edit endpoints)
+invalidates its entry explicitly; the updated_at check protects against
+writes that bypass them. Cache errors never fail a request.
+"""
+import logging
+import os
+import time
+from typing import Dict, Any, Iterable, Optional
+
+import redis
+import redis.asyncio
+
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", os.getenv("REDIS_URL", "redis://redis:6379/0"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+# Larger bodies are not cached (one huge record must not evict thousands of small ones)
+RESPONSE_CACHE_MAX_BODY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+
+LRU_KEY = "doccache:lru"
+STATS_KEY = "doccache:stats"
+
+
+def cache_key(document_id: int) -> str:
+    return f"doccache:{document_id}"
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized document responses.
+
+    The API reads and fills it through async_client; workers and sync
+    endpoints invalidate through client.
+
+    Args:
+        client: Sync Redis client (invalidation)
+        async_client: redis.asyncio client (reads and fills)
+        max_entries: Documents kept before least recently used ones are evicted
+        max_body_bytes: Largest body that is cached
+        ttl: Seconds an untouched entry lives (backstop for a lost LRU entry)
+    """
+
+    def __init__(
+        self,
+        client=None,
+        async_client=None,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_body_bytes: int = RESPONSE_CACHE_MAX_BODY_BYTES,
+        ttl: int = RESPONSE_CACHE_TTL
+    ):
+        self.client = client
+        self.async_client = async_client
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self.ttl = ttl
+
+    async def get(self, document_id: int, updated_at: str) -> Optional[bytes]:
+        """Cached body for this version of the document, or None."""
+        if self.async_client is None:
+            return None
+        try:
+            pipe = self.async_client.pipeline(transaction=False)
+            pipe.hgetall(cache_key(document_id))
+            # Refresh recency only if the document is already tracked
+            pipe.zadd(LRU_KEY, {str(document_id): time.time()}, xx=True)
+            entry, _ = await pipe.execute()
+            hit = bool(entry) and entry.get(b"updated_at") == updated_at.encode("utf-8")
+            await self._count("hits" if hit else "misses")
+            return entry[b"body"] if hit else None
+        except Exception as e:
+            logger.warning(f"Response cache read failed for document {document_id}: {e}")
+            return None
+
+    async def set(self, document_id: int, updated_at: str, body: bytes) -> bool:
+        """Store a body and evict least recently used documents beyond max_entries."""
+        if self.async_client is None or len(body) > self.max_body_bytes:
+            return False
+        try:
+            key = cache_key(document_id)
+            pipe = self.async_client.pipeline(transaction=False)
+            pipe.hset(key, mapping={"updated_at": updated_at, "body": body})
+            pipe.expire(key, self.ttl)
+            pipe.zadd(LRU_KEY, {str(document_id): time.time()})
+            pipe.zcard(LRU_KEY)
+            pipe.hincrby(STATS_KEY, "stores", 1)
+            *_, size, _ = await pipe.execute()
+            metrics.incr("response_cache.stores")
+            if size > self.max_entries:
+                await self._evict(size - self.max_entries)
+            return True
+        except Exception as e:
+            logger.warning(f"Response cache write failed for document {document_id}: {e}")
+            return False
+
+    async def _evict(self, count: int) -> None:
+        evicted = await self.async_client.zpopmin(LRU_KEY, count)
+        if not evicted:
+            return
+        pipe = self.async_client.pipeline(transaction=False)
+        pipe.delete(*(cache_key(int(member)) for member, _ in evicted))
+        pipe.hincrby(STATS_KEY, "evictions", len(evicted))
+        await pipe.execute()
+        metrics.incr("response_cache.evictions", len(evicted))
+
+    def invalidate(self, document_ids: Iterable[int]) -> None:
+        """Drop cached responses of documents that were just written (best effort)."""
+        document_ids = list(document_ids)
+        if self.client is None or not document_ids:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*(cache_key(document_id) for document_id in document_ids))
+            pipe.zrem(LRU_KEY, *(str(document_id) for document_id in document_ids))
+            pipe.hincrby(STATS_KEY, "invalidations", len(document_ids))
+            pipe.execute()
+            metrics.incr("response_cache.invalidations", len(document_ids))
+        except Exception as e:
+            logger.warning(f"Response cache invalidation failed for documents {document_ids}: {e}")
+
+    async def _count(self, name: str) -> None:
+        metrics.incr(f"response_cache.{name}")
+        await self.async_client.hincrby(STATS_KEY, name, 1)
+
+    async def stats(self) -> Optional[Dict[str, Any]]:
+        """Counts across all API processes, with hit rate and current size."""
+        if self.async_client is None:
+            return None
+        try:
+            pipe = self.async_client.pipeline(transaction=False)
+            pipe.hgetall(STATS_KEY)
+            pipe.zcard(LRU_KEY)
+            raw, size = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Response cache stats unavailable: {e}")
+            return None
+        counts = {name.decode("utf-8"): int(value) for name, value in raw.items()}
+        lookups = counts.get("hits", 0) + counts.get("misses", 0)
+        return {
+            **{name: counts.get(name, 0) for name in ("hits", "misses", "stores", "evictions", "invalidations")},
+            "hit_rate": round(counts.get("hits", 0) / lookups, 4) if lookups else None,
+            "entries": size,
+            "max_entries": self.max_entries
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache (a no-op cache when RESPONSE_CACHE_ENABLED is off)."""
+    global _response_cache
+    if _response_cache is None:
+        if RESPONSE_CACHE_ENABLED:
+            options = {"socket_connect_timeout": 1.0, "socket_timeout": 1.0}
+            _response_cache = ResponseCache(
+                redis.Redis.from_url(RESPONSE_CACHE_REDIS_URL, **options),
+                redis.asyncio.Redis.from_url(RESPONSE_CACHE_REDIS_URL, **options)
+            )
+        else:
+            _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,281 @@
+"""
+Priority Lanes and Per-Tenant Fair Scheduling
+
+Documents are processed in one of two Celery queues ("lanes"):
+
+    interactive   single uploads of small documents; served by a dedicated
+                  worker pool, so time-to-result stays bounded under bulk load
+    bulk          bulk uploads and large documents
+
+Within the bulk lane, tenants share capacity by weight. Bulk documents are
+not pushed to the broker all at once (one firm's 10,000 pages would sit in
+front of everyone else's); they wait in one Redis list per tenant and a
+deficit round robin (DRR) pump releases them into the bulk queue, keeping
+it only FAIR_BULK_QUEUE_TARGET documents deep. Each visit credits a tenant
+FAIR_QUANTUM_PAGES * weight pages; a document is released once the tenant's
+credit covers its estimated page count. The pump runs after every bulk
+upload and after every bulk task finishes.
+
+Tenant weights: TENANT_WEIGHTS="firm-a=2,firm-b=0.5" (default weight 1).
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Callable, Dict, Any, List, Optional
+
+import pdfplumber
+import redis
+
+from app.metrics import get_shared_stats, metrics
+
+logger = logging.getLogger(__name__)
+
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+LANES = (LANE_INTERACTIVE, LANE_BULK)
+
+DEFAULT_TENANT = "default"
+
+# Single uploads up to this many pages use the interactive lane
+INTERACTIVE_MAX_PAGES = int(os.getenv("INTERACTIVE_MAX_PAGES", "20"))
+# Page estimate from file size when the PDF is not opened (bulk uploads)
+ESTIMATED_BYTES_PER_PAGE = int(os.getenv("ESTIMATED_BYTES_PER_PAGE", "100000"))
+
+FAIR_REDIS_URL = os.getenv("FAIR_REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0"))
+FAIR_BULK_QUEUE_TARGET = int(os.getenv("FAIR_BULK_QUEUE_TARGET", "8"))
+FAIR_QUANTUM_PAGES = int(os.getenv("FAIR_QUANTUM_PAGES", "20"))
+FAIR_LOCK_SECONDS = int(os.getenv("FAIR_LOCK_SECONDS", "30"))
+
+TENANTS_KEY = "fair:tenants"        # list: round robin order of tenants with pending documents
+ACTIVE_KEY = "fair:active"          # set: same tenants, for O(1) membership checks
+DEFICIT_KEY = "fair:deficit"        # hash: tenant -> unused page credit
+HEAD_KEY = "fair:head"              # tenant already credited for the current visit
+PENDING_KEY = "fair:pending"        # number of documents held by the scheduler
+LOCK_KEY = "fair:lock"
+
+
+def pending_key(tenant: str) -> str:
+    return f"fair:queue:{tenant}"
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse "tenant=weight,..." into a dict (malformed entries are skipped)."""
+    weights = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        try:
+            if name.strip() and float(value) > 0:
+                weights[name.strip()] = float(value)
+        except ValueError:
+            logger.warning(f"Ignoring malformed tenant weight: {item!r}")
+    return weights
+
+
+TENANT_WEIGHTS = parse_weights(os.getenv("TENANT_WEIGHTS", ""))
+
+
+def estimate_pages(file_path: str, exact: bool = True) -> int:
+    """
+    Page count of a PDF.
+
+    Args:
+        file_path: Path to the PDF
+        exact: Open the PDF to count pages; otherwise (or if it cannot be
+            parsed) estimate from the file size
+    """
+    if exact:
+        try:
+            with pdfplumber.open(file_path) as pdf:
+                return max(1, len(pdf.pages))
+        except Exception as e:
+            logger.warning(f"Could not count pages of {file_path}: {e}")
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return 1
+    return max(1, -(-size // ESTIMATED_BYTES_PER_PAGE))
+
+
+def choose_lane(page_count: int, bulk_upload: bool = False) -> str:
+    """Bulk uploads and large documents use the bulk lane, everything else is interactive."""
+    if bulk_upload or page_count > INTERACTIVE_MAX_PAGES:
+        return LANE_BULK
+    return LANE_INTERACTIVE
+
+
+def observe_lane_latency(lane: Optional[str], enqueued_at: Optional[float], stage: str) -> Optional[float]:
+    """
+    Record seconds since a document entered its lane as lane.<lane>.<stage>_seconds.
+
+    stage is "wait" when a worker picks the document up and "time_to_result"
+    when it finishes. Besides this process's registry, the latency goes to
+    the shared lane.<lane>.<stage> histogram read by GET /api/v1/lanes/stats.
+    """
+    if not lane or enqueued_at is None:
+        return None
+    seconds = max(0.0, time.time() - enqueued_at)
+    metrics.observe(f"lane.{lane}.{stage}_seconds", seconds)
+    get_shared_stats().observe(f"lane.{lane}.{stage}", seconds)
+    return seconds
+
+
+def lane_latency_stats() -> Dict[str, Dict[str, Any]]:
+    """Wait and time-to-result latencies of each lane, across all workers."""
+    stats = get_shared_stats()
+    return {
+        lane: {stage: stats.latency_summary(f"lane.{lane}.{stage}") for stage in ("wait", "time_to_result")}
+        for lane in (LANE_INTERACTIVE, LANE_BULK)
+    }
+
+
+class FairScheduler:
+    """
+    Deficit round robin over per-tenant pending lists in Redis.
+
+    Usage:
+        scheduler = FairScheduler(redis_client, dispatch=send_to_bulk_queue,
+                                  queue_depth=lambda: redis_client.llen("bulk"))
+        scheduler.enqueue("firm-a", [{"document_id": 1, "pages": 12}])
+        scheduler.pump()
+
+    Args:
+        client: Redis client
+        dispatch: Called with each released entry ({"document_id", "pages",
+            "tenant", "enqueued_at"}) to send it to the broker
+        queue_depth: Returns the current depth of the bulk broker queue
+        weights: Tenant weights (default TENANT_WEIGHTS, weight 1 otherwise)
+        quantum: Page credit per visit per unit of weight
+        target_depth: Bulk queue depth the pump fills up to
+    """
+
+    def __init__(
+        self,
+        client,
+        dispatch: Callable[[Dict[str, Any]], None],
+        queue_depth: Callable[[], int],
+        weights: Optional[Dict[str, float]] = None,
+        quantum: int = FAIR_QUANTUM_PAGES,
+        target_depth: int = FAIR_BULK_QUEUE_TARGET
+    ):
+        self.client = client
+        self.dispatch = dispatch
+        self.queue_depth = queue_depth
+        self.weights = TENANT_WEIGHTS if weights is None else weights
+        self.quantum = quantum
+        self.target_depth = target_depth
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, 1.0)
+
+    def enqueue(self, tenant: Optional[str], entries: List[Dict[str, Any]]) -> None:
+        """Hold documents for a tenant (one pipeline round trip)."""
+        if not entries:
+            return
+        tenant = tenant or DEFAULT_TENANT
+        now = time.time()
+        payloads = [
+            json.dumps({"enqueued_at": now, **entry, "tenant": tenant})
+            for entry in entries
+        ]
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(pending_key(tenant), *payloads)
+        pipe.incrby(PENDING_KEY, len(payloads))
+        pipe.sadd(ACTIVE_KEY, tenant)
+        _, _, added = pipe.execute()
+        if added:
+            # Entries are pushed before the tenant is activated, so a concurrent
+            # pump that just retired the tenant re-activates it (see _retire)
+            self.client.rpush(TENANTS_KEY, tenant)
+
+    def pending_count(self) -> int:
+        value = self.client.get(PENDING_KEY)
+        return max(0, int(value)) if value is not None else 0
+
+    def pump(self) -> List[int]:
+        """
+        Release held documents into the bulk queue until it is target_depth deep.
+
+        Only one pump runs at a time (Redis lock); a concurrent call returns
+        immediately, since the running pump fills the queue anyway.
+
+        Returns:
+            IDs of the released documents
+        """
+        token = uuid.uuid4().hex
+        if not self.client.set(LOCK_KEY, token, nx=True, ex=FAIR_LOCK_SECONDS):
+            return []
+        try:
+            return self._release(self.target_depth - self.queue_depth())
+        finally:
+            if self.client.get(LOCK_KEY) == token.encode("utf-8"):
+                self.client.delete(LOCK_KEY)
+
+    def _release(self, room: int) -> List[int]:
+        released: List[int] = []
+        while room > 0:
+            raw_tenant = self.client.lindex(TENANTS_KEY, 0)
+            if raw_tenant is None:
+                break
+            tenant = raw_tenant.decode("utf-8")
+
+            deficit = float(self.client.hget(DEFICIT_KEY, tenant) or 0)
+            if self.client.get(HEAD_KEY) != raw_tenant:
+                # New visit: credit the tenant once
+                deficit += self.quantum * self.weight(tenant)
+                self.client.set(HEAD_KEY, tenant)
+
+            while room > 0:
+                head = self.client.lindex(pending_key(tenant), 0)
+                if head is None:
+                    break
+                entry = json.loads(head)
+                cost = max(1, int(entry.get("pages") or 1))
+                if cost > deficit:
+                    break
+                self.client.lpop(pending_key(tenant))
+                self.client.decrby(PENDING_KEY, 1)
+                deficit -= cost
+                room -= 1
+                self.dispatch(entry)
+                released.append(entry["document_id"])
+                metrics.incr(f"fair.released.{tenant}")
+
+            if self.client.llen(pending_key(tenant)) == 0:
+                self._retire(tenant)
+            elif room > 0:
+                # Credit used up: keep the remainder and move to the next tenant
+                self.client.hset(DEFICIT_KEY, tenant, deficit)
+                self.client.lpop(TENANTS_KEY)
+                self.client.rpush(TENANTS_KEY, tenant)
+                self.client.delete(HEAD_KEY)
+            else:
+                # Bulk queue is full mid-visit; resume this visit on the next pump
+                self.client.hset(DEFICIT_KEY, tenant, deficit)
+
+        if released:
+            logger.info(f"Fair scheduler released {len(released)} documents to the bulk queue")
+        return released
+
+    def _retire(self, tenant: str) -> None:
+        """Drop a tenant with no pending documents (its unused credit is forfeited, as in DRR)."""
+        self.client.lpop(TENANTS_KEY)
+        self.client.delete(HEAD_KEY)
+        self.client.hdel(DEFICIT_KEY, tenant)
+        self.client.srem(ACTIVE_KEY, tenant)
+        # An enqueue may have pushed entries while the tenant was still active
+        if self.client.llen(pending_key(tenant)) and self.client.sadd(ACTIVE_KEY, tenant):
+            self.client.rpush(TENANTS_KEY, tenant)
+
+
+_scheduler: Optional[FairScheduler] = None
+
+
+def get_fair_scheduler(dispatch: Callable[[Dict[str, Any]], None]) -> FairScheduler:
+    """Process-wide scheduler over the broker's Redis (dispatch is bound on first use)."""
+    global _scheduler
+    if _scheduler is None:
+        client = redis.Redis.from_url(FAIR_REDIS_URL, socket_connect_timeout=1.0, socket_timeout=5.0)
+        _scheduler = FairScheduler(client, dispatch=dispatch, queue_depth=lambda: client.llen(LANE_BULK))
+    return _scheduler
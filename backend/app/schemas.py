@@ -51,3 +51,9 @@ class MedicalBill(BaseModel):
     invoice_number: str
     total_amount: float
     line_items: List[BillLineItem]
+
+# --- Cases ---
+
+class CaseCreate(BaseModel):
+    name: str
+    patient_name: Optional[str] = None
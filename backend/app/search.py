@@ -0,0 +1,291 @@
+"""
+Search Across Processed Documents
+
+Reviewers had no way to search OCR text or extracted codes across documents.
+When a document completes, the OCR text of each page is written to
+page_texts (one bulk INSERT per SEARCH_INDEX_BATCH pages, streamed from the
+page store) in the transaction of the final write. Postgres indexes it twice:
+
+    ix_page_texts_search     GIN over to_tsvector('english', text): word queries
+                             (stemmed, websearch syntax: "quoted phrases", -exclude, or)
+    ix_page_texts_text_trgm  GIN trigram: substring queries, codes like "K35.20"
+
+Codes and provider names are looked up in the materialized tables
+(app/materialization.py): event_diagnoses.code and line_items.cpt_code by
+exact value, events / line_items.provider by trigram ILIKE.
+
+Ranking only looks at the first SEARCH_CANDIDATES index matches, so common
+words cost the same as rare ones. Bounding boxes of page hits come from the
+page store (the hit page only); those of code and provider hits from
+source_refs. On SQLite (tests, local runs) the same queries fall back to
+unindexed LIKE.
+"""
+import logging
+import os
+import re
+from typing import Dict, Any, Iterable, List, Optional
+
+from sqlalchemy import Select, delete, func, insert, literal_column, select
+
+from app.materialization import normalize_code
+from app.models import SEARCH_CONFIG, EventDiagnosis, Event, LineItem, PageText, SourceRef, search_vector
+from app.ocr_service import page_text
+from app.page_store import OCRPageStore
+from app.verification_service import normalize_bbox
+
+logger = logging.getLogger(__name__)
+
+SEARCH_ENABLED = os.getenv("SEARCH_ENABLED", "true").lower() in ("1", "true", "yes")
+# Index matches ranked per text query (the rest are not looked at)
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "500"))
+SEARCH_INDEX_BATCH = int(os.getenv("SEARCH_INDEX_BATCH", "500"))
+SNIPPET_CHARS = 80
+
+SEARCH_KINDS = ("text", "codes", "providers")
+
+# CPT (99214), HCPCS (J1100) and ICD-10 (K35.20) codes
+_CODE = re.compile(r"^(?:\d{5}|[A-Z]\d{4}|[A-Z]\d{2}(?:\.[A-Z0-9]{1,4})?)$")
+_TERM = re.compile(r"\w[\w.]*")
+_OPERATORS = {"or", "and"}
+
+
+def is_code(query: str) -> bool:
+    return bool(_CODE.match(normalize_code(query) or ""))
+
+
+def query_terms(query: str) -> List[str]:
+    """Lower-cased words of a query (websearch operators and excluded words dropped)."""
+    terms = []
+    for token in query.split():
+        if token.startswith("-"):
+            continue
+        terms.extend(term.rstrip(".") for term in _TERM.findall(token.lower()) if term not in _OPERATORS)
+    return [term for term in terms if term]
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+# --- Indexing ---
+
+def clear_document_pages(db, document_id: int) -> None:
+    """Drop a document's pages from the search index (not committed)."""
+    db.execute(delete(PageText).where(PageText.document_id == document_id))
+
+
+def index_document_pages(db, document_id: int, pages: Iterable[Dict[str, Any]], batch_size: int = SEARCH_INDEX_BATCH) -> int:
+    """
+    Replace a document's indexed pages with the OCR text of pages.
+
+    Pages are read one at a time (pass the page store) and inserted in
+    batches; the caller commits with the document's final write.
+
+    Returns:
+        Number of pages indexed (blank pages are skipped)
+    """
+    clear_document_pages(db, document_id)
+    batch: List[Dict[str, Any]] = []
+    indexed = 0
+    for page in pages:
+        text = page_text(page)
+        if not text.strip():
+            continue
+        batch.append({"document_id": document_id, "page_number": page["page_number"], "text": text})
+        if len(batch) >= batch_size:
+            db.execute(insert(PageText.__table__), batch)
+            indexed += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(PageText.__table__), batch)
+        indexed += len(batch)
+    logger.info(f"Indexed {indexed} pages of document {document_id} for search")
+    return indexed
+
+
+# --- Queries ---
+
+def page_text_query(
+    query: str,
+    dialect: str,
+    document_id: Optional[int] = None,
+    limit: int = 20,
+    candidates: int = SEARCH_CANDIDATES
+) -> Optional[Select]:
+    """
+    Pages matching query: (document_id, page_number, text) rows, best first.
+
+    Word queries use the full-text index on Postgres; codes, and every query
+    on other databases, match substrings (the trigram index on Postgres).
+    Returns None for a query without searchable terms.
+    """
+    code = is_code(query)
+    if dialect == "postgresql" and not code:
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query)
+        matches = select(PageText.document_id, PageText.page_number, PageText.text).where(
+            search_vector(PageText.text).op("@@")(tsquery)
+        )
+        if document_id is not None:
+            matches = matches.where(PageText.document_id == document_id)
+        matches = matches.limit(candidates).subquery()
+        rank = func.ts_rank(search_vector(matches.c.text), tsquery)
+        return (
+            select(matches.c.document_id, matches.c.page_number, matches.c.text)
+            .order_by(rank.desc(), matches.c.document_id.desc(), matches.c.page_number)
+            .limit(limit)
+        )
+
+    terms = [normalize_code(query)] if code else query_terms(query)
+    if not terms:
+        return None
+    statement = select(PageText.document_id, PageText.page_number, PageText.text)
+    for term in terms:
+        statement = statement.where(PageText.text.ilike(_like_pattern(term), escape="\\"))
+    if document_id is not None:
+        statement = statement.where(PageText.document_id == document_id)
+    return statement.order_by(PageText.document_id.desc(), PageText.page_number).limit(limit)
+
+
+def code_query(query: str, document_id: Optional[int] = None, limit: int = 20) -> List[Select]:
+    """
+    Events with the ICD-10 code and line items with the CPT code `query`:
+    (kind, document_id, owner_id, value) rows.
+    """
+    code = normalize_code(query)
+    statements = [
+        select(
+            literal_column("'icd_code'").label("kind"),
+            EventDiagnosis.document_id, EventDiagnosis.event_id.label("owner_id"), EventDiagnosis.code.label("value")
+        ).where(EventDiagnosis.code == code),
+        select(
+            literal_column("'cpt_code'").label("kind"),
+            LineItem.document_id, LineItem.id.label("owner_id"), LineItem.cpt_code.label("value")
+        ).where(LineItem.cpt_code == code)
+    ]
+    return [_scoped(statement, statement.selected_columns.document_id, document_id, limit) for statement in statements]
+
+
+def provider_query(query: str, document_id: Optional[int] = None, limit: int = 20) -> List[Select]:
+    """
+    Providers whose name contains `query`: one (kind, document_id, owner_id,
+    value) row per document and provider, owner_id being its first event / line item.
+    """
+    pattern = _like_pattern(query.strip())
+    statements = [
+        select(
+            literal_column("'provider'").label("kind"),
+            Event.document_id, func.min(Event.id).label("owner_id"), Event.provider.label("value")
+        ).where(Event.provider.ilike(pattern, escape="\\")).group_by(Event.document_id, Event.provider),
+        select(
+            literal_column("'billing_provider'").label("kind"),
+            LineItem.document_id, func.min(LineItem.id).label("owner_id"), LineItem.provider.label("value")
+        ).where(LineItem.provider.ilike(pattern, escape="\\")).group_by(LineItem.document_id, LineItem.provider)
+    ]
+    return [_scoped(statement, statement.selected_columns.document_id, document_id, limit) for statement in statements]
+
+
+def _scoped(statement, document_column, document_id, limit):
+    if document_id is not None:
+        statement = statement.where(document_column == document_id)
+    return statement.order_by(document_column.desc()).limit(limit)
+
+
+def owner_refs_query(rows) -> Optional[Select]:
+    """Source refs of the events / line items of code and provider hit rows."""
+    event_ids = [row.owner_id for row in rows if row.kind in ("icd_code", "provider")]
+    item_ids = [row.owner_id for row in rows if row.kind in ("cpt_code", "billing_provider")]
+    if not event_ids and not item_ids:
+        return None
+    return select(SourceRef).where(
+        SourceRef.event_id.in_(event_ids) | SourceRef.line_item_id.in_(item_ids)
+    ).order_by(SourceRef.id)
+
+
+# --- Hits ---
+
+# source_refs.field of the extracted value each hit kind matched
+_REF_FIELDS = {"icd_code": "diagnosis_code", "cpt_code": "code", "provider": "provider", "billing_provider": "provider"}
+
+
+def _word_key(text: str) -> str:
+    return text.lower().strip(",;:()[]\"'").rstrip(".")
+
+
+def word_boxes(page: Optional[Dict[str, Any]], terms: List[str]) -> List[Dict[str, float]]:
+    """Bounding boxes of the words of a page matching a term (whole word, or prefix for terms of 4+ characters)."""
+    if not page or not terms:
+        return []
+    boxes = []
+    for word in page.get("words", []):
+        key = _word_key(word.get("text", ""))
+        if not key or "bounding_box" not in word:
+            continue
+        if any(key == term or (len(term) >= 4 and key.startswith(term)) for term in terms):
+            boxes.append(normalize_bbox(word["bounding_box"], page))
+    return boxes
+
+
+def snippet(text: str, terms: List[str], width: int = SNIPPET_CHARS) -> str:
+    """Text around the first occurrence of any term."""
+    lowered = text.lower()
+    positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+    if not positions:
+        return text[:2 * width]
+    start = max(0, min(positions) - width)
+    end = min(len(text), min(positions) + width)
+    return ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
+
+
+def load_hit_pages(rows) -> List[Optional[Dict[str, Any]]]:
+    """OCR page (words and boxes) of each page hit row, read from the page store (blocking IO)."""
+    stores: Dict[int, OCRPageStore] = {}
+    pages = []
+    for row in rows:
+        store = stores.setdefault(row.document_id, OCRPageStore.for_document(row.document_id))
+        pages.append(store.get_page(row.page_number) if store.exists() else None)
+    return pages
+
+
+def hit_terms(query: str) -> List[str]:
+    """Terms whose words are boxed on page hits."""
+    return [normalize_code(query).lower()] if is_code(query) else query_terms(query)
+
+
+def page_hit(row, page: Optional[Dict[str, Any]], terms: List[str]) -> Dict[str, Any]:
+    return {
+        "kind": "text",
+        "document_id": row.document_id,
+        "page_number": row.page_number,
+        "snippet": snippet(row.text, terms),
+        "bounding_boxes": word_boxes(page, terms)
+    }
+
+
+def owner_hits(rows, refs: Iterable[SourceRef]) -> List[Dict[str, Any]]:
+    """Code / provider hits, located on the page of the first source ref of the matched value."""
+    by_owner: Dict[tuple, List[SourceRef]] = {}
+    for ref in refs:
+        owner = ("event", ref.event_id) if ref.event_id is not None else ("line_item", ref.line_item_id)
+        by_owner.setdefault(owner, []).append(ref)
+
+    hits = []
+    for row in rows:
+        owner = "event" if row.kind in ("icd_code", "provider") else "line_item"
+        candidates = [ref for ref in by_owner.get((owner, row.owner_id), []) if ref.field == _REF_FIELDS[row.kind]]
+        if row.kind == "icd_code":
+            # An event has one diagnosis_code ref per code
+            candidates = [ref for ref in candidates if normalize_code(ref.matched_text) == row.value] or candidates
+        page_number = candidates[0].page_number if candidates else None
+        hits.append({
+            "kind": row.kind,
+            "document_id": row.document_id,
+            f"{owner}_id": row.owner_id,
+            "value": row.value,
+            "page_number": page_number,
+            "bounding_boxes": [
+                {"left": ref.left, "top": ref.top, "width": ref.width, "height": ref.height}
+                for ref in candidates if ref.page_number == page_number
+            ]
+        })
+    return hits
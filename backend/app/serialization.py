@@ -0,0 +1,60 @@
+"""
+Document Response Serialization
+
+The GET /api/v1/documents/{id} response is built in one place and encoded
+with orjson (several times faster than the stdlib encoder on large nested
+extraction results, and it emits bytes directly). When a document
+completes, process_document stores its final response body pre-encoded in
+documents.response_body; the API sends those bytes as they are, without
+loading the JSON columns into Python objects or re-encoding them.
+
+Benchmark: benchmarks/bench_serialization.py
+"""
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import orjson
+
+from app.models import DocumentStatus, DocumentType
+
+
+def encode_json(value: Any) -> bytes:
+    """Compact UTF-8 JSON bytes (same output as FastAPI's JSONResponse for API payloads)."""
+    return orjson.dumps(value)
+
+
+def document_response(
+    document_id: int,
+    filename: str,
+    status: DocumentStatus,
+    created_at: datetime,
+    updated_at: datetime,
+    document_type: Optional[DocumentType] = None,
+    extraction_result: Optional[Dict[str, Any]] = None,
+    ocr_result: Optional[str] = None
+) -> Dict[str, Any]:
+    """The GET /api/v1/documents/{id} payload from a document's column values."""
+    return {
+        "document_id": document_id,
+        "filename": filename,
+        "status": status.value,
+        "created_at": created_at.isoformat(),
+        "updated_at": updated_at.isoformat(),
+        "document_type": document_type.value if document_type else None,
+        "extraction_result": extraction_result,
+        "ocr_result": ocr_result
+    }
+
+
+def document_row_response(document) -> Dict[str, Any]:
+    """The GET /api/v1/documents/{id} payload of a loaded Document row."""
+    return document_response(
+        document.id,
+        document.filename,
+        document.status,
+        document.created_at,
+        document.updated_at,
+        document.document_type,
+        document.extraction_result,
+        document.ocr_result
+    )
@@ -0,0 +1,165 @@
+"""
+Intermediate Pipeline State
+
+While a document is processing, its stage ("ocr", "classifying",
+"extracting", ...), OCR summary, classification and partial extraction
+results change several times. Writing each change to the documents table
+rewrites the row (WAL volume, lock time); instead they go to a Redis hash
+per document, and the documents row is written a fixed number of times:
+
+    1. status = PROCESSING
+    2. final: status, document_type, ocr_result, extraction_result (one UPDATE)
+
+GET /api/v1/documents/{id} merges the stage state into the response while
+the document is in flight. Stage state is best effort: if Redis is down the
+pipeline still completes, clients just see less intermediate progress.
+
+Backends (STAGE_STATE_BACKEND): "redis" (default), "memory" (single
+process, e.g. tests), "none".
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+STAGE_STATE_BACKEND = os.getenv("STAGE_STATE_BACKEND", "redis")
+STAGE_STATE_REDIS_URL = os.getenv("STAGE_STATE_REDIS_URL", os.getenv("REDIS_URL", "redis://redis:6379/0"))
+STAGE_STATE_TTL = int(os.getenv("STAGE_STATE_TTL", str(24 * 3600)))
+
+
+def stage_key(document_id: int) -> str:
+    return f"docstage:{document_id}"
+
+
+class RedisStageStore:
+    """One Redis hash per document; each field holds a JSON value."""
+
+    def __init__(self, url: str = STAGE_STATE_REDIS_URL, ttl: int = STAGE_STATE_TTL):
+        # Short timeouts: a slow Redis must not stall the pipeline for best-effort state
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=1.0, socket_timeout=1.0)
+        self.ttl = ttl
+
+    def update(self, document_id: int, fields: Dict[str, Any]) -> None:
+        key = stage_key(document_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(key, mapping={name: json.dumps(value) for name, value in fields.items()})
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def get(self, document_id: int) -> Dict[str, Any]:
+        raw = self.client.hgetall(stage_key(document_id))
+        return {name.decode("utf-8"): json.loads(value) for name, value in raw.items()}
+
+    def clear(self, document_id: int) -> None:
+        self.client.delete(stage_key(document_id))
+
+
+class MemoryStageStore:
+    """In-process stage store (tests, single-process deployments)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[int, Dict[str, Any]] = {}
+
+    def update(self, document_id: int, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            # Round-trip through JSON like Redis, so callers never share mutable state
+            self._states.setdefault(document_id, {}).update(json.loads(json.dumps(fields)))
+
+    def get(self, document_id: int) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._states.get(document_id, {}))
+
+    def clear(self, document_id: int) -> None:
+        with self._lock:
+            self._states.pop(document_id, None)
+
+
+class StageState:
+    """
+    Best-effort facade over a stage store; store errors are logged, never raised.
+
+    Usage:
+        stage_state.set_stage(document_id, "extracting", document_type="BILL")
+        stage_state.get(document_id)  # {"stage": "extracting", "stage_at": ..., "document_type": "BILL"}
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+
+    def set_stage(self, document_id: int, stage: str, **fields) -> None:
+        self.update(document_id, stage=stage, stage_at=time.time(), **fields)
+
+    def update(self, document_id: int, **fields) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.update(document_id, fields)
+        except Exception as e:
+            logger.warning(f"Stage state write failed for document {document_id}: {e}")
+
+    def get(self, document_id: int) -> Dict[str, Any]:
+        if self.store is None:
+            return {}
+        try:
+            return self.store.get(document_id)
+        except Exception as e:
+            logger.warning(f"Stage state read failed for document {document_id}: {e}")
+            return {}
+
+    def clear(self, document_id: int) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.clear(document_id)
+        except Exception as e:
+            logger.warning(f"Stage state cleanup failed for document {document_id}: {e}")
+
+
+def create_stage_state(backend: str = STAGE_STATE_BACKEND) -> StageState:
+    """
+    Build the stage state for the configured backend.
+
+    Args:
+        backend: "redis", "memory" or "none"
+    """
+    if backend == "none":
+        return StageState(None)
+    if backend == "memory":
+        return StageState(MemoryStageStore())
+    if backend == "redis":
+        return StageState(RedisStageStore())
+    raise ValueError(f"Unknown stage state backend: {backend}")
+
+
+def merge_stage_state(response: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in-flight fields of a document response from its stage state."""
+    if not state:
+        return response
+    response["stage"] = state.get("stage")
+    if state.get("error"):
+        response["error"] = state["error"]
+    if response.get("document_type") is None:
+        response["document_type"] = state.get("document_type")
+    if response.get("ocr_result") is None and state.get("ocr"):
+        response["ocr_result"] = json.dumps({**state["ocr"], "dedup": state.get("dedup")})
+    if response.get("extraction_result") is None:
+        response["extraction_result"] = state.get("partial_result")
+    return response
+
+
+_stage_state: Optional[StageState] = None
+
+
+def get_stage_state() -> StageState:
+    """Process-wide stage state (the Redis client pools its connections)."""
+    global _stage_state
+    if _stage_state is None:
+        _stage_state = create_stage_state()
+    return _stage_state
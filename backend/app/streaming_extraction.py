@@ -0,0 +1,88 @@
+"""
+Streaming Extraction
+
+Runs structured extraction over the LLM token stream instead of waiting for
+the complete reply. Each chronology event / bill line item is parsed as soon
+as its JSON object closes, linked to its OCR source locations and handed to
+a callback, so the first verified item is available after the first item is
+generated rather than after the whole document.
+
+The final result is identical to extract_* followed by link_verification.
+"""
+import json
+import logging
+import os
+from typing import Dict, Any, Callable, List, Optional
+
+from app.json_stream import IncrementalItemParser
+from app.verification_service import VerificationLinker
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between persisting partial results while streaming
+STREAM_FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL", "1.0"))
+
+# document type -> (stream method, fallback method, item array key)
+STREAM_OPERATIONS = {
+    "CHRONOLOGY": ("stream_chronology", "extract_chronology", "events"),
+    "BILL": ("stream_bill", "extract_bill", "line_items"),
+}
+
+
+def supports_streaming(llm_service) -> bool:
+    """True if the service (or the service wrapped by a cache) can stream replies."""
+    inner = getattr(llm_service, "llm_service", llm_service)
+    return hasattr(inner, "stream_chronology") and hasattr(inner, "stream_bill")
+
+
+def stream_extract(
+    llm_service,
+    document_type: str,
+    ocr_text: str,
+    ocr_map: Dict[str, Any],
+    file_id: Optional[str] = None,
+    on_item: Optional[Callable[[Dict[str, Any], List[Dict[str, Any]]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Extract and link a document while the LLM reply streams in.
+
+    Args:
+        llm_service: Service providing stream_chronology / stream_bill
+        document_type: "CHRONOLOGY" or "BILL"
+        ocr_text: Text sent to the LLM
+        ocr_map: OCR output passed to the verification linker
+        file_id: ID of the source file (optional)
+        on_item: Called as on_item(item, items_so_far) for every linked item
+
+    Returns:
+        Enriched extraction result with source_refs and _match_summary
+    """
+    stream_method, extract_method, array_key = STREAM_OPERATIONS[document_type]
+    if supports_streaming(llm_service):
+        fragments = getattr(llm_service, stream_method)(ocr_text)
+    else:
+        # Blocking services still go through the same parse-and-link path
+        fragments = iter([json.dumps(getattr(llm_service, extract_method)(ocr_text))])
+
+    linker = VerificationLinker()
+    link_item = linker.link_event if array_key == "events" else linker.link_line_item
+    parser = IncrementalItemParser(array_key)
+    items = []
+
+    for fragment in fragments:
+        for item in parser.feed(fragment):
+            link_item(item, ocr_map, file_id)
+            items.append(item)
+            if on_item:
+                on_item(item, items)
+
+    result = parser.finish()
+    result[array_key] = items
+    if array_key == "events":
+        linker.link_chronology_header(result, ocr_map, file_id)
+    else:
+        linker.link_bill_header(result, ocr_map, file_id)
+    result["_match_summary"] = linker.match_summary()
+
+    logger.info(f"Streamed and linked {len(items)} {array_key}: {result['_match_summary']}")
+    return result
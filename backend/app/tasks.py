@@ -1,26 +1,70 @@
+import heapq
 import json
+import os
+import time
+from datetime import datetime
+from sqlalchemy import update
 from app.celery_app import celery_app
 from app.database import SessionLocal
 from app.models import Document, DocumentStatus, DocumentType
-from app.ocr_service import MockOCRService
-from app.llm_service import MockLLMService
+from app.dedup import DedupIndex, DEDUP_ENABLED, strip_links
+from app.ocr_service import page_text, DocumentJobOCRBackend
+from app.page_store import OCRPageStore
+from app.pdf_text_service import iter_document_pages, split_text_layer
+from app.text_compaction import TextCompactor, TEXT_COMPACTION_ENABLED
+from app.worker_resources import get_worker_resources
+from app.stage_state import get_stage_state
+from app.read_routing import get_recent_writes
+from app.response_cache import get_response_cache
+from app.serialization import document_response, encode_json
+from app.admission import get_admission
+from app.scheduling import LANE_BULK, get_fair_scheduler, observe_lane_latency
+from app.chunked_extraction import ChunkedExtractor, split_into_chunks
+from app.streaming_extraction import stream_extract, STREAM_FLUSH_INTERVAL, STREAM_OPERATIONS
 from app.verification_service import link_verification
+from app.materialization import MATERIALIZATION_ENABLED, replace_document_rows
+from app.search import SEARCH_ENABLED, clear_document_pages, index_document_pages
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Backoff for polling document-level OCR jobs
+OCR_POLL_INITIAL_DELAY = float(os.getenv("OCR_POLL_INITIAL_DELAY", "2"))
+OCR_POLL_MAX_DELAY = float(os.getenv("OCR_POLL_MAX_DELAY", "30"))
+OCR_POLL_TIMEOUT = float(os.getenv("OCR_POLL_TIMEOUT", "1800"))
+
+
+def next_poll_delay(attempt: int) -> float:
+    """Exponential backoff between OCR job polls, capped at OCR_POLL_MAX_DELAY."""
+    return min(OCR_POLL_MAX_DELAY, OCR_POLL_INITIAL_DELAY * (2 ** attempt))
+
+
+def _lane_options(lane):
+    """apply_async options keeping follow-up tasks in the document's lane."""
+    return {"queue": lane} if lane else {}
+
+
 @celery_app.task(name="app.tasks.process_document")
-def process_document(document_id: int):
+def process_document(document_id: int, lane: str = None, enqueued_at: float = None):
     """
     Process a document through the full pipeline:
     1. OCR extraction
     2. Document classification (CHRONOLOGY or BILL)
     3. Structured data extraction
     
+    With a document-level job OCR backend, OCR is handed off to the
+    submit_ocr / poll_ocr_job tasks and this task returns immediately.
+    
     Args:
         document_id: ID of the document to process
+        lane: Queue lane the document was sent to ("interactive" or "bulk")
+        enqueued_at: Unix time the document entered its lane (for lane latency metrics)
     """
     db = SessionLocal()
+    document = None
+    started = time.perf_counter()
+    occupied_slot = True
+    wait_seconds = observe_lane_latency(lane, enqueued_at, "wait")
     try:
         # Fetch the document
         document = db.query(Document).filter(Document.id == document_id).first()
@@ -31,50 +75,398 @@ def process_document(document_id: int):
         
         logger.info(f"Processing document {document_id}: {document.filename}")
         
-        # Update status to PROCESSING
-        document.status = DocumentStatus.PROCESSING
-        db.commit()
+        # Update status to PROCESSING (write 1 of 2 to the documents row)
+        _update_document(db, document_id, status=DocumentStatus.PROCESSING, response_body=None)
+        get_stage_state().set_stage(document_id, "ocr")
         
-        # Step 1: Run Mock OCR
-        ocr_service = MockOCRService()
-        logger.info(f"Step 1/3: Running Mock OCR on {document.file_path}...")
-        ocr_result = ocr_service.process_document(document.file_path)
+        # Long-lived per-process services (connection pools, warm caches)
+        resources = get_worker_resources()
+        if isinstance(resources.ocr_backend, DocumentJobOCRBackend):
+            occupied_slot = False
+            submit_ocr.apply_async(args=[document_id, lane], **_lane_options(lane))
+            return {"status": "ocr_submitted", "document_id": document_id}
         
-        logger.info(f"Mock OCR completed for document {document_id}")
+        # Step 1: Read the PDF text layer, running OCR only on image-only
+        # pages (concurrently), and stream pages straight to the page store
+        logger.info(f"Step 1/3: Extracting text / running OCR on {document.file_path}...")
         
-        # Store OCR result
-        document.ocr_result = json.dumps(ocr_result)
-        db.commit()
+        page_store, page_texts, ocr_summary = _ingest_pages(
+            document, iter_document_pages(document.file_path, resources.page_executor)
+        )
         
-        # Extract text from OCR result for LLM processing
-        # Concatenate all word text from all pages
-        ocr_text = ""
-        for page in ocr_result.get("pages", []):
-            words = page.get("words", [])
-            page_text = " ".join([word["text"] for word in words])
-            ocr_text += page_text + "\n"
+        result = _extract_and_link(db, document, page_store, page_texts, ocr_summary)
+        if lane:
+            result["lane"] = {
+                "name": lane,
+                "wait_seconds": round(wait_seconds, 3) if wait_seconds is not None else None,
+                "time_to_result_seconds": observe_lane_latency(lane, enqueued_at, "time_to_result")
+            }
+        return result
+    
+    except Exception as e:
+        return _fail_document(db, document, document_id, e)
+    
+    finally:
+        db.close()
+        if document is not None and occupied_slot:
+            # Feeds the API's queue drain estimate (admission control)
+            get_admission().record_task_seconds(time.perf_counter() - started)
+        if lane == LANE_BULK:
+            # A bulk slot is free: release the next tenant's document
+            _pump_bulk_lane()
+
+
+def enqueue_document(document_id: int, lane: str, tenant_id: str = None, pages: int = 1):
+    """
+    Send one document to its lane: straight to the interactive queue, or
+    through the fair scheduler for the bulk lane.
+    """
+    if lane == LANE_BULK:
+        return dispatch_documents([{"document_id": document_id, "pages": pages}], tenant_id)
+    return process_document.apply_async(
+        args=[document_id],
+        kwargs={"lane": lane, "enqueued_at": time.time()},
+        **_lane_options(lane)
+    )
+
+
+def dispatch_documents(entries, tenant_id=None):
+    """
+    Hand documents to the bulk lane's fair scheduler and top up the bulk queue.
+    
+    All entries are held with one Redis pipeline; the scheduler releases
+    them into the bulk queue interleaved with other tenants' documents.
+    
+    Args:
+        entries: {"document_id", "pages"} dicts of QUEUED documents
+        tenant_id: Tenant the documents belong to (default tenant if None)
+    """
+    if not entries:
+        return []
+    scheduler = get_fair_scheduler(_release_to_bulk_queue)
+    scheduler.enqueue(tenant_id, entries)
+    return scheduler.pump()
+
+
+def _release_to_bulk_queue(entry):
+    process_document.apply_async(
+        args=[entry["document_id"]],
+        kwargs={"lane": LANE_BULK, "enqueued_at": entry["enqueued_at"]},
+        **_lane_options(LANE_BULK)
+    )
+
+
+def _pump_bulk_lane():
+    try:
+        get_fair_scheduler(_release_to_bulk_queue).pump()
+    except Exception as e:
+        # The next upload or finished bulk task pumps again
+        logger.warning(f"Fair scheduler pump failed: {e}")
+
+
+@celery_app.task(name="app.tasks.submit_ocr")
+def submit_ocr(document_id: int, lane: str = None):
+    """
+    Submit a document to a job-based OCR service and schedule polling.
+    
+    Text-layer pages are extracted locally first; only image-only pages are
+    submitted. The worker slot is released as soon as the job is accepted.
+    
+    Args:
+        document_id: ID of the document to process
+        lane: Queue lane of the document (polls stay in the same lane)
+    """
+    db = SessionLocal()
+    document = None
+    started = time.perf_counter()
+    try:
+        document = db.query(Document).filter(Document.id == document_id).first()
         
-        logger.info(f"Extracted {len(ocr_text)} characters of text from OCR")
+        if not document:
+            logger.error(f"Document {document_id} not found")
+            return {"status": "error", "message": "Document not found"}
         
-        # Step 2: Classify document type
-        llm_service = MockLLMService()
-        logger.info(f"Step 2/3: Classifying document type...")
+        text_store = OCRPageStore.for_document(document.id, variant="text")
+        with text_store.open_for_write():
+            ocr_page_numbers = split_text_layer(document.file_path, text_store)
         
-        doc_type_str = llm_service.classify_document(ocr_text)
-        document.document_type = DocumentType[doc_type_str]
-        db.commit()
+        if ocr_page_numbers == []:
+            # Fully born-digital: nothing to OCR
+            return _complete_from_job(db, document, text_store, job_pages=iter(()))
         
-        logger.info(f"Document {document_id} classified as: {doc_type_str}")
+        job_id = get_worker_resources().ocr_backend.submit_document(document.file_path, ocr_page_numbers)
+        logger.info(f"Submitted OCR job {job_id} for document {document_id}")
         
-        # Step 3: Extract structured data based on document type
-        logger.info(f"Step 3/4: Extracting structured data for {doc_type_str}...")
+        poll_ocr_job.apply_async(
+            args=[document_id, job_id, 0, time.time(), lane],
+            countdown=next_poll_delay(0),
+            **_lane_options(lane)
+        )
+        return {"status": "ocr_submitted", "document_id": document_id, "job_id": job_id}
+    
+    except Exception as e:
+        return _fail_document(db, document, document_id, e)
+    
+    finally:
+        db.close()
+        if document is not None:
+            # Short tasks, but they occupy worker slots like any other (admission control)
+            get_admission().record_task_seconds(time.perf_counter() - started)
+
+
+@celery_app.task(name="app.tasks.poll_ocr_job")
+def poll_ocr_job(document_id: int, job_id: str, attempt: int, submitted_at: float, lane: str = None):
+    """
+    Check an OCR job once; re-enqueue with backoff while it is still running.
+    
+    Each poll is a short task, so a worker slot is only occupied while work
+    is actually being done. Once the job succeeds, its pages are merged with
+    the text-layer pages and the rest of the pipeline runs.
+    
+    Args:
+        document_id: ID of the document being processed
+        job_id: OCR service job ID
+        attempt: Number of polls already made
+        submitted_at: Unix time the job was submitted
+        lane: Queue lane of the document
+    """
+    db = SessionLocal()
+    document = None
+    started = time.perf_counter()
+    try:
+        document = db.query(Document).filter(Document.id == document_id).first()
+        
+        if not document:
+            logger.error(f"Document {document_id} not found")
+            return {"status": "error", "message": "Document not found"}
+        
+        ocr_backend = get_worker_resources().ocr_backend
+        status = ocr_backend.get_job_status(job_id)
+        
+        if status == "IN_PROGRESS":
+            if time.time() - submitted_at > OCR_POLL_TIMEOUT:
+                raise TimeoutError(f"OCR job {job_id} did not finish within {OCR_POLL_TIMEOUT}s")
+            
+            delay = next_poll_delay(attempt + 1)
+            poll_ocr_job.apply_async(
+                args=[document_id, job_id, attempt + 1, submitted_at, lane],
+                countdown=delay,
+                **_lane_options(lane)
+            )
+            return {"status": "ocr_pending", "document_id": document_id, "next_poll_in": delay}
         
-        if document.document_type == DocumentType.CHRONOLOGY:
-            extraction_result = llm_service.extract_chronology(ocr_text)
-        elif document.document_type == DocumentType.BILL:
-            extraction_result = llm_service.extract_bill(ocr_text)
-        else:
-            raise ValueError(f"Unknown document type: {document.document_type}")
+        if status != "SUCCEEDED":
+            raise RuntimeError(f"OCR job {job_id} ended with status {status}")
+        
+        logger.info(f"OCR job {job_id} for document {document_id} succeeded after {attempt + 1} polls")
+        
+        text_store = OCRPageStore.for_document(document.id, variant="text")
+        return _complete_from_job(db, document, text_store, ocr_backend.iter_job_pages(job_id))
+    
+    except Exception as e:
+        return _fail_document(db, document, document_id, e)
+    
+    finally:
+        db.close()
+        if document is not None:
+            get_admission().record_task_seconds(time.perf_counter() - started)
+
+
+def _complete_from_job(db, document, text_store, job_pages):
+    """Merge text-layer and OCR job pages in page order, then finish the pipeline."""
+    merged_pages = heapq.merge(
+        iter(text_store) if text_store.exists() else iter(()),
+        ({**page, "source": page.get("source", "ocr")} for page in job_pages),
+        key=lambda page: page["page_number"]
+    )
+    page_store, page_texts, ocr_summary = _ingest_pages(document, merged_pages)
+    return _extract_and_link(db, document, page_store, page_texts, ocr_summary)
+
+
+def _ingest_pages(document, pages):
+    """
+    Stream pages into the document's page store and build the LLM input.
+    
+    Only the current page is held in memory; the OCR result as a whole is
+    never materialized. The LLM input is compacted (boilerplate and noise
+    removed) unless TEXT_COMPACTION_ENABLED is off.
+    
+    Returns:
+        (page_store, page_texts, ocr_summary); the summary is persisted as
+        ocr_result with the final document write
+    """
+    page_store = OCRPageStore.for_document(document.id)
+    page_texts = []
+    compactor = TextCompactor() if TEXT_COMPACTION_ENABLED else None
+    words_extracted = 0
+    text_layer_pages = 0
+    with page_store.open_for_write():
+        for page in pages:
+            page_store.append(page)
+            if compactor:
+                compactor.add_page(page)
+            else:
+                page_texts.append(page_text(page))
+            words_extracted += len(page.get("words", []))
+            if page.get("source") == "text_layer":
+                text_layer_pages += 1
+    
+    logger.info(f"OCR completed for document {document.id}")
+    
+    # Compact OCR summary; pages are served from the page store
+    ocr_summary = {
+        "status": "SUCCESS",
+        "page_count": len(page_store),
+        "word_count": words_extracted,
+        "text_layer_pages": text_layer_pages,
+        "page_store": str(page_store.path),
+        "processed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "file_path": document.file_path
+    }
+    if compactor:
+        page_texts = compactor.compact()
+        ocr_summary["compaction"] = compactor.stats
+    
+    get_stage_state().set_stage(document.id, "ocr_complete", ocr=ocr_summary)
+    
+    return page_store, page_texts, ocr_summary
+
+
+def _extract_and_link(db, document, page_store, page_texts, ocr_summary):
+    """
+    Classify, extract and link a document whose pages are in the page store.
+    
+    Intermediate progress goes to the stage state; the documents row is
+    written once at the end (status, type, OCR summary and result together).
+    """
+    document_id = document.id
+    filename = document.filename
+    created_at = document.created_at
+    case_id = document.case_id
+    stage_state = get_stage_state()
+    resources = get_worker_resources()
+    worker_stats = resources.record_task()
+    
+    # Near-duplicate pages are skipped; near-duplicate documents reuse an earlier extraction
+    dedup_report = None
+    duplicate_of = None
+    if DEDUP_ENABLED:
+        dedup_report, page_texts = DedupIndex(db, hasher=resources.min_hasher).process_document(document, page_texts)
+        # Commits only the page signature index, not the documents row
+        db.commit()
+        ocr_summary["dedup"] = dedup_report
+        stage_state.set_stage(document_id, "dedup_complete", dedup=dedup_report)
+        if dedup_report["duplicate_of_document"]:
+            duplicate_of = db.query(Document).filter(Document.id == dedup_report["duplicate_of_document"]).first()
+    
+    if duplicate_of is not None:
+        logger.info(f"Document {document_id} duplicates document {duplicate_of.id}; reusing its extraction")
+        doc_type_str = duplicate_of.document_type.value
+        classification = {"method": "duplicate"}
+        enriched_result = link_verification(
+            extracted_json=strip_links(duplicate_of.extraction_result),
+            ocr_map={"pages": page_store},
+            file_id=str(document.id)
+        )
+    else:
+        doc_type_str, classification, enriched_result = _classify_and_extract(
+            db, document, page_store, page_texts, resources
+        )
+    
+    logger.info(f"Verification linkage completed: {enriched_result.get('_match_summary', {})}")
+    
+    # The API response body is encoded once here and served as-is afterwards
+    document_type = DocumentType[doc_type_str]
+    ocr_result = json.dumps(ocr_summary)
+    completed_at = datetime.utcnow()
+    response_body = encode_json(document_response(
+        document_id, filename, DocumentStatus.COMPLETED, created_at, completed_at,
+        document_type, enriched_result, ocr_result
+    ))
+    
+    # Queryable events / line items, case timeline and searchable page text, committed with the final write
+    if MATERIALIZATION_ENABLED:
+        replace_document_rows(db, document_id, case_id, document_type, enriched_result)
+    if SEARCH_ENABLED:
+        index_document_pages(db, document_id, page_store)
+    
+    # Store everything and mark as COMPLETED (write 2 of 2 to the documents row)
+    _update_document(
+        db,
+        document_id,
+        status=DocumentStatus.COMPLETED,
+        document_type=document_type,
+        ocr_result=ocr_result,
+        extraction_result=enriched_result,
+        response_body=response_body,
+        updated_at=completed_at,
+        dedup_indexed_pages=dedup_report["indexed_pages"] if dedup_report else None,
+        dedup_duplicate_pages=(
+            dedup_report["duplicate_pages_within_document"] + dedup_report["duplicate_pages_across_documents"]
+            if dedup_report else None
+        )
+    )
+    stage_state.clear(document_id)
+    # Text-layer pages held while an OCR job ran are merged into the page store by now
+    OCRPageStore.for_document(document_id, variant="text").delete()
+    
+    logger.info(f"Document {document_id} processing completed successfully")
+    
+    return {
+        "status": "success",
+        "document_id": document_id,
+        "filename": filename,
+        "document_type": doc_type_str,
+        "classification_method": classification["method"],
+        "words_extracted": ocr_summary["word_count"],
+        "text_reduction_ratio": ocr_summary.get("compaction", {}).get("reduction_ratio"),
+        "extraction_summary": {
+            "chronology_events": len(enriched_result.get("events", [])) if doc_type_str == "CHRONOLOGY" else None,
+            "bill_line_items": len(enriched_result.get("line_items", [])) if doc_type_str == "BILL" else None
+        },
+        "verification_summary": enriched_result.get("_match_summary", {}),
+        "dedup": dedup_report,
+        "worker": worker_stats
+    }
+
+
+def _classify_and_extract(db, document, page_store, page_texts, resources):
+    """
+    Classify the document and extract linked structured data with the LLM.
+    
+    Returns:
+        (doc_type_str, classification details, enriched extraction result)
+    """
+    document_id = document.id
+    llm_service = resources.llm_service
+    ocr_text = "\n".join(page_texts) + "\n"
+    
+    logger.info(f"Extracted {len(ocr_text)} characters of text from OCR")
+    
+    # Step 2: Classify document type
+    logger.info(f"Step 2/3: Classifying document type...")
+    
+    # Local keyword classifier; the LLM is only asked about ambiguous documents
+    doc_type_str, classification = resources.classifier.classify(page_texts, llm_service, ocr_text)
+    document_type = DocumentType[doc_type_str]
+    get_stage_state().set_stage(
+        document_id, "extracting",
+        document_type=doc_type_str,
+        classification_method=classification["method"]
+    )
+    
+    logger.info(f"Document {document_id} classified as: {doc_type_str}")
+    
+    # Step 3: Extract structured data based on document type
+    logger.info(f"Step 3/4: Extracting structured data for {doc_type_str}...")
+    
+    if document_type not in (DocumentType.CHRONOLOGY, DocumentType.BILL):
+        raise ValueError(f"Unknown document type: {document_type}")
+    
+    chunks = split_into_chunks(page_texts) if document_type == DocumentType.CHRONOLOGY else []
+    if len(chunks) > 1:
+        # Long records are split on page boundaries and extracted concurrently
+        extraction_result = ChunkedExtractor(llm_service).extract_chronology(page_texts, chunks)
         
         logger.info(f"Extracted data for document {document_id}")
         
@@ -83,41 +475,79 @@ def process_document(document_id: int):
         
         enriched_result = link_verification(
             extracted_json=extraction_result,
-            ocr_map=ocr_result,
+            ocr_map={"pages": page_store},
             file_id=str(document.id)
         )
-        
-        logger.info(f"Verification linkage completed: {enriched_result.get('_match_summary', {})}")
-        
-        # Store enriched extraction result and mark as COMPLETED
-        document.extraction_result = enriched_result
-        document.status = DocumentStatus.COMPLETED
-        db.commit()
-        
-        logger.info(f"Document {document_id} processing completed successfully")
-        
-        return {
-            "status": "success",
-            "document_id": document_id,
-            "filename": document.filename,
-            "document_type": doc_type_str,
-            "words_extracted": len(ocr_result.get("pages", [{}])[0].get("words", [])),
-            "extraction_summary": {
-                "chronology_events": len(enriched_result.get("events", [])) if doc_type_str == "CHRONOLOGY" else None,
-                "bill_line_items": len(enriched_result.get("line_items", [])) if doc_type_str == "BILL" else None
-            },
-            "verification_summary": enriched_result.get("_match_summary", {})
-        }
-        
-    except Exception as e:
-        logger.error(f"Error processing document {document_id}: {str(e)}")
-        
-        # Update status to FAILED
-        if document:
-            document.status = DocumentStatus.FAILED
-            db.commit()
-        
-        return {"status": "error", "message": str(e)}
-        
-    finally:
-        db.close()
+    else:
+        # Steps 3+4 overlap: each item is linked and persisted as soon as it streams in
+        enriched_result = stream_extract(
+            llm_service,
+            doc_type_str,
+            ocr_text,
+            ocr_map={"pages": page_store},
+            file_id=str(document.id),
+            on_item=_partial_result_writer(document_id, doc_type_str)
+        )
+    
+    return doc_type_str, classification, enriched_result
+
+
+def _partial_result_writer(document_id, doc_type_str, flush_interval=None):
+    """
+    Build an on_item callback that publishes linked items while extraction streams.
+    
+    Partial results carry "_partial": True, go to the stage state (not the
+    documents table) and are written at most once per flush interval (the
+    first item is always written immediately).
+    """
+    array_key = STREAM_OPERATIONS[doc_type_str][2]
+    interval = STREAM_FLUSH_INTERVAL if flush_interval is None else flush_interval
+    last_flush = None
+
+    def on_item(item, items):
+        nonlocal last_flush
+        now = time.monotonic()
+        if last_flush is not None and now - last_flush < interval:
+            return
+        last_flush = now
+        get_stage_state().update(document_id, partial_result={"_partial": True, array_key: items})
+        logger.info(f"Document {document_id}: {len(items)} {array_key} linked so far")
+    
+    return on_item
+
+
+def _update_document(db, document_id, **values):
+    """
+    Write the given columns of one document with a single UPDATE and commit.
+    
+    Only the listed columns are sent; the ORM never flushes the whole row.
+    The document's reads go to the primary until the replica has caught up,
+    and its cached API response is dropped.
+    """
+    db.execute(update(Document).where(Document.id == document_id).values(**values))
+    db.commit()
+    get_recent_writes().mark([document_id])
+    get_response_cache().invalidate([document_id])
+
+
+def _fail_document(db, document, document_id, error):
+    """Log a pipeline error and mark the document FAILED."""
+    logger.error(f"Error processing document {document_id}: {str(error)}")
+    
+    # Update status to FAILED
+    if document:
+        db.rollback()
+        # Rows of an earlier run no longer describe the document
+        if MATERIALIZATION_ENABLED:
+            replace_document_rows(db, document_id, document.case_id)
+        if SEARCH_ENABLED:
+            clear_document_pages(db, document_id)
+        _update_document(
+            db, document_id,
+            status=DocumentStatus.FAILED, response_body=None,
+            dedup_indexed_pages=None, dedup_duplicate_pages=None
+        )
+        get_stage_state().set_stage(document_id, "failed", error=str(error))
+    OCRPageStore.for_document(document_id, variant="text").delete()
+    
+    return {"status": "error", "message": str(error)}
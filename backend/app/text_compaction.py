@@ -0,0 +1,190 @@
+"""
+OCR Text Compaction
+
+Shrinks the OCR text sent to the LLM without losing content:
+
+- Words are grouped into lines by bounding box, so line structure survives
+  instead of every word on a page being joined with spaces
+- Header/footer lines repeated on many pages ("Page 3 of 40", fax banners,
+  letterheads) are kept once; digits are normalized when comparing lines,
+  so page numbers and timestamps do not make boilerplate look unique. Only
+  lines in the top/bottom BOILERPLATE_MARGIN of a page are candidates, so
+  body lines that differ only in numbers (vitals, dates) are never removed
+- Low-confidence tokens and pure punctuation noise (table rules, scanner
+  specks) are dropped and runs of whitespace/table separators collapsed
+
+Compacted text stays one entry per page, so page numbers still map 1:1
+onto page_texts indexes; page_for_offset maps a character offset in the
+joined text back to its page.
+"""
+import bisect
+import logging
+import math
+import os
+import re
+from typing import Dict, Any, List, Tuple
+
+from app.metrics import metrics
+from app.verification_service import normalize_bbox
+
+logger = logging.getLogger(__name__)
+
+TEXT_COMPACTION_ENABLED = os.getenv("TEXT_COMPACTION_ENABLED", "true").lower() in ("1", "true", "yes")
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "0.5"))
+BOILERPLATE_MIN_PAGE_FRACTION = float(os.getenv("BOILERPLATE_MIN_PAGE_FRACTION", "0.5"))
+BOILERPLATE_MARGIN = float(os.getenv("BOILERPLATE_MARGIN", "0.1"))
+
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+_SEPARATOR_RUN = re.compile(r"([|_.\-=~*:])\1{2,}")
+
+
+def group_lines(words: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Group OCR words into lines, top to bottom and left to right.
+
+    A word joins the current line when its vertical center lies within half a
+    word height of the line's first word. Words without bounding boxes are
+    kept in reading order on a single line.
+    """
+    if not words or any("bounding_box" not in word for word in words):
+        return [list(words)] if words else []
+
+    def center(word):
+        box = word["bounding_box"]
+        return box["top"] + box["height"] / 2
+
+    lines: List[List[Dict[str, Any]]] = []
+    for word in sorted(words, key=center):
+        if lines:
+            anchor = lines[-1][0]
+            if abs(center(word) - center(anchor)) <= anchor["bounding_box"]["height"] / 2:
+                lines[-1].append(word)
+                continue
+        lines.append([word])
+
+    return [sorted(line, key=lambda w: w["bounding_box"]["left"]) for line in lines]
+
+
+def boilerplate_key(line: str) -> str:
+    """Comparison key for boilerplate detection: case-folded, digits normalized."""
+    return _DIGITS.sub("#", line.lower()).strip()
+
+
+def is_noise(word: Dict[str, Any], min_confidence: float) -> bool:
+    """Low-confidence tokens and tokens without any letter or digit."""
+    text = word.get("text", "")
+    if word.get("confidence", 1.0) < min_confidence:
+        return True
+    return not any(char.isalnum() for char in text) and text not in ("$", "%", "#", "&")
+
+
+class TextCompactor:
+    """
+    Collects OCR pages one at a time and produces compacted page texts.
+
+    Only the lines of each page are kept, never the OCR words with their
+    bounding boxes, so pages can be fed while they stream into the page store.
+
+    Usage:
+        compactor = TextCompactor()
+        for page in pages:
+            compactor.add_page(page)
+        page_texts = compactor.compact()
+        compactor.stats  # reduction ratio etc.
+    """
+
+    def __init__(
+        self,
+        min_confidence: float = OCR_MIN_CONFIDENCE,
+        boilerplate_fraction: float = BOILERPLATE_MIN_PAGE_FRACTION,
+        margin: float = BOILERPLATE_MARGIN
+    ):
+        self.min_confidence = min_confidence
+        self.boilerplate_fraction = boilerplate_fraction
+        self.margin = margin
+        # Per page: (line text, line lies in the header/footer margin)
+        self._pages: List[List[Tuple[str, bool]]] = []
+        self._original_chars = 0
+        self._noise_tokens = 0
+        self.stats: Dict[str, Any] = {}
+
+    def add_page(self, page: Dict[str, Any]) -> None:
+        """Add the next page (pages must be added in page order)."""
+        words = page.get("words", [])
+        self._original_chars += sum(len(word.get("text", "")) + 1 for word in words)
+
+        grouped = group_lines(words)
+
+        lines = []
+        for index, line_words in enumerate(grouped):
+            kept = [w["text"] for w in line_words if not is_noise(w, self.min_confidence)]
+            self._noise_tokens += len(line_words) - len(kept)
+            line = _SPACES.sub(" ", _SEPARATOR_RUN.sub(r"\1", " ".join(kept))).strip()
+            if not line:
+                continue
+            if "bounding_box" in line_words[0]:
+                # Boxes in points or already page-relative (0-1), as OCR backends differ
+                top = normalize_bbox(line_words[0]["bounding_box"], page)["top"]
+                in_margin = top < self.margin or top > 1 - self.margin
+            else:
+                # Without geometry, only the first and last line can be header/footer
+                in_margin = index in (0, len(grouped) - 1)
+            lines.append((line, in_margin))
+        self._pages.append(lines)
+
+    def compact(self) -> List[str]:
+        """
+        Remove boilerplate and return one compacted text per page.
+
+        Boilerplate lines are margin lines whose key occurs on at least
+        boilerplate_fraction of the pages (and on at least two); the first
+        occurrence is kept so header content (e.g. a patient name) is not lost.
+        """
+        page_count = len(self._pages)
+        threshold = max(2, math.ceil(self.boilerplate_fraction * page_count))
+
+        pages_with_key: Dict[str, int] = {}
+        for lines in self._pages:
+            for key in {boilerplate_key(line) for line, in_margin in lines if in_margin}:
+                pages_with_key[key] = pages_with_key.get(key, 0) + 1
+        boilerplate = {key for key, count in pages_with_key.items() if count >= threshold}
+
+        seen = set()
+        removed = 0
+        page_texts = []
+        for lines in self._pages:
+            kept = []
+            for line, in_margin in lines:
+                key = boilerplate_key(line)
+                if in_margin and key in boilerplate:
+                    if key in seen:
+                        removed += 1
+                        continue
+                    seen.add(key)
+                kept.append(line)
+            page_texts.append("\n".join(kept))
+
+        compacted_chars = sum(len(text) + 1 for text in page_texts)
+        self.stats = {
+            "original_chars": self._original_chars,
+            "compacted_chars": compacted_chars,
+            "reduction_ratio": round(1 - compacted_chars / self._original_chars, 4) if self._original_chars else 0.0,
+            "boilerplate_lines_removed": removed,
+            "noise_tokens_dropped": self._noise_tokens
+        }
+        metrics.observe("compaction.reduction_ratio", self.stats["reduction_ratio"])
+        logger.info(f"Text compaction: {self.stats}")
+        return page_texts
+
+
+def page_for_offset(page_texts: List[str], offset: int) -> int:
+    """
+    Map a character offset in "\\n".join(page_texts) back to a 1-based page number.
+    """
+    starts = []
+    position = 0
+    for text in page_texts:
+        starts.append(position)
+        position += len(text) + 1
+    return bisect.bisect_right(starts, offset)
@@ -0,0 +1,195 @@
+"""
+Case Timelines
+
+A MedicalChronology only covers its own document; a patient's treatment
+history is spread over every record of the case. Documents uploaded with a
+case_id feed the case's timeline, case_timeline_entries: one row per
+encounter, merged from the events of all the case's documents that report
+it (same normalized date, provider and encounter type, the identity used
+to merge chunked extractions; see app.chunked_extraction.merge_events).
+
+The timeline is maintained incrementally. When a document completes (or
+fails), only the entries of encounters it reported before or reports now
+are recomputed from the materialized events (app/materialization.py), in
+the transaction of the document's final write. Concurrent updates of one
+case are serialized by locking its cases row
+(app.materialization.replace_document_rows).
+
+Entries are served in date order with keyset pagination over the
+(case_id, event_date, id) index: a page costs the same at any depth, and
+a date range is one index range scan.
+"""
+import base64
+import logging
+from datetime import date, datetime
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Select, and_, or_, select
+
+from app.chunked_extraction import merge_events
+from app.metrics import metrics
+from app.models import CaseTimelineEntry, Document, Event
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursorError(ValueError):
+    """A timeline page cursor that was not produced by encode_cursor."""
+
+
+def document_event_keys(db, document_id: int) -> Set[str]:
+    """Encounter keys of a document's materialized events."""
+    return set(db.scalars(
+        select(Event.event_key).where(Event.document_id == document_id, Event.event_key.is_not(None)).distinct()
+    ))
+
+
+def update_case_timeline(db, case_id: int, keys: Iterable[str]) -> Dict[str, int]:
+    """
+    Recompute the case's timeline entries of the given encounter keys.
+
+    Pass the keys of the completing document before and after its events
+    were replaced, so encounters it no longer reports lose it as a source.
+    Callers hold the case lock (see app.materialization.replace_document_rows);
+    flushed with their transaction.
+
+    Returns:
+        Counts of inserted, updated and deleted entries
+    """
+    keys = sorted(keys)
+    counts = {"inserted": 0, "updated": 0, "deleted": 0}
+    if not keys:
+        return counts
+
+    events_by_key: Dict[str, List[Event]] = {}
+    for event in db.scalars(
+        select(Event)
+        .join(Document, Document.id == Event.document_id)
+        .where(Document.case_id == case_id, Event.event_key.in_(keys))
+        .order_by(Event.document_id, Event.position)
+    ):
+        events_by_key.setdefault(event.event_key, []).append(event)
+
+    entries = {
+        entry.event_key: entry
+        for entry in db.scalars(
+            select(CaseTimelineEntry).where(CaseTimelineEntry.case_id == case_id, CaseTimelineEntry.event_key.in_(keys))
+        )
+    }
+
+    for key in keys:
+        events = events_by_key.get(key)
+        entry = entries.get(key)
+        if not events:
+            if entry is not None:
+                db.delete(entry)
+                counts["deleted"] += 1
+            continue
+        values = merged_entry(events)
+        if entry is None:
+            db.add(CaseTimelineEntry(case_id=case_id, event_key=key, **values))
+            counts["inserted"] += 1
+        else:
+            for name, value in values.items():
+                setattr(entry, name, value)
+            entry.updated_at = datetime.utcnow()
+            counts["updated"] += 1
+
+    db.flush()
+    metrics.incr("timeline.entries_recomputed", len(keys))
+    logger.info(f"Updated timeline of case {case_id}: {counts}")
+    return counts
+
+
+def merged_entry(events: List[Event]) -> Dict[str, Any]:
+    """Column values of the entry merging events of one encounter (first source wins display fields)."""
+    merged = merge_events([
+        {
+            "date": event.date_text,
+            "provider": event.provider,
+            "encounter_type": event.encounter_type,
+            "summary": event.summary or "",
+            "diagnosis_codes": event.diagnosis_codes or []
+        }
+        for event in events
+    ])[0]
+    return {
+        "event_date": next((event.event_date for event in events if event.event_date), None),
+        "date_text": events[0].date_text,
+        "provider": events[0].provider,
+        "encounter_type": events[0].encounter_type,
+        "summary": merged["summary"],
+        "diagnosis_codes": merged["diagnosis_codes"],
+        "sources": [{"document_id": event.document_id, "event_id": event.id} for event in events],
+        "source_count": len(events)
+    }
+
+
+# --- Pagination ---
+
+def encode_cursor(entry: CaseTimelineEntry) -> str:
+    """Opaque cursor of the position after entry."""
+    position = f"{entry.event_date.isoformat() if entry.event_date else ''}_{entry.id}"
+    return base64.urlsafe_b64encode(position.encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[date], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        event_date, entry_id = base64.urlsafe_b64decode(padded).decode("ascii").split("_")
+        return (date.fromisoformat(event_date) if event_date else None), int(entry_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def timeline_query(
+    case_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100
+) -> Select:
+    """
+    One page of a case timeline in date order (undated entries last).
+
+    With a date range only dated entries in it are returned (inclusive).
+    Fetches limit + 1 rows so the caller knows whether there is a next page.
+    """
+    query = select(CaseTimelineEntry).where(CaseTimelineEntry.case_id == case_id)
+    if date_from:
+        query = query.where(CaseTimelineEntry.event_date >= date_from)
+    if date_to:
+        query = query.where(CaseTimelineEntry.event_date <= date_to)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        if after_date is None:
+            query = query.where(CaseTimelineEntry.event_date.is_(None), CaseTimelineEntry.id > after_id)
+        else:
+            query = query.where(or_(
+                CaseTimelineEntry.event_date > after_date,
+                and_(CaseTimelineEntry.event_date == after_date, CaseTimelineEntry.id > after_id),
+                CaseTimelineEntry.event_date.is_(None)
+            ))
+    return query.order_by(
+        CaseTimelineEntry.event_date.asc().nulls_last(), CaseTimelineEntry.id
+    ).limit(limit + 1)
+
+
+def timeline_page(entries: List[CaseTimelineEntry], limit: int) -> Tuple[List[CaseTimelineEntry], Optional[str]]:
+    """Split timeline_query rows into the page and the next page's cursor (None on the last page)."""
+    if len(entries) <= limit:
+        return entries, None
+    return entries[:limit], encode_cursor(entries[limit - 1])
+
+
+def entry_response(entry: CaseTimelineEntry) -> Dict[str, Any]:
+    return {
+        "entry_id": entry.id,
+        "date": entry.event_date.isoformat() if entry.event_date else entry.date_text,
+        "provider": entry.provider,
+        "encounter_type": entry.encounter_type,
+        "summary": entry.summary,
+        "diagnosis_codes": entry.diagnosis_codes or [],
+        "source_count": entry.source_count,
+        "sources": entry.sources
+    }
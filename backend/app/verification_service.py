@@ -13,7 +13,9 @@ Implements 5 matching strategies:
 """
 
 import re
+import os
 import logging
+from functools import lru_cache
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from dateutil import parser
@@ -22,18 +24,89 @@ import copy
 
 logger = logging.getLogger(__name__)
 
+# Size of the process-wide caches of parsed dates / amounts. OCR words repeat
+# across fields and documents, and every date field re-parses every word.
+VERIFICATION_CACHE_SIZE = int(os.getenv("VERIFICATION_CACHE_SIZE", "65536"))
+
+_NON_AMOUNT_CHARS = re.compile(r'[^\d.]')
+
+
+# Two parse defaults differing in year, month and day; a word like "2024" or
+# "15," parses differently under each instead of becoming a date of this year
+_DATE_DEFAULTS = (datetime(2000, 1, 1), datetime(2001, 2, 2))
+
+
+@lru_cache(maxsize=VERIFICATION_CACHE_SIZE)
+def canonical_date(text: str) -> Optional[str]:
+    """
+    Parse date string to YYYY-MM-DD canonical format; None unless fully specified (cached).
+
+    Shared by the linker, materialization and chunk merging so that every
+    stage agrees on which dates are complete.
+    """
+    try:
+        first, second = (parser.parse(text, default=default) for default in _DATE_DEFAULTS)
+    except (ValueError, TypeError, OverflowError, parser.ParserError):
+        return None
+    if first != second:
+        return None
+    return first.strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=VERIFICATION_CACHE_SIZE)
+def _canonical_amount(text: str) -> Optional[float]:
+    """Strip currency symbols, commas; parse as float (cached)"""
+    cleaned = _NON_AMOUNT_CHARS.sub('', text)
+    
+    try:
+        return float(cleaned)
+    except (ValueError, AttributeError):
+        return None
+
+
+def normalize_bbox(bbox: Dict[str, float], page: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Normalize bounding box coordinates to 0-1 range if needed.
+    If bbox values are already < 1, assume already normalized.
+    Otherwise, normalize using page dimensions.
+    """
+    # Check if already normalized (all values < 2)
+    if all(v <= 2 for v in [
+        bbox.get("left", 0),
+        bbox.get("top", 0),
+        bbox.get("width", 0),
+        bbox.get("height", 0)
+    ]):
+        return bbox
+    
+    # Normalize using page dimensions
+    page_width = page.get("width", 612)
+    page_height = page.get("height", 792)
+    
+    return {
+        "left": bbox.get("left", 0) / page_width,
+        "top": bbox.get("top", 0) / page_height,
+        "width": bbox.get("width", 0) / page_width,
+        "height": bbox.get("height", 0) / page_height
+    }
+
+
+def verification_cache_info() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counts of the date and amount caches of this process"""
+    return {
+        name: {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+        for name, info in (
+            ("dates", canonical_date.cache_info()),
+            ("amounts", _canonical_amount.cache_info())
+        )
+    }
+
 
 class VerificationLinker:
     """Main class for linking extracted data to OCR source locations"""
     
     def __init__(self):
-        self.match_stats = {
-            "total_fields": 0,
-            "matched": 0,
-            "unmatched": 0,
-            "fuzzy_matched": 0,
-            "multiword_matched": 0
-        }
+        self.reset_stats()
     
     def link_verification(
         self, 
@@ -53,13 +126,7 @@ class VerificationLinker:
             Enriched JSON with source_refs populated
         """
         logger.info("Starting verification linkage...")
-        self.match_stats = {
-            "total_fields": 0,
-            "matched": 0,
-            "unmatched": 0,
-            "fuzzy_matched": 0,
-            "multiword_matched": 0
-        }
+        self.reset_stats()
         
         # Deep copy to avoid modifying the original
         enriched = copy.deepcopy(extracted_json)
@@ -73,7 +140,24 @@ class VerificationLinker:
             self._process_bill(enriched, ocr_map, file_id)
         
         # Add match summary
-        enriched["_match_summary"] = {
+        enriched["_match_summary"] = self.match_summary()
+        
+        logger.info(f"Verification linkage completed: {enriched['_match_summary']}")
+        return enriched
+    
+    def reset_stats(self):
+        """Start a new linkage run (per-document match statistics)"""
+        self.match_stats = {
+            "total_fields": 0,
+            "matched": 0,
+            "unmatched": 0,
+            "fuzzy_matched": 0,
+            "multiword_matched": 0
+        }
+    
+    def match_summary(self) -> Dict[str, Any]:
+        """Match statistics of the current linkage run"""
+        return {
             "total_fields": self.match_stats["total_fields"],
             "matched": self.match_stats["matched"],
             "unmatched": self.match_stats["unmatched"],
@@ -84,9 +168,6 @@ class VerificationLinker:
                 2
             )
         }
-        
-        logger.info(f"Verification linkage completed: {enriched['_match_summary']}")
-        return enriched
     
     def _process_chronology(
         self,
@@ -95,45 +176,63 @@ class VerificationLinker:
         file_id: Optional[str]
     ):
         """Process chronology document events"""
+        self.link_chronology_header(chronology, ocr_map, file_id)
+        
+        # Link each event's fields
+        for event in chronology.get("events", []):
+            self.link_event(event, ocr_map, file_id)
+    
+    def link_chronology_header(
+        self,
+        chronology: Dict[str, Any],
+        ocr_map: Dict[str, Any],
+        file_id: Optional[str]
+    ):
+        """Link the top-level fields of a chronology"""
         # Link patient name
         if "patient_name" in chronology:
             self._link_field(
                 chronology, "patient_name", chronology["patient_name"],
                 ocr_map, file_id, "name"
             )
+    
+    def link_event(
+        self,
+        event: Dict[str, Any],
+        ocr_map: Dict[str, Any],
+        file_id: Optional[str]
+    ):
+        """Link a single chronology event (usable as soon as the event is extracted)"""
+        if "source_refs" not in event:
+            event["source_refs"] = []
+        
+        # Link date
+        if "date" in event:
+            refs = self._find_matches(
+                event["date"], ocr_map, "date", file_id
+            )
+            event["source_refs"].extend(refs)
         
-        # Link each event's fields
-        for event in chronology.get("events", []):
-            if "source_refs" not in event:
-                event["source_refs"] = []
-            
-            # Link date
-            if "date" in event:
-                refs = self._find_matches(
-                    event["date"], ocr_map, "date", file_id
-                )
-                event["source_refs"].extend(refs)
-            
-            # Link provider name
-            if "provider" in event:
-                refs = self._find_matches(
-                    event["provider"], ocr_map, "provider", file_id
-                )
-                event["source_refs"].extend(refs)
-            
-            # Link encounter type
-            if "encounter_type" in event:
-                refs = self._find_matches(
-                    event["encounter_type"], ocr_map, "encounter_type", file_id
-                )
-                event["source_refs"].extend(refs)
-            
-            # Link diagnosis codes
-            for code in event.get("diagnosis_codes", []):
-                refs = self._find_matches(
-                    code, ocr_map, "diagnosis_code", file_id
-                )
-                event["source_refs"].extend(refs)
+        # Link provider name
+        if "provider" in event:
+            refs = self._find_matches(
+                event["provider"], ocr_map, "provider", file_id
+            )
+            event["source_refs"].extend(refs)
+        
+        # Link encounter type
+        if "encounter_type" in event:
+            refs = self._find_matches(
+                event["encounter_type"], ocr_map, "encounter_type", file_id
+            )
+            event["source_refs"].extend(refs)
+        
+        # Link diagnosis codes
+        for code in event.get("diagnosis_codes", []):
+            refs = self._find_matches(
+                code, ocr_map, "diagnosis_code", file_id
+            )
+            event["source_refs"].extend(refs)
     
     def _process_bill(
         self,
@@ -142,6 +241,19 @@ class VerificationLinker:
         file_id: Optional[str]
     ):
         """Process bill document line items"""
+        self.link_bill_header(bill, ocr_map, file_id)
+        
+        # Link each line item's fields
+        for item in bill.get("line_items", []):
+            self.link_line_item(item, ocr_map, file_id)
+    
+    def link_bill_header(
+        self,
+        bill: Dict[str, Any],
+        ocr_map: Dict[str, Any],
+        file_id: Optional[str]
+    ):
+        """Link the top-level fields of a bill"""
         # Link invoice number
         if "invoice_number" in bill:
             self._link_field(
@@ -155,46 +267,51 @@ class VerificationLinker:
                 bill, "total_amount", bill["total_amount"],
                 ocr_map, file_id, "amount"
             )
+    
+    def link_line_item(
+        self,
+        item: Dict[str, Any],
+        ocr_map: Dict[str, Any],
+        file_id: Optional[str]
+    ):
+        """Link a single bill line item (usable as soon as the item is extracted)"""
+        if "source_refs" not in item:
+            item["source_refs"] = []
+        
+        # Link date of service
+        if "date_of_service" in item:
+            refs = self._find_matches(
+                item["date_of_service"], ocr_map, "date", file_id
+            )
+            item["source_refs"].extend(refs)
         
-        # Link each line item's fields
-        for item in bill.get("line_items", []):
-            if "source_refs" not in item:
-                item["source_refs"] = []
-            
-            # Link date of service
-            if "date_of_service" in item:
-                refs = self._find_matches(
-                    item["date_of_service"], ocr_map, "date", file_id
-                )
-                item["source_refs"].extend(refs)
-            
-            # Link CPT code
-            if "cpt_code" in item:
-                refs = self._find_matches(
-                    item["cpt_code"], ocr_map, "code", file_id
-                )
-                item["source_refs"].extend(refs)
-            
-            # Link description
-            if "description" in item:
-                refs = self._find_matches(
-                    item["description"], ocr_map, "description", file_id
-                )
-                item["source_refs"].extend(refs)
-            
-            # Link charged amount
-            if "charged_amount" in item:
-                refs = self._find_matches(
-                    item["charged_amount"], ocr_map, "amount", file_id
-                )
-                item["source_refs"].extend(refs)
-            
-            # Link allowed amount
-            if "allowed_amount" in item:
-                refs = self._find_matches(
-                    item["allowed_amount"], ocr_map, "amount", file_id
-                )
-                item["source_refs"].extend(refs)
+        # Link CPT code
+        if "cpt_code" in item:
+            refs = self._find_matches(
+                item["cpt_code"], ocr_map, "code", file_id
+            )
+            item["source_refs"].extend(refs)
+        
+        # Link description
+        if "description" in item:
+            refs = self._find_matches(
+                item["description"], ocr_map, "description", file_id
+            )
+            item["source_refs"].extend(refs)
+        
+        # Link charged amount
+        if "charged_amount" in item:
+            refs = self._find_matches(
+                item["charged_amount"], ocr_map, "amount", file_id
+            )
+            item["source_refs"].extend(refs)
+        
+        # Link allowed amount
+        if "allowed_amount" in item:
+            refs = self._find_matches(
+                item["allowed_amount"], ocr_map, "amount", file_id
+            )
+            item["source_refs"].extend(refs)
     
     def _link_field(
         self,
@@ -500,51 +617,19 @@ class VerificationLinker:
         if isinstance(text, (int, float)):
             return float(text)
         
-        # Remove all non-digit and non-decimal point characters
-        cleaned = re.sub(r'[^\d.]', '', str(text))
-        
-        try:
-            return float(cleaned)
-        except (ValueError, AttributeError):
-            return None
+        return _canonical_amount(str(text))
     
     def _parse_date(self, text: Any) -> Optional[str]:
         """Parse date string to YYYY-MM-DD canonical format"""
-        try:
-            dt = parser.parse(str(text))
-            return dt.strftime("%Y-%m-%d")
-        except (ValueError, TypeError, parser.ParserError):
-            return None
+        return canonical_date(str(text))
     
     def _normalize_bbox(
         self,
         bbox: Dict[str, float],
         page: Dict[str, Any]
     ) -> Dict[str, float]:
-        """
-        Normalize bounding box coordinates to 0-1 range if needed.
-        If bbox values are already < 1, assume already normalized.
-        Otherwise, normalize using page dimensions.
-        """
-        # Check if already normalized (all values < 2)
-        if all(v <= 2 for v in [
-            bbox.get("left", 0),
-            bbox.get("top", 0),
-            bbox.get("width", 0),
-            bbox.get("height", 0)
-        ]):
-            return bbox
-        
-        # Normalize using page dimensions
-        page_width = page.get("width", 612)
-        page_height = page.get("height", 792)
-        
-        return {
-            "left": bbox.get("left", 0) / page_width,
-            "top": bbox.get("top", 0) / page_height,
-            "width": bbox.get("width", 0) / page_width,
-            "height": bbox.get("height", 0) / page_height
-        }
+        """Normalize bounding box coordinates to 0-1 range if needed"""
+        return normalize_bbox(bbox, page)
     
     def _compute_union_bbox(
         self,
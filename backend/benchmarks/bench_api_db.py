@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Load test: sync (psycopg2, threadpool) vs async (asyncpg) read endpoints.
+
+Serves list_documents and get_document twice with uvicorn:
+
+    sync    the previous handlers: plain def endpoints on a sync Session,
+            each request holding a threadpool worker while it waits on the DB
+    async   the app.main endpoints on an AsyncSession
+
+and drives both with the same number of concurrent keep-alive clients.
+Reports requests/sec and latency percentiles per endpoint. Needs the
+Postgres database from DATABASE_URL; --documents rows are inserted first
+(and deleted afterwards) so list_documents has something to return.
+Requires httpx (pip install httpx).
+
+Usage:
+    docker compose exec backend python benchmarks/bench_api_db.py --documents 200 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy.orm import Session
+
+_original_mkdir = Path.mkdir
+# app.main creates /code/uploads at import; the benchmark never uploads
+Path.mkdir = lambda self, *args, **kwargs: None
+from app import main as api
+Path.mkdir = _original_mkdir
+
+from app.database import SessionLocal, get_db
+from app.models import Document, DocumentStatus, DocumentType
+
+
+def build_sync_app() -> FastAPI:
+    """The read endpoints as they were before the async engine: sync Session, threadpool."""
+    sync_app = FastAPI()
+
+    @sync_app.get("/api/v1/documents/{document_id}")
+    def get_document(document_id: int, db: Session = Depends(get_db)):
+        document = db.query(Document).filter(Document.id == document_id).first()
+        if not document:
+            raise HTTPException(status_code=404, detail="Document not found")
+        return {
+            "document_id": document.id,
+            "filename": document.filename,
+            "status": document.status.value,
+            "created_at": document.created_at.isoformat(),
+            "updated_at": document.updated_at.isoformat(),
+            "document_type": document.document_type.value if document.document_type else None,
+            "extraction_result": document.extraction_result,
+            "ocr_result": document.ocr_result
+        }
+
+    @sync_app.get("/api/v1/documents")
+    def list_documents(db: Session = Depends(get_db)):
+        documents = db.query(Document).order_by(Document.created_at.desc()).all()
+        return {
+            "count": len(documents),
+            "documents": [
+                {
+                    "document_id": doc.id,
+                    "filename": doc.filename,
+                    "status": doc.status.value,
+                    "document_type": doc.document_type.value if doc.document_type else None,
+                    "created_at": doc.created_at.isoformat()
+                }
+                for doc in documents
+            ]
+        }
+
+    return sync_app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(asgi_app) -> tuple:
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def seed(count: int) -> list:
+    db = SessionLocal()
+    try:
+        documents = [
+            Document(
+                filename=f"bench_{i}.pdf",
+                status=DocumentStatus.COMPLETED,
+                document_type=DocumentType.BILL,
+                extraction_result={"line_items": [{"cpt_code": "99214", "charge": 150.0}] * 20},
+                ocr_result='{"page_count": 3}'
+            )
+            for i in range(count)
+        ]
+        db.add_all(documents)
+        db.commit()
+        return [document.id for document in documents]
+    finally:
+        db.close()
+
+
+def cleanup(document_ids: list) -> None:
+    db = SessionLocal()
+    try:
+        db.query(Document).filter(Document.id.in_(document_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def drive(base_url: str, path_for, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.monotonic()
+                response = await client.get(path_for())
+                if response.status_code == 200:
+                    latencies.append(time.monotonic() - start)
+                else:
+                    errors += 1
+
+        start = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - start
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0,
+        "errors": errors
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Sync vs async read endpoint load test")
+    arg_parser.add_argument("--documents", type=int, default=200, help="Rows inserted for the test")
+    arg_parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients")
+    arg_parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    args = arg_parser.parse_args()
+
+    document_ids = seed(args.documents)
+    endpoints = {
+        "list_documents": lambda: "/api/v1/documents",
+        "get_document": lambda: f"/api/v1/documents/{random.choice(document_ids)}",
+    }
+
+    print(f"{args.documents} documents, {args.concurrency} concurrent clients, {args.duration:.0f}s per run")
+    try:
+        for label, asgi_app in (("sync", build_sync_app()), ("async", api.app)):
+            server, thread, base_url = serve(asgi_app)
+            for name, path_for in endpoints.items():
+                result = asyncio.run(drive(base_url, path_for, args.concurrency, args.duration))
+                print(
+                    f"  {label:5s} {name:15s}: {result['rps']:8.1f} req/s  "
+                    f"p50 {result['p50'] * 1000:7.1f}ms  p95 {result['p95'] * 1000:7.1f}ms  "
+                    f"errors {result['errors']}"
+                )
+            server.should_exit = True
+            thread.join()
+    finally:
+        cleanup(document_ids)
+
+
+if __name__ == "__main__":
+    main()
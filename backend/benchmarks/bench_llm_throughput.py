@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Load test: ClaudeAPIService throughput against the fake LLM server.
+
+Simulates several worker threads extracting documents through one client
+while the fake server enforces a concurrency rate limit and injects errors.
+Reports throughput, latency percentiles, retries and 429s for each
+per-worker in-flight cap.
+
+Usage:
+    cd backend
+    python benchmarks/bench_llm_throughput.py --requests 200 --latency 0.2 --rate-limit 8
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.llm_service import ClaudeAPIService, LLMAPIError
+from fakes.fake_llm_server import start_fake_llm_server
+
+
+def run(args, max_in_flight: int):
+    server, state = start_fake_llm_server(
+        latency=args.latency,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        retry_after=0.0
+    )
+    client = ClaudeAPIService(
+        api_key="bench",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        max_in_flight=max_in_flight,
+        max_retries=10,
+        retry_base_delay=0.05,
+        retry_max_delay=1.0
+    )
+
+    latencies = []
+    failures = 0
+
+    def one(_):
+        nonlocal failures
+        start = time.monotonic()
+        try:
+            client.extract_bill("benchmark document")
+            latencies.append(time.monotonic() - start)
+        except LLMAPIError:
+            failures += 1
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(one, range(args.requests)))
+    elapsed = time.monotonic() - start
+    server.shutdown()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    print(
+        f"  in-flight cap {max_in_flight:3d}: {args.requests / elapsed:7.1f} req/s  "
+        f"p50 {statistics.median(latencies) if latencies else 0:.3f}s  p95 {p95:.3f}s  "
+        f"retries {client.stats['retries']:4d}  429s {state.counts['429']:4d}  "
+        f"failed {failures}  connections {state.connections}"
+    )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="ClaudeAPIService load test")
+    arg_parser.add_argument("--requests", type=int, default=200)
+    arg_parser.add_argument("--threads", type=int, default=32, help="Concurrent callers (documents)")
+    arg_parser.add_argument("--latency", type=float, default=0.2)
+    arg_parser.add_argument("--rate-limit", type=int, default=8, help="Server concurrency before 429")
+    arg_parser.add_argument("--error-rate", type=float, default=0.02)
+    args = arg_parser.parse_args()
+
+    # Retries are expected here; keep the report readable
+    logging.getLogger("app.llm_service").setLevel(logging.ERROR)
+
+    print("=" * 60)
+    print(f"LLM CLIENT THROUGHPUT: {args.requests} requests, {args.threads} callers, "
+          f"server limit {args.rate_limit}")
+    print("=" * 60)
+
+    for cap in (args.rate_limit // 2 or 1, args.rate_limit, args.threads):
+        run(args, cap)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: whole-document vs streaming OCR ingestion.
+
+Compares the peak Python heap of
+1. the legacy path (full OCR dict + json.dumps + concatenated text), and
+2. the streaming path (pages written to OCRPageStore one at a time,
+   LLM text built page by page, linkage reading pages lazily from disk).
+
+Usage:
+    cd backend
+    python benchmarks/bench_ocr_memory.py --pages 2000 --words 400
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.ocr_service import page_text
+from app.page_store import OCRPageStore
+from app.verification_service import link_verification
+
+
+class SyntheticOCRService:
+    """Generates large, realistic-looking OCR output without any engine."""
+
+    def __init__(self, pages: int, words_per_page: int):
+        self.pages = pages
+        self.words_per_page = words_per_page
+
+    def iter_pages(self, file_path: str):
+        for page_number in range(1, self.pages + 1):
+            yield {
+                "page_number": page_number,
+                "width": 612,
+                "height": 792,
+                "words": [
+                    {
+                        "text": f"word{page_number}x{i}",
+                        "confidence": 0.97,
+                        "bounding_box": {
+                            "left": 40 + (i % 12) * 45,
+                            "top": 40 + (i // 12) * 14,
+                            "width": 42,
+                            "height": 12
+                        }
+                    }
+                    for i in range(self.words_per_page)
+                ]
+            }
+
+    def process_document(self, file_path: str):
+        return {"status": "SUCCESS", "pages": list(self.iter_pages(file_path))}
+
+
+EXTRACTION = {"line_items": [{"cpt_code": "word1x3", "charged_amount": 285.00}]}
+
+
+def run_legacy(ocr_service) -> int:
+    ocr_result = ocr_service.process_document("synthetic.pdf")
+    ocr_result_json = json.dumps(ocr_result)
+
+    ocr_text = ""
+    for page in ocr_result.get("pages", []):
+        ocr_text += page_text(page) + "\n"
+
+    link_verification(EXTRACTION, ocr_result, file_id="bench")
+    return len(ocr_result_json) + len(ocr_text)
+
+
+def run_streaming(ocr_service, store_dir: Path) -> int:
+    page_store = OCRPageStore(store_dir / "bench.jsonl")
+    page_texts = []
+    with page_store.open_for_write():
+        for page in ocr_service.iter_pages("synthetic.pdf"):
+            page_store.append(page)
+            page_texts.append(page_text(page))
+
+    ocr_text = "\n".join(page_texts) + "\n"
+    link_verification(EXTRACTION, {"pages": page_store}, file_id="bench")
+    return len(ocr_text)
+
+
+def measure(fn, *args) -> float:
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    arg_parser.add_argument("--pages", type=int, default=500)
+    arg_parser.add_argument("--words", type=int, default=300)
+    args = arg_parser.parse_args()
+
+    ocr_service = SyntheticOCRService(args.pages, args.words)
+
+    print("=" * 60)
+    print(f"OCR INGESTION MEMORY: {args.pages} pages x {args.words} words")
+    print("=" * 60)
+
+    legacy_mb = measure(run_legacy, ocr_service)
+    print(f"  Legacy (whole document): peak {legacy_mb:8.1f} MiB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        streaming_mb = measure(run_streaming, ocr_service, Path(tmp))
+    print(f"  Streaming (page store):  peak {streaming_mb:8.1f} MiB")
+
+    print(f"\n  Reduction: {legacy_mb / max(streaming_mb, 0.001):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/v1/search query latency on a large page index.
+
+Loads --pages synthetic OCR pages (about 300 words of clinical vocabulary
+each, spread over documents of --pages-per-document) into page_texts of
+the Postgres database from DATABASE_URL, runs ANALYZE, then times the
+app.search page queries on the synchronous engine:
+
+    rare word       a term on ~0.1% of pages
+    common word     a term on most pages (ranking is capped at SEARCH_CANDIDATES)
+    phrase          "quoted phrase"
+    code            ICD-10 code substring (trigram index)
+
+Reports p50 / p95 / max per query. The rows (and their documents) are
+deleted afterwards unless --keep is given.
+
+Usage:
+    docker compose exec backend python benchmarks/bench_search.py --pages 1000000 --repeat 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import delete, insert, text
+
+from app.database import Base, SessionLocal, engine
+from app.models import Document, DocumentStatus, PageText
+from app.search import page_text_query
+
+VOCABULARY = (
+    "patient presented with pain tenderness lumbar cervical spine examination reveals range motion "
+    "reduced prescribed physical therapy follow weeks imaging shows mild degenerative changes "
+    "history hypertension denies numbness tingling reflexes intact assessment plan continue "
+    "medication ibuprofen twice daily return clinic symptoms worsen strain sprain injury accident"
+).split()
+RARE_WORD = "spondylolisthesis"
+CODES = ["M54.5", "S13.4XXA", "S33.5XXA", "M50.20", "G44.309"]
+
+
+def synthetic_page(rng: random.Random) -> str:
+    words = rng.choices(VOCABULARY, k=300)
+    if rng.random() < 0.001:
+        words[rng.randrange(len(words))] = RARE_WORD
+    if rng.random() < 0.05:
+        words[rng.randrange(len(words))] = rng.choice(CODES)
+    return " ".join(words)
+
+
+def load(pages: int, pages_per_document: int, batch: int, seed: int):
+    rng = random.Random(seed)
+    document_ids = []
+    with SessionLocal() as db:
+        for start in range(0, pages, pages_per_document):
+            document = Document(filename=f"bench-search-{start}.pdf", status=DocumentStatus.COMPLETED)
+            db.add(document)
+            db.flush()
+            document_ids.append(document.id)
+            rows = [
+                {"document_id": document.id, "page_number": number, "text": synthetic_page(rng)}
+                for number in range(1, min(pages_per_document, pages - start) + 1)
+            ]
+            for offset in range(0, len(rows), batch):
+                db.execute(insert(PageText.__table__), rows[offset:offset + batch])
+            if len(document_ids) % 100 == 0:
+                db.commit()
+                print(f"  loaded {start + len(rows):,} pages", flush=True)
+        db.commit()
+        db.execute(text("ANALYZE page_texts"))
+        db.commit()
+    return document_ids
+
+
+def timed(query: str, repeat: int):
+    statement = page_text_query(query, engine.dialect.name)
+    latencies = []
+    hits = 0
+    with SessionLocal() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits = len(db.execute(statement).all())
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return hits, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], latencies[-1]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Search latency benchmark (Postgres)")
+    arg_parser.add_argument("--pages", type=int, default=1_000_000)
+    arg_parser.add_argument("--pages-per-document", type=int, default=200)
+    arg_parser.add_argument("--batch", type=int, default=1000, help="Rows per INSERT while loading")
+    arg_parser.add_argument("--repeat", type=int, default=50)
+    arg_parser.add_argument("--seed", type=int, default=7)
+    arg_parser.add_argument("--keep", action="store_true", help="Keep the loaded pages")
+    args = arg_parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("DATABASE_URL must point at Postgres (the indexes are Postgres-only)")
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Loading {args.pages:,} pages...")
+    started = time.perf_counter()
+    document_ids = load(args.pages, args.pages_per_document, args.batch, args.seed)
+    print(f"Loaded in {time.perf_counter() - started:.0f}s\n")
+
+    try:
+        print(f"{'query':<28} {'hits':>5} {'p50':>9} {'p95':>9} {'max':>9}")
+        for label, query in (
+            ("rare word", RARE_WORD),
+            ("common word", "lumbar"),
+            ("phrase", '"physical therapy"'),
+            ("code", CODES[1])
+        ):
+            hits, p50, p95, worst = timed(query, args.repeat)
+            print(f"{label + ' (' + query + ')':<28} {hits:>5} {p50:>7.1f}ms {p95:>7.1f}ms {worst:>7.1f}ms")
+    finally:
+        if not args.keep:
+            with SessionLocal() as db:
+                for offset in range(0, len(document_ids), 1000):
+                    chunk = document_ids[offset:offset + 1000]
+                    db.execute(delete(PageText).where(PageText.document_id.in_(chunk)))
+                    db.execute(delete(Document).where(Document.id.in_(chunk)))
+                db.commit()
+
+
+if __name__ == "__main__":
+    main()
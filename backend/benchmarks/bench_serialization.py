@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request cost of producing the GET /api/v1/documents/{id} body.
+
+For chronologies of 10, 1,000 and 10,000 events, times three approaches
+from the stored row to the response body bytes:
+
+    stock        decode the JSON column, build the dict, FastAPI's
+                 jsonable_encoder + JSONResponse (stdlib json)
+    orjson       decode the JSON column, build the dict, orjson
+    pre-encoded  send documents.response_body as stored (what the API does
+                 for COMPLETED documents)
+
+Usage:
+    cd backend
+    python benchmarks/bench_serialization.py --events 10 1000 10000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models import DocumentStatus, DocumentType
+from app.serialization import document_response, document_row_response, encode_json
+
+
+def chronology(events: int) -> dict:
+    return {
+        "patient_name": "Jane Doe",
+        "events": [
+            {
+                "date": f"2023-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+                "provider": "Dr. Smith, Orthopedics",
+                "event_type": "Office Visit",
+                "description": f"Follow-up for lumbar strain, visit {i}; reports improved range of motion.",
+                "diagnoses": ["M54.5", "S39.012A"],
+                "source_refs": [
+                    {"page": i // 5 + 1, "bbox": [0.12, 0.31 + (i % 5) * 0.1, 0.62, 0.04], "score": 0.94},
+                    {"page": i // 5 + 1, "bbox": [0.12, 0.35 + (i % 5) * 0.1, 0.40, 0.04], "score": 0.88}
+                ]
+            }
+            for i in range(events)
+        ],
+        "_match_summary": {"matched": events * 2, "unmatched": 0}
+    }
+
+
+def stored_row(events: int) -> SimpleNamespace:
+    """A COMPLETED row as the database hands it back: JSON column as text, body as bytes."""
+    now = datetime.utcnow()
+    extraction = chronology(events)
+    body = encode_json(document_response(
+        1, "records.pdf", DocumentStatus.COMPLETED, now, now,
+        DocumentType.CHRONOLOGY, extraction, '{"page_count": 40}'
+    ))
+    return SimpleNamespace(
+        id=1, filename="records.pdf", status=DocumentStatus.COMPLETED,
+        created_at=now, updated_at=now, document_type=DocumentType.CHRONOLOGY,
+        extraction_json=json.dumps(extraction), ocr_result='{"page_count": 40}',
+        response_body=body
+    )
+
+
+def loaded(row: SimpleNamespace) -> SimpleNamespace:
+    # The driver decodes the JSON column on every load
+    return SimpleNamespace(**vars(row), extraction_result=json.loads(row.extraction_json))
+
+
+def stock(row):
+    return JSONResponse(jsonable_encoder(document_row_response(loaded(row)))).body
+
+
+def orjson_encoded(row):
+    return Response(content=encode_json(document_row_response(loaded(row)))).body
+
+
+def pre_encoded(row):
+    return Response(content=row.response_body, media_type="application/json").body
+
+
+def timed(function, row, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(row)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    arg_parser.add_argument("--events", type=int, nargs="+", default=[10, 1000, 10000])
+    arg_parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement (best is reported)")
+    args = arg_parser.parse_args()
+
+    print(f"{'events':>8} {'body':>9} {'stock':>10} {'orjson':>10} {'pre-encoded':>12} {'speedup':>8}")
+    for events in args.events:
+        row = stored_row(events)
+        assert json.loads(stock(row)) == json.loads(pre_encoded(row))
+        results = {name: timed(function, row, args.repeat) for name, function in (
+            ("stock", stock), ("orjson", orjson_encoded), ("pre", pre_encoded)
+        )}
+        print(
+            f"{events:>8} {len(row.response_body) / 1024:>7.0f}KB "
+            f"{results['stock'] * 1000:>8.2f}ms {results['orjson'] * 1000:>8.2f}ms "
+            f"{results['pre'] * 1000:>10.3f}ms {results['stock'] / results['pre']:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Fake LLM HTTP server speaking the Claude Messages API.
+
+Implements POST /v1/messages (plain and "stream": true SSE responses) with
+configurable latency, error rates and a concurrency limit, so throughput of
+ClaudeAPIService under rate limiting can be load-tested offline.
+
+Replies are produced by MockLLMService, chosen by the system prompt:
+classification prompts get CHRONOLOGY/BILL, extraction prompts get the mock
+chronology or bill as JSON.
+
+Usage:
+    cd backend
+    python fakes/fake_llm_server.py --port 8200 --latency 1.5 --rate-limit 8 --error-rate 0.05
+    LLM_BACKEND=claude LLM_API_BASE_URL=http://localhost:8200 celery -A app.celery_app worker
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.llm_service import MockLLMService, CLASSIFY_PROMPT, BILL_PROMPT
+
+
+class FakeLLMState:
+    """Behaviour knobs and counters shared by all handler threads."""
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        rate_limit: int = 0,
+        error_rate: float = 0.0,
+        rate_limit_error_rate: float = 0.0,
+        retry_after: float = 0.0,
+        stream_chunk_size: int = 40
+    ):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.rate_limit_error_rate = rate_limit_error_rate
+        self.retry_after = retry_after
+        self.stream_chunk_size = stream_chunk_size
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.counts = {"requests": 0, "ok": 0, "429": 0, "500": 0}
+        self.connections = 0
+        self.mock = MockLLMService()
+
+    def reply_text(self, request: dict) -> str:
+        system = request.get("system", "")
+        text = "".join(
+            m["content"] if isinstance(m["content"], str) else ""
+            for m in request.get("messages", [])
+        )
+        if system == CLASSIFY_PROMPT:
+            return self.mock.classify_document(text)
+        if system == BILL_PROMPT:
+            return json.dumps(self.mock.extract_bill(text))
+        return json.dumps(self.mock.extract_chronology(text))
+
+
+def make_handler(state: FakeLLMState):
+
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 keep-alive, so client connection pooling is observable
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def _send_json(self, status: int, body: dict, headers: dict = None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _error(self, status: int, kind: str):
+            with state.lock:
+                state.counts[str(status)] += 1
+            headers = {"retry-after": str(state.retry_after)} if status == 429 else {}
+            self._send_json(status, {"type": "error", "error": {"type": kind, "message": kind}}, headers)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            if self.path != "/v1/messages":
+                return self._send_json(404, {"error": "not found"})
+
+            with state.lock:
+                state.counts["requests"] += 1
+                over_limit = state.rate_limit and state.in_flight >= state.rate_limit
+                if not over_limit:
+                    state.in_flight += 1
+                    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+
+            if over_limit or random.random() < state.rate_limit_error_rate:
+                if not over_limit:
+                    with state.lock:
+                        state.in_flight -= 1
+                return self._error(429, "rate_limit_error")
+
+            try:
+                if random.random() < state.error_rate:
+                    time.sleep(state.latency / 4)
+                    return self._error(500, "api_error")
+
+                text = state.reply_text(request)
+                if request.get("stream"):
+                    self._stream(text)
+                else:
+                    time.sleep(state.latency)
+                    self._send_json(200, {
+                        "id": "msg_fake",
+                        "type": "message",
+                        "role": "assistant",
+                        "model": request.get("model"),
+                        "content": [{"type": "text", "text": text}],
+                        "stop_reason": "end_turn"
+                    })
+                with state.lock:
+                    state.counts["ok"] += 1
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def _stream(self, text: str):
+            """Send the reply as SSE content_block_delta events spread over the latency."""
+            pieces = [text[i:i + state.stream_chunk_size] for i in range(0, len(text), state.stream_chunk_size)]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send_event(event: dict):
+                data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            send_event({"type": "message_start"})
+            for piece in pieces:
+                time.sleep(state.latency / max(len(pieces), 1))
+                send_event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}})
+            send_event({"type": "message_stop"})
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def start_fake_llm_server(host: str = "127.0.0.1", port: int = 0, **options):
+    """
+    Start the server on a background thread.
+
+    Returns:
+        (server, state); server.server_address has the bound port and
+        server.shutdown() stops it
+    """
+    state = FakeLLMState(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Fake Claude Messages API server")
+    arg_parser.add_argument("--host", default="0.0.0.0")
+    arg_parser.add_argument("--port", type=int, default=8200)
+    arg_parser.add_argument("--latency", type=float, default=1.0, help="Seconds per response")
+    arg_parser.add_argument("--rate-limit", type=int, default=0, help="Max concurrent requests before 429 (0 = none)")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    arg_parser.add_argument("--rate-limit-error-rate", type=float, default=0.0, help="Fraction of random 429s")
+    arg_parser.add_argument("--retry-after", type=float, default=1.0)
+    args = arg_parser.parse_args()
+
+    state = FakeLLMState(
+        latency=args.latency,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        rate_limit_error_rate=args.rate_limit_error_rate,
+        retry_after=args.retry_after
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    print(f"Fake LLM server listening on {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
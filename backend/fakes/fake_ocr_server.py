@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Fake asynchronous OCR server (Textract-style submit/poll API).
+
+Implements the API consumed by app.ocr_service.HTTPOCRBackend:
+
+    POST /jobs                  {"file_path", "page_numbers"} -> {"job_id"}
+    GET  /jobs/{job_id}         -> {"status", "page_count"}
+    GET  /jobs/{job_id}/pages   ?offset=&limit= -> {"pages", "next_offset"}
+
+A job stays IN_PROGRESS for ``job_latency + page_latency * pages`` seconds,
+then returns the mock OCR page for every requested page. Jobs whose file path
+contains ``fail`` end in FAILED.
+
+Usage:
+    cd backend
+    python fakes/fake_ocr_server.py --port 8100 --job-latency 10 --pages 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.ocr_service import MOCK_PAGE
+
+
+class FakeOCRState:
+    """In-memory job table shared by all request handler threads."""
+
+    def __init__(self, job_latency: float, page_latency: float, default_pages: int):
+        self.job_latency = job_latency
+        self.page_latency = page_latency
+        self.default_pages = default_pages
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.status_requests = 0
+
+    def submit(self, file_path: str, page_numbers) -> str:
+        page_numbers = page_numbers or list(range(1, self.default_pages + 1))
+        job_id = str(uuid.uuid4())
+        with self.lock:
+            self.jobs[job_id] = {
+                "file_path": file_path,
+                "page_numbers": page_numbers,
+                "ready_at": time.monotonic() + self.job_latency + self.page_latency * len(page_numbers)
+            }
+        return job_id
+
+    def status(self, job_id: str):
+        with self.lock:
+            self.status_requests += 1
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if time.monotonic() < job["ready_at"]:
+            return "IN_PROGRESS"
+        return "FAILED" if "fail" in job["file_path"] else "SUCCEEDED"
+
+
+def make_handler(state: FakeOCRState):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: dict):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/jobs":
+                return self._send(404, {"error": "not found"})
+
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job_id = state.submit(request.get("file_path", ""), request.get("page_numbers"))
+            self._send(202, {"job_id": job_id})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+
+            if len(parts) < 2 or parts[0] != "jobs":
+                return self._send(404, {"error": "not found"})
+
+            job_id = parts[1]
+            status = state.status(job_id)
+            if status is None:
+                return self._send(404, {"error": "unknown job"})
+
+            job = state.jobs[job_id]
+            if len(parts) == 2:
+                return self._send(200, {"status": status, "page_count": len(job["page_numbers"])})
+
+            if parts[2] == "pages" and status == "SUCCEEDED":
+                query = parse_qs(url.query)
+                offset = int(query.get("offset", ["0"])[0])
+                limit = int(query.get("limit", ["50"])[0])
+                numbers = job["page_numbers"][offset:offset + limit]
+                next_offset = offset + limit if offset + limit < len(job["page_numbers"]) else None
+                return self._send(200, {
+                    "pages": [{**MOCK_PAGE, "page_number": n} for n in numbers],
+                    "next_offset": next_offset
+                })
+
+            self._send(409, {"error": f"job is {status}"})
+
+    return Handler
+
+
+def start_fake_ocr_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    job_latency: float = 1.0,
+    page_latency: float = 0.0,
+    default_pages: int = 1
+):
+    """
+    Start the server on a background thread.
+
+    Returns:
+        (server, state); server.server_address has the bound port and
+        server.shutdown() stops it
+    """
+    state = FakeOCRState(job_latency, page_latency, default_pages)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Fake asynchronous OCR server")
+    arg_parser.add_argument("--host", default="0.0.0.0")
+    arg_parser.add_argument("--port", type=int, default=8100)
+    arg_parser.add_argument("--job-latency", type=float, default=10.0)
+    arg_parser.add_argument("--page-latency", type=float, default=0.5)
+    arg_parser.add_argument("--pages", type=int, default=1, help="Pages per job when none are given")
+    args = arg_parser.parse_args()
+
+    state = FakeOCRState(args.job_latency, args.page_latency, args.pages)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"Fake OCR server listening on {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
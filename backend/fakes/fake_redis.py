@@ -0,0 +1,252 @@
+"""
+In-memory stand-in for the subset of the redis-py client used by the
+scheduler, admission control, read routing and the response cache
+(strings, lists, sets, sorted sets, hashes, pipelines).
+
+Values are stored and returned as bytes, like redis-py without
+decode_responses. Expiry times are accepted and ignored.
+
+Usage:
+    from fakes.fake_redis import FakeRedis, FakeAsyncRedis
+    client = FakeRedis()
+    async_client = FakeAsyncRedis(client)
+"""
+
+import threading
+
+
+def _bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+class FakeRedis:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data = {}
+
+    # Strings
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key, value, nx=False, ex=None, px=None):
+        with self._lock:
+            if nx and key in self._data:
+                return None
+            self._data[key] = _bytes(value)
+            return True
+
+    def incrby(self, key, amount=1):
+        with self._lock:
+            value = int(self._data.get(key, b"0")) + amount
+            self._data[key] = _bytes(value)
+            return value
+
+    def decrby(self, key, amount=1):
+        return self.incrby(key, -amount)
+
+    def exists(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if key in self._data)
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def expire(self, key, seconds):
+        return key in self._data
+
+    # Lists
+
+    def rpush(self, key, *values):
+        with self._lock:
+            items = self._data.setdefault(key, [])
+            items.extend(_bytes(value) for value in values)
+            return len(items)
+
+    def lpop(self, key):
+        with self._lock:
+            items = self._data.get(key)
+            if not items:
+                return None
+            value = items.pop(0)
+            if not items:
+                del self._data[key]
+            return value
+
+    def lindex(self, key, index):
+        with self._lock:
+            items = self._data.get(key, [])
+            try:
+                return items[index]
+            except IndexError:
+                return None
+
+    def llen(self, key):
+        with self._lock:
+            return len(self._data.get(key, []))
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            items = self._data.get(key, [])
+            return list(items[start:] if end == -1 else items[start:end + 1])
+
+    # Sets
+
+    def sadd(self, key, *values):
+        with self._lock:
+            members = self._data.setdefault(key, set())
+            added = {_bytes(value) for value in values} - members
+            members.update(added)
+            return len(added)
+
+    def srem(self, key, *values):
+        with self._lock:
+            members = self._data.get(key, set())
+            removed = {_bytes(value) for value in values} & members
+            members.difference_update(removed)
+            if not members:
+                self._data.pop(key, None)
+            return len(removed)
+
+    def smembers(self, key):
+        with self._lock:
+            return set(self._data.get(key, set()))
+
+    # Hashes
+
+    def hget(self, key, field):
+        with self._lock:
+            return self._data.get(key, {}).get(_bytes(field))
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        with self._lock:
+            fields = self._data.setdefault(key, {})
+            updates = dict(mapping or {})
+            if field is not None:
+                updates[field] = value
+            for name, item in updates.items():
+                fields[_bytes(name)] = _bytes(item)
+            return len(updates)
+
+    def hdel(self, key, *fields):
+        with self._lock:
+            values = self._data.get(key, {})
+            return sum(1 for field in fields if values.pop(_bytes(field), None) is not None)
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self._data.get(key, {}))
+
+    def hincrby(self, key, field, amount=1):
+        with self._lock:
+            fields = self._data.setdefault(key, {})
+            value = int(fields.get(_bytes(field), b"0")) + amount
+            fields[_bytes(field)] = _bytes(value)
+            return value
+
+    # Sorted sets (stored as member -> score dicts)
+
+    def zadd(self, key, mapping, xx=False, ch=False):
+        with self._lock:
+            scores = self._data.get(key, {})
+            added = changed = 0
+            for member, score in mapping.items():
+                member = _bytes(member)
+                if xx and member not in scores:
+                    continue
+                added += member not in scores
+                changed += scores.get(member) != float(score)
+                scores[member] = float(score)
+            if scores:
+                self._data[key] = scores
+            return changed if ch else added
+
+    def zrank(self, key, member):
+        with self._lock:
+            ranked = sorted(self._data.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+            return next((rank for rank, (name, _) in enumerate(ranked) if name == _bytes(member)), None)
+
+    def zscore(self, key, member):
+        with self._lock:
+            return self._data.get(key, {}).get(_bytes(member))
+
+    def zremrangebyscore(self, key, low, high):
+        with self._lock:
+            scores = self._data.get(key, {})
+            expired = [member for member, score in scores.items() if float(low) <= score <= float(high)]
+            for member in expired:
+                del scores[member]
+            return len(expired)
+
+    def zcard(self, key):
+        with self._lock:
+            return len(self._data.get(key, {}))
+
+    def zrem(self, key, *members):
+        with self._lock:
+            scores = self._data.get(key, {})
+            return sum(1 for member in members if scores.pop(_bytes(member), None) is not None)
+
+    def zpopmin(self, key, count=1):
+        with self._lock:
+            scores = self._data.get(key, {})
+            popped = sorted(scores.items(), key=lambda item: (item[1], item[0]))[:count]
+            for member, _ in popped:
+                del scores[member]
+            return popped
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them on execute(), returning their results."""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            results = [command(*args, **kwargs) for command, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+
+class FakeAsyncRedis:
+    """redis.asyncio-style facade over a FakeRedis (shares its data)."""
+
+    def __init__(self, client=None):
+        self.client = client or FakeRedis()
+
+    def pipeline(self, transaction=True):
+        return FakeAsyncPipeline(self.client)
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        async def call(*args, **kwargs):
+            return command(*args, **kwargs)
+
+        return call
+
+
+class FakeAsyncPipeline(FakePipeline):
+    """Commands queue synchronously, execute() is awaited (as in redis.asyncio)."""
+
+    async def execute(self):
+        return FakePipeline.execute(self)
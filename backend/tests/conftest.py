@@ -0,0 +1,48 @@
+"""
+Shared fixtures: a SQLite database with the full schema, and shared stats
+on an in-memory Redis.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.metrics as app_metrics
+from app.database import Base
+from fakes.fake_redis import FakeRedis
+
+
+@pytest.fixture
+def database_url():
+    """In-memory by default; override with a file URL where a second (async) engine must see the data."""
+    return "sqlite://"
+
+
+@pytest.fixture
+def engine(database_url):
+    """SQLite engine with all tables (one connection shared across threads)."""
+    engine = create_engine(database_url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    db = session_factory()
+    yield db
+    db.close()
+
+
+@pytest.fixture(autouse=True)
+def shared_stats(monkeypatch):
+    """SharedStats on a fresh FakeRedis, so no test reaches a real Redis."""
+    stats = app_metrics.SharedStats(FakeRedis())
+    monkeypatch.setattr(app_metrics, "_shared_stats", stats)
+    return stats
@@ -0,0 +1,106 @@
+"""
+Test suite for upload admission control.
+"""
+
+import pytest
+
+from app.admission import QueueMonitor, QueueFullError, UploadAdmission, TASK_SECONDS_KEY
+from app.scheduling import PENDING_KEY
+from fakes.fake_redis import FakeRedis
+
+
+def redis_with_backlog(queue_depth=0, held=0, bulk_depth=0):
+    client = FakeRedis()
+    for _ in range(queue_depth):
+        client.rpush("interactive", "task")
+    for _ in range(bulk_depth):
+        client.rpush("bulk", "task")
+    client.set(PENDING_KEY, held)
+    return client
+
+
+class DownRedis:
+
+    def get(self, key):
+        raise ConnectionError("redis down")
+
+    def pipeline(self, transaction=True):
+        raise ConnectionError("redis down")
+
+
+def monitor(client, **kwargs):
+    options = {"max_queue_depth": 100, "max_wait_seconds": 600, "worker_slots": 4, "default_task_seconds": 30}
+    options.update(kwargs)
+    return QueueMonitor(client, **options)
+
+
+class TestQueueMonitor:
+
+    def test_drain_time_uses_recorded_task_time(self):
+        client = redis_with_backlog(queue_depth=40)
+        queue = monitor(client)
+        assert queue.status()["estimated_drain_seconds"] == 300.0
+
+        queue.record_task_seconds(10)
+        queue.record_task_seconds(20)
+
+        # First sample seeds the average, later samples are smoothed (alpha 0.2)
+        assert float(client.get(TASK_SECONDS_KEY)) == pytest.approx(12.0)
+        assert queue.status()["estimated_drain_seconds"] == pytest.approx(120.0)
+
+    def test_documents_held_by_fair_scheduler_count_as_backlog(self):
+        status = monitor(redis_with_backlog(queue_depth=5, held=35)).status()
+        assert status["queues"] == {"interactive": 5, "bulk": 0, "held": 35}
+        assert status["queue_depth"] == 40
+
+    def test_upload_admitted_below_limits(self):
+        assert monitor(redis_with_backlog(queue_depth=10)).check()["queue_depth"] == 10
+
+    def test_depth_over_limit_is_rejected_with_retry_after(self):
+        client = redis_with_backlog(queue_depth=120)
+        client.set(TASK_SECONDS_KEY, "2")
+
+        with pytest.raises(QueueFullError) as rejected:
+            monitor(client).check()
+
+        # 21 documents over the limit at 4 slots x 2s
+        assert rejected.value.retry_after == 11
+
+    def test_estimated_wait_over_limit_is_rejected(self):
+        client = redis_with_backlog(queue_depth=90)
+        client.set(TASK_SECONDS_KEY, "40")
+
+        with pytest.raises(QueueFullError) as rejected:
+            monitor(client).check()
+
+        assert rejected.value.retry_after == 300
+
+    def test_bulk_backlog_does_not_reject_interactive_uploads(self):
+        queue = monitor(redis_with_backlog(queue_depth=3, held=400, bulk_depth=8))
+
+        assert queue.check("interactive")["queue_depth"] == 411
+        with pytest.raises(QueueFullError):
+            queue.check()
+
+    def test_batch_counts_every_incoming_document(self):
+        queue = monitor(redis_with_backlog(bulk_depth=99), default_task_seconds=1)
+
+        assert queue.check(incoming=1)["queue_depth"] == 99
+        with pytest.raises(QueueFullError, match="with 2 more"):
+            queue.check(incoming=2)
+
+    def test_oversized_batch_is_admitted_into_an_empty_queue(self):
+        assert monitor(redis_with_backlog()).check(incoming=250)["queue_depth"] == 0
+        with pytest.raises(QueueFullError):
+            monitor(redis_with_backlog(bulk_depth=1)).check(incoming=250)
+
+
+class TestUploadAdmission:
+
+    def test_unreachable_redis_admits_uploads(self):
+        admission = UploadAdmission(monitor(DownRedis()))
+        admission.check()
+        assert admission.status() is None
+
+    def test_disabled_admission_never_rejects(self):
+        UploadAdmission(monitor(redis_with_backlog(queue_depth=10_000)), enabled=False).check()
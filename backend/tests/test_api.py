@@ -0,0 +1,313 @@
+"""
+Test suite for the HTTP API: routing, status codes and the async read path.
+
+Sync endpoints use the test database through get_db; async endpoints read
+the same SQLite file through aiosqlite (the dependencies used in production,
+pointed at the test engine).
+"""
+
+import csv
+import io
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.admission
+import app.export
+import app.read_routing
+import app.response_cache
+import app.stage_state
+from app.admission import QueueMonitor, UploadAdmission
+from app.database import Base, async_database_url, get_db
+from app.materialization import replace_document_rows
+from app.models import Case, Document, DocumentStatus, DocumentType
+from app.response_cache import ResponseCache
+from app.serialization import document_row_response, encode_json
+from app.stage_state import create_stage_state
+from fakes.fake_redis import FakeAsyncRedis, FakeRedis
+
+BILL = {
+    "invoice_number": "INV-204",
+    "total_amount": 370.0,
+    "provider": "Spine Clinic",
+    "line_items": [
+        {"date_of_service": "2024-03-01", "cpt_code": "99214", "description": "Office visit",
+         "charged_amount": 250.0, "allowed_amount": 180.0},
+        {"date_of_service": "2024-03-08", "cpt_code": "97110", "description": "Therapeutic exercise",
+         "charged_amount": 120.0, "allowed_amount": 90.0}
+    ]
+}
+CHRONOLOGY = {
+    "patient_name": "Jennifer Martinez",
+    "events": [{"date": "2024-02-14", "provider": "Memorial Regional Hospital", "encounter_type": "Emergency Visit",
+                "summary": "Acute appendicitis.", "diagnosis_codes": ["K35.20"]}]
+}
+
+
+@pytest.fixture(scope="module")
+def main():
+    # Importing the app creates tables on the configured database and the uploads directory
+    with mock.patch.object(Base.metadata, "create_all"), mock.patch.object(Path, "mkdir"):
+        import app.main
+    return app.main
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    # A file, so the async engine sees the rows written through the sync one
+    return f"sqlite:///{tmp_path / 'api.db'}"
+
+
+@pytest.fixture
+def read_sessions(database_url, monkeypatch):
+    """Sessions opened by the async read dependencies (closed ones are tracked)."""
+    async_engine = create_async_engine(async_database_url(database_url), poolclass=NullPool)
+    closed = []
+
+    class TrackedSession(AsyncSession):
+        async def close(self):
+            await super().close()
+            closed.append(self)
+
+    factory = async_sessionmaker(async_engine, class_=TrackedSession, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(app.read_routing, "get_async_session_factory", lambda: factory)
+    return closed
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def client(main, session_factory, read_sessions, redis, tmp_path, monkeypatch):
+    def get_test_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    enqueued = []
+    monkeypatch.setitem(main.app.dependency_overrides, get_db, get_test_db)
+    monkeypatch.setattr(main, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(main, "enqueue_document", lambda document_id, lane, **kwargs: enqueued.append((document_id, lane)))
+    monkeypatch.setattr(main, "dispatch_documents", lambda entries, **kwargs: enqueued.extend(
+        (entry["document_id"], "bulk") for entry in entries
+    ))
+    monkeypatch.setattr(app.admission, "_admission", UploadAdmission(QueueMonitor(
+        redis, max_queue_depth=10, max_wait_seconds=10_000, default_task_seconds=1
+    )))
+    monkeypatch.setattr(app.response_cache, "_response_cache", ResponseCache(redis, FakeAsyncRedis(redis)))
+    monkeypatch.setattr(app.stage_state, "_stage_state", create_stage_state("memory"))
+    with TestClient(main.app) as client:
+        client.enqueued = enqueued
+        yield client
+
+
+@pytest.fixture
+def case_id(db):
+    case = Case(name="Martinez v. Acme")
+    db.add(case)
+    db.commit()
+    return case.id
+
+
+def add_completed(db, case_id, document_type, result):
+    document = Document(
+        filename="record.pdf", status=DocumentStatus.COMPLETED, document_type=document_type,
+        case_id=case_id, extraction_result=result
+    )
+    db.add(document)
+    db.flush()
+    replace_document_rows(db, document.id, case_id, document_type, result)
+    # As the worker's final write: updated_at set explicitly, matching the stored body
+    document.updated_at = datetime.utcnow()
+    document.response_body = encode_json(document_row_response(document))
+    db.commit()
+    return document.id
+
+
+def pdf(name="record.pdf"):
+    return (name, b"%PDF-1.4 test", "application/pdf")
+
+
+class TestUploads:
+
+    def test_upload_is_enqueued(self, client, case_id):
+        response = client.post("/api/v1/documents/upload", files={"file": pdf()}, data={"case_id": case_id})
+
+        assert response.status_code == 200
+        assert response.json()["case_id"] == case_id
+        assert client.enqueued == [(response.json()["document_id"], "interactive")]
+
+    def test_rejected_uploads(self, client):
+        assert client.post("/api/v1/documents/upload", files={"file": ("a.txt", b"x", "text/plain")}).status_code == 400
+        assert client.post("/api/v1/documents/upload", files={"file": pdf()}, data={"case_id": 999}).status_code == 404
+
+    def test_bulk_backlog_does_not_block_single_uploads(self, client, redis):
+        for _ in range(50):
+            redis.rpush("bulk", "task")
+
+        assert client.post("/api/v1/documents/upload", files={"file": pdf()}).status_code == 200
+        response = client.post("/api/v1/documents/bulk", files=[("files", pdf())])
+        assert response.status_code == 429 and "Retry-After" in response.headers
+
+    def test_bulk_upload_counts_every_file(self, client, redis):
+        for _ in range(8):
+            redis.rpush("bulk", "task")
+
+        rejected = client.post("/api/v1/documents/bulk", files=[("files", pdf(f"{i}.pdf")) for i in range(3)])
+        admitted = client.post("/api/v1/documents/bulk", files=[("files", pdf(f"{i}.pdf")) for i in range(2)])
+
+        assert rejected.status_code == 429
+        assert admitted.status_code == 200 and admitted.json()["document_count"] == 2
+
+
+class TestDocumentReads:
+
+    def test_completed_document_is_served_from_response_body_then_cache(self, client, db, redis):
+        document_id = add_completed(db, None, DocumentType.BILL, BILL)
+        body = db.get(Document, document_id).response_body
+
+        first = client.get(f"/api/v1/documents/{document_id}")
+        second = client.get(f"/api/v1/documents/{document_id}")
+
+        assert first.content == second.content == body
+        assert client.get("/api/v1/cache/stats").json()["response_cache"]["misses"] == 1
+        assert client.get("/api/v1/cache/stats").json()["response_cache"]["hits"] == 1
+
+    def test_cache_stats_include_llm_cache_of_workers(self, client, shared_stats):
+        shared_stats.incr("llm_cache", "extract_bill.hits", 3)
+        shared_stats.incr("llm_cache", "extract_bill.misses")
+
+        assert client.get("/api/v1/cache/stats").json()["llm_cache"]["hit_rate"] == 0.75
+
+    def test_lane_stats(self, client, shared_stats):
+        shared_stats.observe("lane.interactive.time_to_result", 4.0)
+
+        lanes = client.get("/api/v1/lanes/stats").json()
+        assert lanes["interactive"]["time_to_result"]["count"] == 1
+        assert lanes["interactive"]["time_to_result"]["p95_seconds_at_most"] == 5.0
+        assert lanes["bulk"]["wait"]["count"] == 0
+
+    def test_in_flight_document_and_missing_document(self, client, db):
+        document = Document(filename="scan.pdf", status=DocumentStatus.PROCESSING)
+        db.add(document)
+        db.commit()
+
+        assert client.get(f"/api/v1/documents/{document.id}").json()["status"] == "PROCESSING"
+        assert client.get("/api/v1/documents/999").status_code == 404
+        assert client.get("/api/v1/documents").json()["count"] == 1
+
+    def test_events_line_items_and_totals(self, client, db, case_id):
+        add_completed(db, case_id, DocumentType.BILL, BILL)
+        add_completed(db, case_id, DocumentType.CHRONOLOGY, CHRONOLOGY)
+
+        assert client.get("/api/v1/events", params={"code": "K35.20"}).json()["count"] == 1
+        assert client.get("/api/v1/line-items", params={"cpt": "99214"}).json()["count"] == 1
+        totals = client.get("/api/v1/line-items/totals", params={"group_by": "provider"}).json()["totals"]
+        assert totals[0]["charged_amount"] == 370.0
+        assert client.get("/api/v1/line-items/totals", params={"group_by": "color"}).status_code == 400
+
+    def test_search(self, client, db, case_id):
+        add_completed(db, case_id, DocumentType.CHRONOLOGY, CHRONOLOGY)
+
+        response = client.get("/api/v1/search", params={"q": "memorial", "kinds": "providers"})
+
+        assert response.status_code == 200
+        assert [(hit["kind"], hit["value"]) for hit in response.json()["hits"]] == [
+            ("provider", "Memorial Regional Hospital")
+        ]
+        assert client.get("/api/v1/search", params={"q": "memorial", "kinds": "colors"}).status_code == 400
+        assert client.get("/api/v1/search", params={"q": "x"}).status_code == 422
+
+
+class TestCases:
+
+    def test_timeline(self, client, db):
+        case_id = client.post("/api/v1/cases", json={"name": "Martinez v. Acme"}).json()["case_id"]
+        add_completed(db, case_id, DocumentType.CHRONOLOGY, CHRONOLOGY)
+
+        timeline = client.get(f"/api/v1/cases/{case_id}/timeline").json()
+
+        assert [entry["date"] for entry in timeline["entries"]] == ["2024-02-14"]
+        assert timeline["next_cursor"] is None
+        assert client.get(f"/api/v1/cases/{case_id}/timeline", params={"cursor": "bad"}).status_code == 400
+        assert client.get("/api/v1/cases/999/timeline").status_code == 404
+
+    def test_bills_summary(self, client, db, case_id):
+        add_completed(db, case_id, DocumentType.BILL, BILL)
+
+        summary = client.get(f"/api/v1/cases/{case_id}/bills/summary", params={"group_by": "cpt_code"}).json()
+
+        assert summary["totals"] == {"line_items": 2, "charged_amount": 370.0, "allowed_amount": 270.0}
+        assert [group["key"] for group in summary["groups"]] == ["99214", "97110"]
+        assert client.get(f"/api/v1/cases/{case_id}/bills/summary", params={"group_by": "x"}).status_code == 400
+        assert client.get("/api/v1/cases/999/bills/summary").status_code == 404
+
+
+class TestExtractionEdits:
+
+    def test_edit_is_served_afterwards(self, client, db, case_id):
+        document_id = add_completed(db, case_id, DocumentType.BILL, BILL)
+        assert client.get(f"/api/v1/documents/{document_id}").status_code == 200
+
+        response = client.patch(f"/api/v1/documents/{document_id}/extraction", json={"invoice_number": "INV-205"})
+
+        assert response.status_code == 200
+        assert client.get(f"/api/v1/documents/{document_id}").content == response.content
+        assert orjson.loads(response.content)["extraction_result"]["invoice_number"] == "INV-205"
+
+    def test_if_match_precondition(self, client, db, case_id):
+        document_id = add_completed(db, case_id, DocumentType.BILL, BILL)
+        version = client.get(f"/api/v1/documents/{document_id}").json()["updated_at"]
+
+        first = client.patch(
+            f"/api/v1/documents/{document_id}/extraction", json={"invoice_number": "A"}, headers={"If-Match": f'"{version}"'}
+        )
+        second = client.patch(
+            f"/api/v1/documents/{document_id}/extraction", json={"invoice_number": "B"}, headers={"If-Match": f'"{version}"'}
+        )
+
+        assert first.status_code == 200 and second.status_code == 409
+
+    def test_edit_errors(self, client, db, case_id):
+        document_id = add_completed(db, case_id, DocumentType.BILL, BILL)
+        in_flight = Document(filename="scan.pdf", status=DocumentStatus.PROCESSING)
+        db.add(in_flight)
+        db.commit()
+
+        assert client.patch(f"/api/v1/documents/{document_id}/extraction", json={"color": 1}).status_code == 400
+        assert client.patch(f"/api/v1/documents/{in_flight.id}/extraction", json={"total_amount": 1}).status_code == 409
+        assert client.patch("/api/v1/documents/999/extraction", json={"total_amount": 1}).status_code == 404
+
+
+class TestExport:
+
+    def test_streamed_export_completes_and_closes_its_session(self, client, db, case_id, read_sessions, monkeypatch):
+        monkeypatch.setattr(app.export, "EXPORT_BATCH_SIZE", 1)
+        for _ in range(3):
+            add_completed(db, case_id, DocumentType.BILL, BILL)
+        closed_before = len(read_sessions)
+
+        response = client.get("/api/v1/export/line_items", params={"case_id": case_id})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "content-length" not in response.headers
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 6
+        # The dependency's session was closed once the stream had been sent
+        assert len(read_sessions) == closed_before + 1
+
+    def test_export_errors(self, client):
+        assert client.get("/api/v1/export/patients").status_code == 404
+        assert client.get("/api/v1/export/events", params={"format": "xlsx"}).status_code == 400
+        assert client.get("/api/v1/export/events", params={"case_id": 999}).status_code == 404
@@ -0,0 +1,119 @@
+"""
+Test suite for submit/poll OCR tasks against the local fake async OCR server.
+"""
+
+import time
+from unittest import mock
+
+import pytest
+
+import app.llm_cache
+import app.page_store
+import app.response_cache
+import app.stage_state
+import app.tasks as tasks
+from app.models import Document, DocumentStatus
+from app.response_cache import ResponseCache
+from app.ocr_service import HTTPOCRBackend
+from app.stage_state import create_stage_state
+from app.worker_resources import WorkerResources
+from fakes.fake_ocr_server import start_fake_ocr_server
+
+
+@pytest.fixture
+def pipeline(session_factory, tmp_path, monkeypatch):
+    """SQLite session factory, fake OCR server and captured task enqueues."""
+    server, state = start_fake_ocr_server(job_latency=0.3, default_pages=3)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    enqueued = []
+    task_seconds = []
+    monkeypatch.setattr(tasks, "SessionLocal", session_factory)
+    monkeypatch.setattr(tasks, "get_admission", lambda: mock.Mock(record_task_seconds=task_seconds.append))
+    monkeypatch.setattr(app.page_store, "OCR_STORE_DIR", tmp_path / "ocr")
+    monkeypatch.setattr(app.llm_cache, "LLM_CACHE_DIR", tmp_path / "llm_cache")
+    monkeypatch.setattr(app.stage_state, "_stage_state", create_stage_state("memory"))
+    monkeypatch.setattr(app.response_cache, "_response_cache", ResponseCache())
+    resources = WorkerResources(ocr_backend=HTTPOCRBackend(base_url, page_size=2))
+    monkeypatch.setattr(tasks, "get_worker_resources", lambda: resources)
+    monkeypatch.setattr(
+        tasks.submit_ocr, "apply_async",
+        lambda args, **options: enqueued.append(("submit", args, 0))
+    )
+    monkeypatch.setattr(
+        tasks.poll_ocr_job, "apply_async",
+        lambda args, countdown, **options: enqueued.append(("poll", args, countdown))
+    )
+
+    yield session_factory, state, enqueued, task_seconds
+    server.shutdown()
+
+
+def create_document(session_factory, file_path):
+    db = session_factory()
+    document = Document(filename="scan.pdf", status=DocumentStatus.QUEUED, file_path=str(file_path))
+    db.add(document)
+    db.commit()
+    document_id = document.id
+    db.close()
+    return document_id
+
+
+def run_until_done(enqueued, max_polls=50):
+    """Drain the captured queue the way a worker would, without sleeping for countdowns."""
+    result = None
+    for _ in range(max_polls):
+        kind, args, _ = enqueued.pop(0)
+        result = (tasks.submit_ocr if kind == "submit" else tasks.poll_ocr_job)(*args)
+        if not enqueued:
+            return result
+        time.sleep(0.05)
+    raise AssertionError("OCR job never finished")
+
+
+class TestAsyncOCRTasks:
+
+    def test_submit_poll_completes_document(self, pipeline, tmp_path):
+        session_factory, state, enqueued, task_seconds = pipeline
+        scan = tmp_path / "scan.pdf"
+        scan.write_bytes(b"scanned image, no text layer")
+        document_id = create_document(session_factory, scan)
+
+        assert tasks.process_document(document_id)["status"] == "ocr_submitted"
+        result = run_until_done(enqueued)
+
+        assert result["status"] == "success"
+        assert result["words_extracted"] == 3 * 12
+
+        db = session_factory()
+        document = db.get(Document, document_id)
+        assert document.status == DocumentStatus.COMPLETED
+        assert app.page_store.OCRPageStore.for_document(document_id).page_numbers() == [1, 2, 3]
+        db.close()
+
+        # The job was polled more than once, each poll a separate short task
+        assert state.status_requests >= 2
+        # Submit and each poll report their time to admission control
+        assert len(task_seconds) >= 3
+        assert not app.page_store.OCRPageStore.for_document(document_id, variant="text").exists()
+
+    def test_poll_backoff_grows_and_is_capped(self):
+        delays = [tasks.next_poll_delay(attempt) for attempt in range(10)]
+        assert delays == sorted(delays)
+        assert delays[0] == tasks.OCR_POLL_INITIAL_DELAY
+        assert max(delays) == tasks.OCR_POLL_MAX_DELAY
+
+    def test_failed_job_marks_document_failed(self, pipeline, tmp_path):
+        session_factory, _, enqueued, _ = pipeline
+        scan = tmp_path / "fail.pdf"
+        scan.write_bytes(b"scanned image, no text layer")
+        document_id = create_document(session_factory, scan)
+
+        tasks.process_document(document_id)
+        result = run_until_done(enqueued)
+
+        assert result["status"] == "error"
+        db = session_factory()
+        assert db.get(Document, document_id).status == DocumentStatus.FAILED
+        db.close()
+        assert not app.page_store.OCRPageStore.for_document(document_id, variant="text").exists()
@@ -0,0 +1,197 @@
+"""
+Test suite for precomputed bill aggregates and extraction edits.
+"""
+
+from datetime import date, datetime
+from unittest import mock
+
+import orjson
+import pytest
+
+import app.edits as edits
+from app.bill_aggregates import summary_query, summary_response
+from app.edits import ExtractionEditError, edit_extraction
+from app.materialization import replace_document_rows
+from app.models import BillAggregate, Case, Document, DocumentStatus, DocumentType
+
+
+def item(day, cpt, charged, allowed=None, provider=None):
+    return {
+        "date_of_service": day,
+        "cpt_code": cpt,
+        "description": "Service",
+        "charged_amount": charged,
+        "allowed_amount": allowed,
+        **({"provider": provider} if provider else {})
+    }
+
+
+def bill(provider, *items):
+    return {"invoice_number": "INV-1", "total_amount": sum(i["charged_amount"] for i in items),
+            "provider": provider, "line_items": list(items)}
+
+
+CLINIC_BILL = bill(
+    "Spine Clinic",
+    item("2024-03-01", "99214", 250.00, 180.00),
+    item("2024-03-01", "97110", 120.00, 90.00),
+    item("2024-03-08", "97110", 120.00, 90.00)
+)
+HOSPITAL_BILL = bill(
+    "Memorial Hospital",
+    item("2024-02-14", "99285", 1800.00, 950.00),
+    item("unknown", "74177", 2400.00)
+)
+
+
+@pytest.fixture
+def case_id(db):
+    case = Case(name="Martinez v. Acme")
+    db.add(case)
+    db.commit()
+    return case.id
+
+
+def add_bill(db, case_id, result):
+    document = Document(
+        filename="bill.pdf", status=DocumentStatus.COMPLETED, document_type=DocumentType.BILL,
+        case_id=case_id, extraction_result=result
+    )
+    db.add(document)
+    db.commit()
+    replace_document_rows(db, document.id, case_id, DocumentType.BILL, result)
+    db.commit()
+    return document
+
+
+def summary(db, case_id, group_by=None, **filters):
+    statement = summary_query(case_id, group_by, **filters)
+    if group_by:
+        return [summary_response(row) for row in db.execute(statement).all()]
+    return summary_response(db.execute(statement).one())
+
+
+class TestAggregates:
+
+    def test_bills_of_a_case_are_summed_per_group(self, db, case_id):
+        add_bill(db, case_id, CLINIC_BILL)
+        add_bill(db, case_id, HOSPITAL_BILL)
+
+        # One row per (provider, CPT code, date of service)
+        assert db.query(BillAggregate).count() == 5
+        assert summary(db, case_id) == {"line_items": 5, "charged_amount": 4690.0, "allowed_amount": 1310.0}
+        assert summary(db, case_id, "provider") == [
+            {"key": "Memorial Hospital", "line_items": 2, "charged_amount": 4200.0, "allowed_amount": 950.0},
+            {"key": "Spine Clinic", "line_items": 3, "charged_amount": 490.0, "allowed_amount": 360.0}
+        ]
+
+    def test_undated_line_items_form_their_own_group(self, db, case_id):
+        add_bill(db, case_id, HOSPITAL_BILL)
+
+        assert summary(db, case_id, "service_date") == [
+            {"key": None, "line_items": 1, "charged_amount": 2400.0, "allowed_amount": 0.0},
+            {"key": "2024-02-14", "line_items": 1, "charged_amount": 1800.0, "allowed_amount": 950.0}
+        ]
+
+    def test_filters(self, db, case_id):
+        add_bill(db, case_id, CLINIC_BILL)
+        add_bill(db, case_id, HOSPITAL_BILL)
+
+        assert summary(db, case_id, cpt=" 97110 ")["charged_amount"] == 240.0
+        assert summary(db, case_id, "cpt_code", date_from=date(2024, 3, 1), date_to=date(2024, 3, 5)) == [
+            {"key": "99214", "line_items": 1, "charged_amount": 250.0, "allowed_amount": 180.0},
+            {"key": "97110", "line_items": 1, "charged_amount": 120.0, "allowed_amount": 90.0}
+        ]
+        assert summary(db, case_id, provider="Nobody") == {"line_items": 0, "charged_amount": 0.0, "allowed_amount": 0.0}
+
+    def test_reprocessing_applies_only_the_difference(self, db, case_id):
+        document = add_bill(db, case_id, CLINIC_BILL)
+        add_bill(db, case_id, bill("Spine Clinic", item("2024-03-01", "97110", 100.00, 80.00)))
+
+        replace_document_rows(db, document.id, case_id, DocumentType.BILL, bill(
+            "Spine Clinic", item("2024-03-01", "97110", 130.00, 90.00)
+        ))
+        db.commit()
+
+        assert summary(db, case_id, "cpt_code") == [
+            {"key": "97110", "line_items": 2, "charged_amount": 230.0, "allowed_amount": 170.0}
+        ]
+        # Groups the bill no longer reports are gone
+        assert db.query(BillAggregate).count() == 1
+
+    def test_failed_bill_is_subtracted(self, db, case_id):
+        document = add_bill(db, case_id, CLINIC_BILL)
+        add_bill(db, case_id, HOSPITAL_BILL)
+
+        replace_document_rows(db, document.id, case_id)
+        db.commit()
+
+        assert summary(db, case_id)["charged_amount"] == 4200.0
+        assert db.query(BillAggregate).count() == 2
+
+    def test_documents_without_case_are_not_aggregated(self, db, case_id):
+        add_bill(db, None, CLINIC_BILL)
+
+        assert db.query(BillAggregate).count() == 0
+
+
+class TestEdits:
+
+    @pytest.fixture(autouse=True)
+    def no_redis(self):
+        with mock.patch.object(edits, "get_recent_writes"), mock.patch.object(edits, "get_response_cache"):
+            yield
+
+    def test_edit_updates_aggregates_and_response_body(self, db, case_id):
+        document = add_bill(db, case_id, CLINIC_BILL)
+        line_items = [dict(line) for line in CLINIC_BILL["line_items"]]
+        line_items[0]["charged_amount"] = 300.00
+
+        body = edit_extraction(db, document.id, {"line_items": line_items, "total_amount": 540.00})
+
+        assert summary(db, case_id)["charged_amount"] == 540.0
+        db.refresh(document)
+        assert document.extraction_result["total_amount"] == 540.0
+        assert document.extraction_result["invoice_number"] == "INV-1"
+        assert document.response_body == body
+        response = orjson.loads(body)
+        assert response["extraction_result"]["line_items"][0]["charged_amount"] == 300.0
+        assert datetime.fromisoformat(response["updated_at"]) == document.updated_at
+
+    def test_edit_rejects_unknown_fields_and_invalid_items(self, db, case_id):
+        document = add_bill(db, case_id, CLINIC_BILL)
+
+        with pytest.raises(ExtractionEditError, match="not editable"):
+            edit_extraction(db, document.id, {"events": []})
+        with pytest.raises(ExtractionEditError, match=r"line_items\[0\]") as error:
+            edit_extraction(db, document.id, {"line_items": [{"cpt_code": "99214"}]})
+        assert error.value.status_code == 400
+
+    def test_boolean_total_is_rejected(self, db, case_id):
+        document = add_bill(db, case_id, CLINIC_BILL)
+
+        with pytest.raises(ExtractionEditError, match="must be a number"):
+            edit_extraction(db, document.id, {"total_amount": True})
+
+    def test_edit_of_a_stale_version_is_rejected(self, db, case_id):
+        document = add_bill(db, case_id, CLINIC_BILL)
+        read_version = document.updated_at.isoformat()
+        edit_extraction(db, document.id, {"invoice_number": "INV-2"}, read_version)
+
+        # A second edit made on the version read before the first one
+        with pytest.raises(ExtractionEditError, match="changed since") as error:
+            edit_extraction(db, document.id, {"invoice_number": "INV-3"}, read_version)
+
+        assert error.value.status_code == 409
+        db.refresh(document)
+        assert document.extraction_result["invoice_number"] == "INV-2"
+        assert edit_extraction(db, 999, {"invoice_number": "INV-3"}) is None
+
+    def test_only_completed_documents_can_be_edited(self, db, case_id):
+        document = Document(filename="bill.pdf", status=DocumentStatus.PROCESSING, case_id=case_id)
+        db.add(document)
+        db.commit()
+
+        with pytest.raises(ExtractionEditError) as error:
+            edit_extraction(db, document.id, {"total_amount": 1.0})
+        assert error.value.status_code == 409
@@ -0,0 +1,139 @@
+"""
+Test suite for map-reduce chunked chronology extraction.
+"""
+
+import threading
+import time
+from app.chunked_extraction import (
+    ChunkedExtractor, split_into_chunks, merge_events, event_key
+)
+
+
+class SlowChunkLLM:
+    """Returns one event per chunk, based on the first word of the chunk."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.texts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def extract_chronology(self, ocr_text):
+        with self.lock:
+            self.texts.append(ocr_text)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+
+        first_page = ocr_text.split()[0]
+        return {
+            "patient_name": "Jennifer Martinez",
+            "events": [
+                {
+                    "date": "2024-02-14",
+                    "provider": "Memorial Regional Hospital",
+                    "encounter_type": "Emergency Visit",
+                    "summary": f"Seen in {first_page}",
+                    "diagnosis_codes": ["K35.20"]
+                },
+                {
+                    "date": f"2024-03-{int(first_page[4:]):02d}",
+                    "provider": "Dr. William Chen",
+                    "encounter_type": "Follow-up",
+                    "summary": "Follow-up visit",
+                    "diagnosis_codes": []
+                }
+            ]
+        }
+
+
+def pages(n, size=100):
+    return [f"page{i} " + "x" * (size - len(f"page{i} ")) for i in range(1, n + 1)]
+
+
+class TestChunking:
+
+    def test_chunks_respect_size_and_overlap(self):
+        chunks = split_into_chunks(pages(10), max_chars=350, overlap_pages=1)
+
+        assert all(len(c.text) <= 351 for c in chunks)
+        assert chunks[0].first_page == 1 and chunks[-1].last_page == 10
+        # Consecutive chunks share exactly one page
+        for previous, current in zip(chunks, chunks[1:]):
+            assert current.first_page == previous.last_page
+
+    def test_small_document_is_a_single_chunk(self):
+        chunks = split_into_chunks(pages(3), max_chars=10000)
+        assert len(chunks) == 1
+        assert chunks[0].text == "\n".join(pages(3)) + "\n"
+
+    def test_oversized_page_is_split_at_whitespace(self):
+        chunks = split_into_chunks(["word " * 100], max_chars=60, overlap_pages=0)
+        assert len(chunks) > 1
+        assert all(len(c.text) <= 60 for c in chunks)
+        assert all(c.first_page == 1 for c in chunks)
+
+    def test_no_chunk_of_only_overlap_before_an_oversized_page(self):
+        chunks = split_into_chunks(["A" * 20, "B" * 20, "word " * 40], max_chars=60, overlap_pages=1)
+
+        assert (chunks[0].first_page, chunks[0].last_page) == (1, 2)
+        # Page 2 is not repeated on its own; the oversized page 3 follows
+        assert [c.first_page for c in chunks[1:]] == [3] * (len(chunks) - 1)
+
+
+class TestMerge:
+
+    def test_same_encounter_from_several_chunks_is_deduplicated(self):
+        events = [
+            {"date": "2024-02-14", "provider": "Memorial Regional Hospital",
+             "encounter_type": "Emergency Visit", "summary": "short", "diagnosis_codes": ["K35.20"]},
+            {"date": "02/14/2024", "provider": "MEMORIAL REGIONAL HOSPITAL",
+             "encounter_type": "Emergency visit", "summary": "a longer summary", "diagnosis_codes": ["R10.31"]},
+            {"date": "2024-01-02", "provider": "Clinic", "encounter_type": "Visit",
+             "summary": "earlier", "diagnosis_codes": []},
+        ]
+
+        merged = merge_events(events)
+
+        assert len(merged) == 2
+        assert merged[0]["summary"] == "earlier"
+        assert merged[1]["summary"] == "a longer summary"
+        assert merged[1]["diagnosis_codes"] == ["K35.20", "R10.31"]
+        assert event_key(events[0]) == event_key(events[1])
+
+    def test_partial_dates_keep_their_text_in_the_key(self):
+        event = {"date": " March 2024 ", "provider": "Clinic", "encounter_type": "Visit"}
+
+        assert event_key(event)[0] == "March 2024"
+        assert event_key({**event, "date": "03/15/2024"})[0] == "2024-03-15"
+
+
+class TestChunkedExtractor:
+
+    def test_chunks_are_extracted_concurrently_and_merged(self):
+        llm = SlowChunkLLM(latency=0.2)
+        extractor = ChunkedExtractor(llm, max_concurrency=4, max_chars=250, overlap_pages=0)
+
+        start = time.monotonic()
+        result = extractor.extract_chronology(pages(8))
+        elapsed = time.monotonic() - start
+
+        assert extractor.last_chunk_count == 4
+        assert 1 < llm.max_in_flight <= 4
+        assert elapsed < 4 * 0.2
+        # One shared emergency visit plus one follow-up per chunk
+        assert len(result["events"]) == 5
+        assert result["patient_name"] == "Jennifer Martinez"
+
+    def test_concurrency_limit_is_respected(self):
+        llm = SlowChunkLLM(latency=0.05)
+        ChunkedExtractor(llm, max_concurrency=2, max_chars=150, overlap_pages=0).extract_chronology(pages(8))
+        assert llm.max_in_flight <= 2
+
+    def test_short_document_uses_a_single_call(self):
+        llm = SlowChunkLLM()
+        ChunkedExtractor(llm, max_chars=10000).extract_chronology(pages(3))
+        assert llm.texts == ["\n".join(pages(3)) + "\n"]
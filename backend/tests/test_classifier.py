@@ -0,0 +1,62 @@
+"""
+Test suite for the heuristic classifier and its LLM fallback.
+"""
+
+from app.classifier import KeywordAutomaton, HeuristicClassifier
+from app.llm_service import MockLLMService
+
+
+class CountingLLM(MockLLMService):
+
+    def __init__(self):
+        self.calls = 0
+
+    def classify_document(self, ocr_text):
+        self.calls += 1
+        return super().classify_document(ocr_text)
+
+
+BILL_PAGE = "INVOICE INV-2024-0891  CPT 99214 charged $285.00  Total charges $685.00  Amount due $685.00"
+RECORD_PAGE = "Progress Note. Chief complaint: abdominal pain. History of present illness... Assessment: appendicitis. Diagnosis K35.20"
+
+
+class TestKeywordAutomaton:
+
+    def test_overlapping_keywords_in_one_pass(self):
+        automaton = KeywordAutomaton(["he", "she", "his", "hers", "history"])
+        counts = automaton.count("She said his HISTORY is hers")
+        assert counts == {"she": 1, "his": 2, "history": 1, "he": 1, "hers": 1}
+
+    def test_matches_start_at_word_boundaries(self):
+        automaton = KeywordAutomaton(["bill", "exam"])
+        assert automaton.count("Billing, anthill, re-exam, example") == {"bill": 1, "exam": 2}
+
+
+class TestHeuristicClassifier:
+
+    def test_clear_documents_skip_the_llm(self):
+        llm = CountingLLM()
+        classifier = HeuristicClassifier(min_margin=0.6)
+
+        bill_type, bill_details = classifier.classify([BILL_PAGE], llm)
+        record_type, record_details = classifier.classify([RECORD_PAGE], llm)
+
+        assert (bill_type, record_type) == ("BILL", "CHRONOLOGY")
+        assert bill_details["method"] == record_details["method"] == "heuristic"
+        assert bill_details["bill_probability"] > 0.8 > record_details["bill_probability"]
+        assert llm.calls == 0
+
+    def test_ambiguous_documents_fall_back_to_llm(self):
+        llm = CountingLLM()
+        doc_type, details = HeuristicClassifier().classify(["Scanned page, no recognizable words"], llm)
+
+        assert details["margin"] == 0.0
+        assert details["method"] == "llm"
+        assert doc_type == "CHRONOLOGY"
+        assert llm.calls == 1
+
+    def test_only_first_pages_are_scanned(self):
+        classifier = HeuristicClassifier(max_pages=2)
+        details = classifier.score([RECORD_PAGE, "visit", BILL_PAGE * 10])
+        assert "invoice" not in details["keyword_counts"]
+        assert details["bill_probability"] < 0.5
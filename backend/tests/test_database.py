@@ -0,0 +1,47 @@
+"""
+Test suite for engine configuration: pool settings and the async engine URL.
+"""
+
+import pytest
+
+import app.database as database
+from app.database import async_database_url, pool_options
+
+
+class TestEngineConfiguration:
+
+    def test_postgres_url_uses_asyncpg_with_statement_cache(self, monkeypatch):
+        monkeypatch.setattr(database, "DB_STATEMENT_CACHE_SIZE", 0)
+        url = async_database_url("postgresql://user:secret@db:5432/medical_mvp")
+
+        assert url == "postgresql+asyncpg://user:secret@db:5432/medical_mvp?prepared_statement_cache_size=0"
+
+    def test_explicit_sync_driver_is_replaced(self):
+        assert async_database_url("postgresql+psycopg2://db/medical_mvp").startswith("postgresql+asyncpg://db/")
+
+    def test_sqlite_keeps_default_pool(self):
+        assert async_database_url("sqlite:///./local.db") == "sqlite+aiosqlite:///./local.db"
+        assert pool_options("sqlite:///./local.db") == {}
+
+    def test_pool_settings_apply_to_postgres(self, monkeypatch):
+        monkeypatch.setattr(database, "DB_POOL_SIZE", 20)
+        monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 5)
+
+        options = pool_options("postgresql://db/medical_mvp")
+
+        assert options["pool_size"] == 20
+        assert options["max_overflow"] == 5
+        assert options["pool_pre_ping"] is True
+
+    def test_async_engine_is_created_lazily_with_pool_settings(self, monkeypatch):
+        pytest.importorskip("asyncpg")
+        monkeypatch.setattr(database, "ASYNC_DATABASE_URL", async_database_url("postgresql://db/medical_mvp"))
+        monkeypatch.setattr(database, "DB_POOL_SIZE", 7)
+        monkeypatch.setattr(database, "_async_engine", None)
+        monkeypatch.setattr(database, "_async_session_factory", None)
+
+        engine = database.get_async_engine()
+
+        assert database.get_async_engine() is engine
+        assert engine.dialect.driver == "asyncpg"
+        assert engine.pool.size() == 7
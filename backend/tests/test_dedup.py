@@ -0,0 +1,110 @@
+"""
+Test suite for MinHash/LSH near-duplicate detection.
+"""
+
+import random
+
+import pytest
+from sqlalchemy import event
+
+from app.dedup import DedupIndex, MinHasher, shingles, similarity, strip_links
+from app.models import Document, DocumentStatus
+
+WORDS = (
+    "patient presented emergency department abdominal pain nausea vomiting fever "
+    "appendicitis laparoscopic appendectomy discharged follow up clinic week "
+    "blood pressure heart rate medication prescribed ibuprofen imaging ct scan"
+).split()
+
+
+def page(seed, length=120):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def rescanned(text, seed):
+    """Copy of a page with a couple of OCR errors."""
+    rng = random.Random(seed)
+    words = text.split()
+    for _ in range(2):
+        words[rng.randrange(len(words))] = "xx"
+    return " ".join(words)
+
+
+def add_document(db, status=DocumentStatus.QUEUED, extraction_result=None):
+    document = Document(filename="record.pdf", status=status, extraction_result=extraction_result)
+    db.add(document)
+    db.commit()
+    return document
+
+
+class TestMinHash:
+
+    def test_similarity_tracks_jaccard(self):
+        hasher = MinHasher()
+        original = page(1)
+
+        near = similarity(hasher.signature(shingles(original)), hasher.signature(shingles(rescanned(original, 2))))
+        other = similarity(hasher.signature(shingles(original)), hasher.signature(shingles(page(3))))
+
+        assert near > 0.8
+        assert other < 0.2
+
+    def test_signatures_are_deterministic(self):
+        assert MinHasher().signature(shingles(page(1))) == MinHasher().signature(shingles(page(1)))
+
+
+class TestDedupIndex:
+
+    def test_within_document_duplicates_are_blanked(self, db):
+        document = add_document(db)
+        pages = [page(1), page(2), rescanned(page(1), 5), ""]
+
+        report, page_texts = DedupIndex(db).process_document(document, pages)
+
+        assert page_texts == [pages[0], pages[1], "", ""]
+        assert report["indexed_pages"] == 3
+        assert report["duplicate_pages_within_document"] == 1
+        assert report["duplicate_ratio"] == round(1 / 3, 4)
+
+    def test_refaxed_document_reuses_completed_extraction(self, db):
+        original = add_document(db, DocumentStatus.COMPLETED, {"events": [{"date": "2024-02-14", "source_refs": [1]}]})
+        index = DedupIndex(db)
+        index.process_document(original, [page(i) for i in range(1, 6)])
+
+        copy = add_document(db)
+        report, _ = index.process_document(copy, [rescanned(page(i), i) for i in range(1, 6)])
+
+        assert report["duplicate_pages_across_documents"] == 5
+        assert report["duplicate_of_document"] == original.id
+
+        unrelated = add_document(db)
+        report, _ = index.process_document(unrelated, [page(i) for i in range(10, 15)])
+        assert report["duplicate_of_document"] is None
+        assert report["duplicate_ratio"] == 0.0
+
+    def test_candidates_are_looked_up_once_per_document(self, engine, db):
+        index = DedupIndex(db)
+        index.process_document(add_document(db), [page(i) for i in range(1, 6)])
+        lookups = []
+        event.listen(
+            engine, "before_cursor_execute",
+            lambda conn, cursor, statement, *args: lookups.append(statement)
+            if statement.lstrip().startswith("SELECT") and "page_signature_bands" in statement else None
+        )
+
+        report, _ = index.process_document(add_document(db), [rescanned(page(i), i) for i in range(1, 6)])
+
+        assert report["duplicate_pages_across_documents"] == 5
+        assert len(lookups) == 1
+
+    def test_reprocessing_does_not_match_itself(self, db):
+        document = add_document(db)
+        index = DedupIndex(db)
+        index.process_document(document, [page(1)])
+        report, _ = index.process_document(document, [page(1)])
+        assert report["duplicate_ratio"] == 0.0
+
+    def test_strip_links(self):
+        result = {"events": [{"date": "x", "source_refs": [1]}], "_match_summary": {}, "source_refs": []}
+        assert strip_links(result) == {"events": [{"date": "x"}]}
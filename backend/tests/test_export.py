@@ -0,0 +1,106 @@
+"""
+Test suite for streaming bulk exports.
+"""
+
+import csv
+import io
+from datetime import date
+
+import orjson
+import pyarrow.parquet as pq
+import pytest
+
+import app.export as export
+from app.export import iter_export, write_export
+from app.materialization import materialize_extraction
+from app.models import Case, Document, DocumentStatus, DocumentType
+
+BILL = {
+    "invoice_number": "INV-204",
+    "total_amount": 370.0,
+    "provider": "Spine Clinic",
+    "line_items": [
+        {"date_of_service": "2024-03-01", "cpt_code": "99214", "description": "Office visit",
+         "charged_amount": 250.0, "allowed_amount": 180.5},
+        {"date_of_service": "illegible", "cpt_code": "97110", "description": "Therapeutic exercise, 2 units",
+         "charged_amount": "$120.00"}
+    ]
+}
+CHRONOLOGY = {
+    "patient_name": "Jennifer Martinez",
+    "events": [{"date": "2024-02-14", "provider": "Memorial Regional Hospital", "encounter_type": "Emergency Visit",
+                "summary": "Abdominal pain.", "diagnosis_codes": ["R10.31", "K35.20"]}]
+}
+
+
+@pytest.fixture
+def case_id(db):
+    case = Case(name="Martinez v. Acme")
+    db.add(case)
+    db.flush()
+    for case_of_document, document_type, result in (
+        (case.id, DocumentType.BILL, BILL),
+        (None, DocumentType.BILL, BILL),
+        (case.id, DocumentType.CHRONOLOGY, CHRONOLOGY)
+    ):
+        document = Document(
+            filename="record.pdf", status=DocumentStatus.COMPLETED, document_type=document_type, case_id=case_of_document
+        )
+        db.add(document)
+        db.flush()
+        materialize_extraction(db, document.id, document_type, result)
+    db.commit()
+    return case.id
+
+
+def exported(db, kind, export_format, **filters):
+    out = io.BytesIO()
+    write_export(db, out, kind, export_format, **filters)
+    return out.getvalue()
+
+
+class TestFormats:
+
+    def test_csv(self, db, case_id):
+        rows = list(csv.DictReader(io.StringIO(exported(db, "line_items", "csv", case_id=case_id).decode())))
+
+        assert [(row["cpt_code"], row["service_date"], row["charged_amount"]) for row in rows] == [
+            ("99214", "2024-03-01", "250.00"), ("97110", "", "120.00")
+        ]
+        assert rows[0]["provider"] == "Spine Clinic" and rows[1]["description"] == "Therapeutic exercise, 2 units"
+
+    def test_ndjson(self, db, case_id):
+        lines = exported(db, "events", "ndjson", case_id=case_id).splitlines()
+
+        assert [orjson.loads(line) for line in lines] == [{
+            "document_id": 3, "case_id": case_id, "filename": "record.pdf", "position": 0,
+            "event_date": "2024-02-14", "date_text": "2024-02-14", "provider": "Memorial Regional Hospital",
+            "encounter_type": "Emergency Visit", "summary": "Abdominal pain.", "diagnosis_codes": ["R10.31", "K35.20"]
+        }]
+        assert orjson.loads(exported(db, "line_items", "ndjson", case_id=case_id).splitlines()[0])["allowed_amount"] == 180.5
+
+    def test_parquet_row_group_per_batch(self, db, case_id, monkeypatch):
+        monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 1)
+        parquet = pq.ParquetFile(io.BytesIO(exported(db, "line_items", "parquet")))
+
+        assert parquet.metadata.num_rows == 4 and parquet.num_row_groups == 4
+        table = parquet.read()
+        assert table.column("service_date").to_pylist()[:2] == [date(2024, 3, 1), None]
+        assert str(table.schema.field("charged_amount").type) == "decimal128(12, 2)"
+
+
+class TestStreaming:
+
+    def test_one_chunk_per_batch(self, db, case_id, monkeypatch):
+        monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 1)
+
+        chunks = list(iter_export(db, "line_items", "csv"))
+
+        # Header, one chunk per row, (empty) trailer
+        assert len(chunks) == 6 and chunks[-1] == b""
+
+    def test_filters(self, db, case_id):
+        assert exported(db, "line_items", "ndjson", date_from=date(2024, 3, 1), date_to=date(2024, 3, 31)).count(b"\n") == 2
+        assert exported(db, "line_items", "ndjson", document_id=1).count(b"\n") == 2
+        assert exported(db, "events", "csv", case_id=case_id + 1) == b"document_id,case_id,filename,position,event_date," \
+            b"date_text,provider,encounter_type,summary,diagnosis_codes\n"
@@ -0,0 +1,95 @@
+"""
+Test suite for bulk ingestion: saving uploads, batch creation and progress.
+"""
+
+import io
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.ingestion import BulkUploadError, save_uploads, create_batch, batch_progress
+from app.models import Document, DocumentStatus
+
+
+def upload(filename, data, content_type):
+    return SimpleNamespace(filename=filename, content_type=content_type, file=io.BytesIO(data))
+
+
+def zip_upload(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return upload("case.zip", buffer.getvalue(), "application/zip")
+
+
+class TestSaveUploads:
+
+    def test_pdfs_and_zip_members_are_saved(self, tmp_path):
+        uploads = [
+            upload("a.pdf", b"%PDF-a", "application/pdf"),
+            zip_upload({"records/a.pdf": b"%PDF-b", "records/notes.txt": b"x", "../escape.pdf": b"%PDF-c"}),
+            upload("photo.jpg", b"x", "image/jpeg"),
+        ]
+
+        saved, skipped = save_uploads(uploads, tmp_path)
+
+        assert [name for name, _ in saved] == ["a.pdf", "a.pdf", "escape.pdf"]
+        assert [path.name for _, path in saved] == ["a.pdf", "a_1.pdf", "escape.pdf"]
+        assert all(path.parent == tmp_path for _, path in saved)
+        assert saved[1][1].read_bytes() == b"%PDF-b"
+        assert skipped == ["case.zip/records/notes.txt", "photo.jpg"]
+
+    def test_too_many_files_saves_nothing(self, tmp_path):
+        uploads = [upload(f"{i}.pdf", b"%PDF", "application/pdf") for i in range(3)]
+        with pytest.raises(BulkUploadError):
+            save_uploads(uploads, tmp_path, max_files=2)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_invalid_zip_is_rejected(self, tmp_path):
+        with pytest.raises(BulkUploadError):
+            save_uploads([upload("bad.zip", b"not a zip", "application/zip")], tmp_path)
+
+
+class TestBatches:
+
+    def test_batch_is_created_in_one_transaction(self, engine, db, tmp_path):
+        commits = []
+        event.listen(engine, "commit", lambda conn: commits.append(1))
+
+        batch, documents = create_batch(db, [(f"{i}.pdf", tmp_path / f"{i}.pdf") for i in range(50)])
+
+        assert len(commits) == 1
+        assert len({d.id for d in documents}) == 50
+        assert all(d.batch_id == batch.id and d.status == DocumentStatus.QUEUED for d in documents)
+
+    def test_progress_is_aggregated_by_status(self, db, tmp_path):
+        batch, documents = create_batch(db, [(f"{i}.pdf", tmp_path / f"{i}.pdf") for i in range(4)], ["x.txt"])
+        documents[0].status = DocumentStatus.COMPLETED
+        documents[1].status = DocumentStatus.FAILED
+        documents[2].status = DocumentStatus.PROCESSING
+        db.add(Document(filename="other.pdf", status=DocumentStatus.QUEUED))
+        db.commit()
+
+        progress = batch_progress(db, batch.id)
+
+        assert progress["document_count"] == 4
+        assert progress["status_counts"] == {"QUEUED": 1, "PROCESSING": 1, "COMPLETED": 1, "FAILED": 1}
+        assert progress["progress"] == 0.5
+        assert progress["done"] is False
+        assert progress["skipped_files"] == ["x.txt"]
+        assert batch_progress(db, batch.id + 1) is None
+
+    def test_duplicate_ratio_of_the_batch(self, db, tmp_path):
+        batch, documents = create_batch(db, [(f"{i}.pdf", tmp_path / f"{i}.pdf") for i in range(3)])
+        for document, (indexed, duplicates) in zip(documents, [(10, 0), (6, 5), (None, None)]):
+            document.dedup_indexed_pages = indexed
+            document.dedup_duplicate_pages = duplicates
+        documents[0].status = documents[1].status = DocumentStatus.COMPLETED
+        db.commit()
+
+        assert batch_progress(db, batch.id)["dedup"] == {
+            "indexed_pages": 16, "duplicate_pages": 5, "duplicate_ratio": 0.3125
+        }
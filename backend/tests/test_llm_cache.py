@@ -0,0 +1,109 @@
+"""
+Test suite for the LLM response cache.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.llm_cache import CachedLLMService, DiskCacheStore, llm_cache_stats, text_hash
+from app.llm_service import MockLLMService
+
+
+class CountingLLMService(MockLLMService):
+    """MockLLMService that records every real call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def classify_document(self, ocr_text):
+        self.calls.append("classify_document")
+        return super().classify_document(ocr_text)
+
+    def extract_bill(self, ocr_text):
+        self.calls.append("extract_bill")
+        return super().extract_bill(ocr_text)
+
+
+BILL_TEXT = "Invoice INV-2024-0891\nCPT 99214 charged $285.00 amount due\n"
+
+
+class TestLLMCache:
+
+    def test_identical_input_calls_llm_once(self, tmp_path):
+        inner = CountingLLMService()
+        llm = CachedLLMService(inner, DiskCacheStore(tmp_path))
+
+        first = llm.extract_bill(BILL_TEXT)
+        second = llm.extract_bill(BILL_TEXT)
+
+        assert first == second
+        assert inner.calls == ["extract_bill"]
+        assert llm.stats["hits"] == 1 and llm.stats["misses"] == 1
+        assert llm.hit_rate == 0.5
+
+    def test_hits_and_misses_are_shared_across_processes(self, tmp_path):
+        # Two workers with their own service instances, one shared cache
+        for _ in range(2):
+            CachedLLMService(CountingLLMService(), DiskCacheStore(tmp_path)).extract_bill(BILL_TEXT)
+
+        assert llm_cache_stats() == {
+            "hits": 1, "misses": 1, "hit_rate": 0.5,
+            "operations": {"extract_bill": {"hits": 1, "misses": 1}}
+        }
+
+    def test_whitespace_differences_share_an_entry(self, tmp_path):
+        inner = CountingLLMService()
+        llm = CachedLLMService(inner, DiskCacheStore(tmp_path))
+
+        llm.classify_document(BILL_TEXT)
+        llm.classify_document("  Invoice   INV-2024-0891 CPT 99214\tcharged $285.00 amount due ")
+
+        assert inner.calls == ["classify_document"]
+        assert text_hash("a  b\nc") == text_hash("a b c")
+
+    def test_key_includes_operation_model_and_prompt_version(self, tmp_path):
+        inner = CountingLLMService()
+        llm = CachedLLMService(inner, DiskCacheStore(tmp_path))
+
+        llm.classify_document(BILL_TEXT)
+        llm.extract_bill(BILL_TEXT)
+        assert inner.calls == ["classify_document", "extract_bill"]
+
+        inner.prompt_version = "next"
+        bumped = CachedLLMService(inner, DiskCacheStore(tmp_path))
+        bumped.extract_bill(BILL_TEXT)
+        assert inner.calls[-1] == "extract_bill" and len(inner.calls) == 3
+
+    def test_expired_entries_are_recomputed(self, tmp_path):
+        inner = CountingLLMService()
+        llm = CachedLLMService(inner, DiskCacheStore(tmp_path, ttl=0))
+
+        llm.extract_bill(BILL_TEXT)
+        time.sleep(0.01)
+        llm.extract_bill(BILL_TEXT)
+
+        assert inner.calls == ["extract_bill", "extract_bill"]
+
+    def test_lru_eviction_keeps_recently_used_entries(self, tmp_path):
+        store = DiskCacheStore(tmp_path, max_entries=10)
+        for i in range(10):
+            store.set(f"key{i}", str(i))
+            time.sleep(0.01)
+
+        # Touch the oldest entry so it becomes most recently used
+        assert store.get("key0") == "0"
+        store.set("key10", "10")
+
+        assert store.get("key0") == "0"
+        assert store.get("key1") is None
+        assert len(list(tmp_path.glob("*.json"))) <= 10
+
+    def test_concurrent_writers_of_one_key_do_not_share_a_temp_file(self, tmp_path):
+        stores = [DiskCacheStore(tmp_path) for _ in range(8)]
+        values = [str(i) * 10_000 for i in range(8)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: stores[i].set("key", values[i]), range(8)))
+
+        assert stores[0].get("key") in values
+        assert list(tmp_path.glob("*.tmp")) == []
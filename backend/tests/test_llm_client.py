@@ -0,0 +1,147 @@
+"""
+Test suite for ClaudeAPIService against the local fake LLM server.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+import app.llm_service as llm_service
+from app.llm_service import ClaudeAPIService, LLMAPIError, RedisSemaphore, parse_json_response
+from fakes.fake_llm_server import start_fake_llm_server
+from fakes.fake_redis import FakeRedis
+
+
+def make_client(server, **options):
+    options.setdefault("retry_base_delay", 0.01)
+    options.setdefault("retry_max_delay", 0.05)
+    return ClaudeAPIService(
+        api_key="test-key",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        **options
+    )
+
+
+@pytest.fixture
+def fake_llm():
+    servers = []
+
+    def start(**options):
+        options.setdefault("latency", 0.0)
+        server, state = start_fake_llm_server(**options)
+        servers.append(server)
+        return server, state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+class TestClaudeAPIService:
+
+    def test_same_interface_as_mock(self, fake_llm):
+        server, _ = fake_llm()
+        client = make_client(server)
+
+        assert client.classify_document("Invoice total charges amount due CPT 99214") == "BILL"
+        assert len(client.extract_bill("...")["line_items"]) == 5
+        assert client.extract_chronology("...")["patient_name"] == "Jennifer Martinez"
+
+    def test_connections_are_reused(self, fake_llm):
+        server, state = fake_llm()
+        client = make_client(server)
+
+        for _ in range(5):
+            client.extract_bill("...")
+
+        assert state.counts["ok"] == 5
+        assert state.connections == 1
+
+    def test_retries_transient_errors(self, fake_llm):
+        server, state = fake_llm(error_rate=0.5, rate_limit_error_rate=0.2)
+        client = make_client(server, max_retries=20)
+
+        for _ in range(10):
+            assert client.classify_document("visit diagnosis") == "CHRONOLOGY"
+
+        assert state.counts["ok"] == 10
+        assert client.stats["retries"] == state.counts["500"] + state.counts["429"]
+
+    def test_slot_is_released_while_backing_off(self, monkeypatch):
+        client = ClaudeAPIService(api_key="test-key", max_in_flight=1, max_retries=1)
+        responses = [
+            mock.Mock(status_code=429, text="rate limited", headers={"retry-after": "0"}),
+            mock.Mock(status_code=200, json=lambda: {"content": [{"text": "BILL"}]})
+        ]
+        monkeypatch.setattr(client.session, "post", lambda *args, **kwargs: responses.pop(0))
+        slot_free_while_sleeping = []
+
+        def sleep(_):
+            free = client._local_slots.acquire(blocking=False)
+            if free:
+                client._local_slots.release()
+            slot_free_while_sleeping.append(free)
+
+        monkeypatch.setattr(llm_service.time, "sleep", sleep)
+
+        assert client.classify_document("invoice") == "BILL"
+        assert slot_free_while_sleeping == [True]
+
+    def test_gives_up_after_max_retries(self, fake_llm):
+        server, _ = fake_llm(error_rate=1.0)
+        client = make_client(server, max_retries=2)
+
+        with pytest.raises(LLMAPIError) as excinfo:
+            client.extract_bill("...")
+        assert excinfo.value.status_code == 500
+        assert client.stats["requests"] == 3
+
+    def test_in_flight_requests_capped_per_worker(self, fake_llm):
+        server, state = fake_llm(latency=0.1)
+        client = make_client(server, max_in_flight=3)
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            list(pool.map(lambda _: client.extract_bill("..."), range(12)))
+
+        assert state.counts["ok"] == 12
+        assert state.max_in_flight <= 3
+
+    def test_streaming_yields_incremental_deltas(self, fake_llm):
+        server, _ = fake_llm(latency=0.05, stream_chunk_size=25)
+        client = make_client(server)
+
+        deltas = list(client.stream_bill("..."))
+
+        assert len(deltas) > 10
+        assert len(json.loads("".join(deltas))["line_items"]) == 5
+
+    def test_parse_json_response_tolerates_fences(self):
+        assert parse_json_response('```json\n{"a": 1}\n```') == {"a": 1}
+        with pytest.raises(LLMAPIError):
+            parse_json_response("no json here")
+
+
+class TestRedisSemaphore:
+
+    def test_slot_outliving_the_lease_is_renewed(self):
+        client = FakeRedis()
+        semaphore = RedisSemaphore(client, "llm:inflight:test", 1, lease=0.15, poll_interval=0.01)
+        second_acquired = threading.Event()
+
+        def second_holder():
+            with semaphore.acquire():
+                second_acquired.set()
+
+        with semaphore.acquire():
+            waiter = threading.Thread(target=second_holder)
+            waiter.start()
+            # Several leases long: without renewal the waiter would expire this slot
+            time.sleep(0.6)
+            assert not second_acquired.is_set()
+
+        waiter.join(timeout=2)
+        assert second_acquired.is_set()
+        assert client.zcard("llm:inflight:test") == 0
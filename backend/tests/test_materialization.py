@@ -0,0 +1,211 @@
+"""
+Test suite for relational materialization of extraction results.
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event, select
+
+from app.materialization import (
+    clear_document,
+    events_query,
+    event_response,
+    group_source_refs,
+    line_item_response,
+    line_item_totals_query,
+    line_items_query,
+    materialize_extraction,
+    parse_amount,
+    parse_date,
+    source_refs_query,
+    totals_response
+)
+from app.models import Document, DocumentStatus, DocumentType, Event, EventDiagnosis, LineItem, SourceRef
+
+
+def ref(field, page=1):
+    return {
+        "field": field,
+        "page_number": page,
+        "bounding_box": {"left": 0.1, "top": 0.2, "width": 0.3, "height": 0.04},
+        "confidence": 0.9,
+        "matched_text": field,
+        "file_id": "1"
+    }
+
+
+CHRONOLOGY = {
+    "patient_name": "Jennifer Martinez",
+    "source_refs": [ref("patient_name")],
+    "events": [
+        {
+            "date": "2024-02-14",
+            "provider": "Memorial Regional Hospital",
+            "encounter_type": "Emergency Visit",
+            "summary": "Acute appendicitis.",
+            "diagnosis_codes": ["K35.20", " r10.31 "],
+            "source_refs": [ref("date"), ref("provider")]
+        },
+        {
+            "date": "Feb 15, 2024",
+            "provider": "Dr. William Chen",
+            "encounter_type": "Surgery/Procedure",
+            "summary": "Laparoscopic appendectomy.",
+            "diagnosis_codes": ["K35.30"],
+            "source_refs": [ref("date", page=2)]
+        },
+        {
+            "date": "unknown",
+            "provider": "Memorial Regional Hospital",
+            "encounter_type": "Follow-up",
+            "summary": "Wound check.",
+            "diagnosis_codes": [],
+            "source_refs": []
+        }
+    ],
+    "_match_summary": {"matched": 3}
+}
+
+BILL = {
+    "invoice_number": "INV-2024-0891",
+    "total_amount": 575.00,
+    "provider": "Memorial Regional Hospital",
+    "line_items": [
+        {"date_of_service": "2024-02-20", "cpt_code": "99214", "description": "Office Visit",
+         "charged_amount": 285.00, "allowed_amount": 210.00, "source_refs": [ref("cpt_code")]},
+        {"date_of_service": "2024-02-20", "cpt_code": "80053", "description": "Metabolic Panel",
+         "charged_amount": "$95.00", "allowed_amount": None},
+        {"date_of_service": "2024-02-27", "cpt_code": "99214", "description": "Office Visit",
+         "charged_amount": 195.00, "allowed_amount": 150.00, "provider": "Dr. Smith"}
+    ]
+}
+
+
+def add_document(db, document_type, extraction_result):
+    document = Document(
+        filename="record.pdf",
+        status=DocumentStatus.COMPLETED,
+        document_type=document_type,
+        extraction_result=extraction_result
+    )
+    db.add(document)
+    db.flush()
+    materialize_extraction(db, document.id, document_type, extraction_result)
+    db.commit()
+    return document.id
+
+
+class TestParsing:
+
+    def test_dates(self):
+        assert parse_date("2024-02-14") == date(2024, 2, 14)
+        assert parse_date("Feb 15, 2024") == date(2024, 2, 15)
+        assert parse_date("unknown") is None
+        assert parse_date(None) is None
+
+    def test_partial_dates_are_not_completed(self):
+        assert parse_date("March 2024") is None
+        assert parse_date("03/15") is None
+        assert parse_date("2024") is None
+        assert parse_date("1/1/2000") == date(2000, 1, 1)
+
+    def test_amounts(self):
+        assert parse_amount(285) == 285.0
+        assert parse_amount("$1,250.50") == 1250.5
+        assert parse_amount("n/a") is None
+        assert parse_amount(None) is None
+
+
+class TestMaterializeExtraction:
+
+    def test_chronology_rows(self, db):
+        document_id = add_document(db, DocumentType.CHRONOLOGY, CHRONOLOGY)
+
+        events = db.query(Event).order_by(Event.position).all()
+        assert [event.event_date for event in events] == [date(2024, 2, 14), date(2024, 2, 15), None]
+        assert events[2].date_text == "unknown"
+        codes = db.query(EventDiagnosis.code).filter(EventDiagnosis.event_id == events[0].id).all()
+        assert sorted(code for code, in codes) == ["K35.20", "R10.31"]
+        refs = db.query(SourceRef).filter(SourceRef.document_id == document_id).all()
+        assert len(refs) == 4
+        # The patient name ref belongs to the document, not to an event
+        assert sum(1 for row in refs if row.event_id is None) == 1
+
+    def test_bill_rows(self, db):
+        add_document(db, DocumentType.BILL, BILL)
+
+        items = db.query(LineItem).order_by(LineItem.position).all()
+        assert [item.cpt_code for item in items] == ["99214", "80053", "99214"]
+        assert float(items[1].charged_amount) == 95.0
+        assert items[1].allowed_amount is None
+        # Item provider wins over the bill's
+        assert [item.provider for item in items] == ["Memorial Regional Hospital"] * 2 + ["Dr. Smith"]
+        assert all(item.invoice_number == "INV-2024-0891" for item in items)
+
+    def test_rematerializing_replaces_rows(self, db, engine):
+        document_id = add_document(db, DocumentType.CHRONOLOGY, CHRONOLOGY)
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+
+        materialize_extraction(db, document_id, DocumentType.CHRONOLOGY, CHRONOLOGY)
+        db.commit()
+
+        assert db.query(Event).count() == 3
+        assert db.query(EventDiagnosis).count() == 3
+        # One bulk INSERT per table, not one per row
+        assert len([sql for sql in statements if sql.startswith("INSERT")]) == 3
+
+    def test_clear_document(self, db):
+        document_id = add_document(db, DocumentType.BILL, BILL)
+
+        clear_document(db, document_id)
+        db.commit()
+
+        assert db.query(LineItem).count() == 0
+        assert db.query(SourceRef).count() == 0
+
+
+class TestQueries:
+
+    @pytest.fixture
+    def documents(self, db):
+        return add_document(db, DocumentType.CHRONOLOGY, CHRONOLOGY), add_document(db, DocumentType.BILL, BILL)
+
+    def test_events_by_icd_code(self, db, documents):
+        events = db.execute(events_query(icd="r10.31")).scalars().all()
+
+        assert [event.summary for event in events] == ["Acute appendicitis."]
+
+    def test_events_by_date_range(self, db, documents):
+        events = db.execute(events_query(date_from=date(2024, 2, 15), date_to=date(2024, 2, 28))).scalars().all()
+
+        assert [event.provider for event in events] == ["Dr. William Chen"]
+
+    def test_line_items_by_cpt_code(self, db, documents):
+        items = db.execute(line_items_query(cpt="99214")).scalars().all()
+
+        assert [item.service_date for item in items] == [date(2024, 2, 20), date(2024, 2, 27)]
+        assert db.execute(line_items_query(cpt="99214", limit=1, offset=1)).scalars().one().provider == "Dr. Smith"
+
+    def test_totals_per_provider(self, db, documents):
+        rows = db.execute(line_item_totals_query("provider")).all()
+
+        assert [totals_response(row) for row in rows] == [
+            {"key": "Memorial Regional Hospital", "line_items": 2, "charged_amount": 380.0, "allowed_amount": 210.0},
+            {"key": "Dr. Smith", "line_items": 1, "charged_amount": 195.0, "allowed_amount": 150.0}
+        ]
+
+    def test_responses_carry_source_refs(self, db, documents):
+        events = db.execute(events_query(provider="Memorial Regional Hospital")).scalars().all()
+        refs = group_source_refs(
+            db.execute(source_refs_query(SourceRef.event_id, [e.id for e in events])).scalars(), "event_id"
+        )
+
+        responses = [event_response(e, refs.get(e.id)) for e in events]
+        assert [len(response["source_refs"]) for response in responses] == [2, 0]
+        assert responses[0]["source_refs"][0]["bounding_box"]["width"] == 0.3
+        assert responses[0]["diagnosis_codes"] == ["K35.20", " r10.31 "]
+
+        item = db.execute(select(LineItem).where(LineItem.cpt_code == "80053")).scalar_one()
+        assert line_item_response(item)["charged_amount"] == 95.0
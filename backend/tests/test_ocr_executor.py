@@ -0,0 +1,85 @@
+"""
+Test suite for page-parallel OCR execution with the local stand-in backend.
+"""
+
+import multiprocessing
+import time
+import pytest
+from app.ocr_service import MockOCRService, get_ocr_backend
+from app.ocr_executor import PageExecutor
+
+
+PAGE_LATENCY = 0.2
+PAGES = 8
+
+
+def ocr_in_daemon(results):
+    executor = PageExecutor(MockOCRService(page_latency=0), mode="process", max_workers=2)
+    pages = list(executor.map_pages("record.pdf", [1, 2]))
+    results.put((executor.mode, [p["page_number"] for p in pages]))
+
+
+class TestPageExecutor:
+
+    @pytest.mark.parametrize("mode", ["thread", "process", "async"])
+    def test_pages_run_concurrently_and_keep_order(self, mode):
+        backend = MockOCRService(page_latency=PAGE_LATENCY)
+        executor = PageExecutor(backend, mode=mode, max_workers=PAGES, poll_interval=0.01)
+
+        start = time.monotonic()
+        pages = list(executor.map_pages("record.pdf", range(1, PAGES + 1)))
+        elapsed = time.monotonic() - start
+
+        assert [p["page_number"] for p in pages] == list(range(1, PAGES + 1))
+        # Serial execution would take PAGES * PAGE_LATENCY = 1.6s
+        assert elapsed < PAGES * PAGE_LATENCY / 2
+
+    def test_process_mode_falls_back_to_threads_in_daemonic_workers(self):
+        # Like a Celery prefork child: daemonic processes cannot have children
+        results = multiprocessing.get_context("fork").Queue()
+        worker = multiprocessing.get_context("fork").Process(target=ocr_in_daemon, args=(results,), daemon=True)
+        worker.start()
+        worker.join(timeout=10)
+
+        assert results.get(timeout=1) == ("thread", [1, 2])
+
+    def test_ready_pages_pass_through_in_place(self):
+        executor = PageExecutor(MockOCRService(page_latency=0), max_workers=2)
+        text_page = {"page_number": 2, "words": [], "source": "text_layer"}
+
+        pages = list(executor.map_pages("record.pdf", [1, text_page, 3]))
+
+        assert [p["page_number"] for p in pages] == [1, 2, 3]
+        assert pages[1] is text_page
+
+    def test_in_flight_window_is_bounded(self):
+        submitted = []
+
+        class CountingBackend(MockOCRService):
+            def ocr_page(self, file_path, page_number):
+                submitted.append(page_number)
+                return super().ocr_page(file_path, page_number)
+
+        executor = PageExecutor(CountingBackend(page_latency=0), max_workers=2)
+        pages = executor.map_pages("record.pdf", range(1, 101))
+
+        next(pages)
+        time.sleep(0.05)
+        assert len(submitted) <= executor.max_in_flight + 1
+        pages.close()
+
+    def test_async_mode_requires_submit_poll_backend(self):
+        class BlockingOnly:
+            def page_count(self, file_path):
+                return 1
+
+            def ocr_page(self, file_path, page_number):
+                return {}
+
+        with pytest.raises(ValueError):
+            PageExecutor(BlockingOnly(), mode="async")
+
+    def test_backend_selected_by_name(self):
+        assert isinstance(get_ocr_backend("mock"), MockOCRService)
+        with pytest.raises(ValueError):
+            get_ocr_backend("does-not-exist")
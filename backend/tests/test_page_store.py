@@ -0,0 +1,69 @@
+"""
+Test suite for the streaming OCR page store.
+"""
+
+import pytest
+from app.page_store import OCRPageStore
+from app.verification_service import link_verification
+
+
+def make_page(page_number, words):
+    return {
+        "page_number": page_number,
+        "width": 612,
+        "height": 792,
+        "words": [
+            {
+                "text": text,
+                "confidence": 0.98,
+                "bounding_box": {"left": 50 + i * 60, "top": 100, "width": 55, "height": 18}
+            }
+            for i, text in enumerate(words)
+        ]
+    }
+
+
+class TestOCRPageStore:
+
+    def test_pages_round_trip_in_order(self, tmp_path):
+        store = OCRPageStore(tmp_path / "1.jsonl")
+        with store.open_for_write():
+            for n in range(1, 4):
+                store.append(make_page(n, [f"page{n}"]))
+
+        reopened = OCRPageStore(tmp_path / "1.jsonl")
+        assert len(reopened) == 3
+        assert [p["page_number"] for p in reopened] == [1, 2, 3]
+        # Re-iterable: a second pass yields the same pages
+        assert [p["page_number"] for p in reopened] == [1, 2, 3]
+
+    def test_random_page_access(self, tmp_path):
+        store = OCRPageStore(tmp_path / "2.jsonl")
+        with store.open_for_write():
+            for n in range(1, 6):
+                store.append(make_page(n, [f"page{n}"]))
+
+        reopened = OCRPageStore(tmp_path / "2.jsonl")
+        assert reopened.get_page(4)["words"][0]["text"] == "page4"
+        assert reopened.get_page(99) is None
+
+    def test_append_requires_open_store(self, tmp_path):
+        store = OCRPageStore(tmp_path / "3.jsonl")
+        with pytest.raises(RuntimeError):
+            store.append(make_page(1, ["x"]))
+
+    def test_linkage_reads_pages_from_store(self, tmp_path):
+        store = OCRPageStore(tmp_path / "4.jsonl")
+        with store.open_for_write():
+            store.append(make_page(1, ["Invoice"]))
+            store.append(make_page(2, ["99214", "$285.00"]))
+
+        result = link_verification(
+            {"line_items": [{"cpt_code": "99214", "charged_amount": 285.00}]},
+            {"pages": store},
+            file_id="test-file"
+        )
+
+        refs = result["line_items"][0]["source_refs"]
+        assert {r["page_number"] for r in refs} == {2}
+        assert result["_match_summary"]["matched"] == 2
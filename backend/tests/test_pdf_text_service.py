@@ -0,0 +1,97 @@
+"""
+Test suite for the born-digital PDF text layer fast path.
+"""
+
+from app.ocr_executor import PageExecutor
+from app.pdf_text_service import PDFTextExtractor, iter_document_pages
+
+
+def build_pdf(path, page_contents):
+    """Write a minimal PDF; each entry is a content stream (b"" for a blank page)."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for content in page_contents:
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R".encode())
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents "
+            + f"{page_id + 1} 0 R".encode() + b" >>"
+        )
+        objects.append(
+            f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream"
+        )
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count " + str(len(kids)).encode() + b" >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(out))
+
+
+TEXT_PAGE = b"BT /F1 12 Tf 72 700 Td (Office Visit 99214 charged $285.00 on 02/20/2024) Tj ET"
+
+
+class StubOCRBackend:
+    def __init__(self):
+        self.requested = []
+
+    def page_count(self, file_path):
+        return 1
+
+    def ocr_page(self, file_path, page_number):
+        self.requested.append(page_number)
+        return {"page_number": page_number, "width": 612, "height": 792, "words": []}
+
+
+class TestPDFTextExtractor:
+
+    def test_extracts_words_and_boxes_from_text_layer(self, tmp_path):
+        pdf_path = tmp_path / "bill.pdf"
+        build_pdf(pdf_path, [TEXT_PAGE])
+
+        [(page_number, page)] = list(PDFTextExtractor().iter_pages(str(pdf_path)))
+
+        assert page_number == 1
+        assert page["width"] == 612 and page["height"] == 792
+        assert page["source"] == "text_layer"
+        texts = [w["text"] for w in page["words"]]
+        assert "99214" in texts and "$285.00" in texts
+
+        bbox = page["words"][0]["bounding_box"]
+        assert 70 <= bbox["left"] <= 74
+        # pdfplumber measures from the top of the page
+        assert 70 <= bbox["top"] <= 95
+        assert bbox["width"] > 0 and bbox["height"] > 0
+
+    def test_only_image_only_pages_go_to_ocr(self, tmp_path):
+        pdf_path = tmp_path / "mixed.pdf"
+        build_pdf(pdf_path, [TEXT_PAGE, b"", TEXT_PAGE])
+        ocr = StubOCRBackend()
+
+        pages = list(iter_document_pages(str(pdf_path), PageExecutor(ocr)))
+
+        assert [p["page_number"] for p in pages] == [1, 2, 3]
+        assert [p["source"] for p in pages] == ["text_layer", "ocr", "text_layer"]
+        assert ocr.requested == [2]
+
+    def test_non_pdf_falls_back_to_full_ocr(self, tmp_path):
+        not_pdf = tmp_path / "scan.pdf"
+        not_pdf.write_bytes(b"not a pdf")
+        ocr = StubOCRBackend()
+
+        pages = list(iter_document_pages(str(not_pdf), PageExecutor(ocr)))
+
+        assert len(pages) == 1
+        assert ocr.requested == [1]
@@ -0,0 +1,105 @@
+"""
+Test suite for read-replica routing with read-your-writes.
+"""
+
+import asyncio
+
+import pytest
+
+import app.read_routing as read_routing
+from app.read_routing import RecentWrites, get_document_for_read
+from fakes.fake_redis import FakeRedis, FakeAsyncRedis
+
+
+class DownRedis:
+
+    async def exists(self, *keys):
+        raise ConnectionError("redis down")
+
+
+class FakeSession:
+    """Async session over a dict of documents; info marks replica sessions."""
+
+    def __init__(self, name, documents, replica=False):
+        self.name = name
+        self.documents = documents
+        self.info = {"replica": True} if replica else {}
+
+    async def get(self, model, document_id):
+        return self.documents.get(document_id)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def databases(monkeypatch):
+    """Primary and (lagging) replica session factories plus shared recent-write marks."""
+    primary_rows, replica_rows = {}, {}
+    client = FakeRedis()
+    recent_writes = RecentWrites(client, FakeAsyncRedis(client))
+
+    monkeypatch.setattr(read_routing, "replica_configured", lambda: True)
+    monkeypatch.setattr(read_routing, "get_async_session_factory", lambda: lambda: FakeSession("primary", primary_rows))
+    monkeypatch.setattr(
+        read_routing, "get_async_replica_session_factory",
+        lambda: lambda: FakeSession("replica", replica_rows, replica=True)
+    )
+    monkeypatch.setattr(read_routing, "_recent_writes", recent_writes)
+    return primary_rows, replica_rows, recent_writes
+
+
+async def session_name(dependency, *args):
+    async for db in dependency(*args):
+        return db.name
+
+
+class TestReadRouting:
+
+    def test_reads_go_to_replica_by_default(self, databases):
+        assert asyncio.run(session_name(read_routing.get_document_read_db, 1)) == "replica"
+        assert asyncio.run(session_name(read_routing.get_listing_read_db)) == "replica"
+
+    def test_recently_written_document_reads_from_primary(self, databases):
+        _, _, recent_writes = databases
+        recent_writes.mark([1])
+
+        assert asyncio.run(session_name(read_routing.get_document_read_db, 1)) == "primary"
+        assert asyncio.run(session_name(read_routing.get_document_read_db, 2)) == "replica"
+        assert asyncio.run(session_name(read_routing.get_listing_read_db)) == "replica"
+
+    def test_upload_routes_listing_to_primary(self, databases):
+        _, _, recent_writes = databases
+        recent_writes.mark([3], listing=True)
+
+        assert asyncio.run(session_name(read_routing.get_listing_read_db)) == "primary"
+
+    def test_without_replica_everything_reads_from_primary(self, databases, monkeypatch):
+        monkeypatch.setattr(read_routing, "replica_configured", lambda: False)
+
+        assert asyncio.run(session_name(read_routing.get_document_read_db, 1)) == "primary"
+
+    def test_document_missing_on_replica_is_read_from_primary(self, databases):
+        primary_rows, replica_rows, _ = databases
+        primary_rows[5] = "fresh"
+        replica_rows[6] = "replicated"
+
+        replica = FakeSession("replica", replica_rows, replica=True)
+        assert asyncio.run(get_document_for_read(replica, 5)) == "fresh"
+        assert asyncio.run(get_document_for_read(replica, 6)) == "replicated"
+        assert asyncio.run(get_document_for_read(replica, 7)) is None
+
+
+class TestRecentWrites:
+
+    def test_unreadable_marks_fall_back_to_primary(self):
+        recent_writes = RecentWrites(FakeRedis(), DownRedis())
+        assert asyncio.run(recent_writes.is_recent(1)) is True
+
+    def test_marks_without_redis_are_noops(self):
+        recent_writes = RecentWrites()
+        recent_writes.mark([1], listing=True)
+        assert asyncio.run(recent_writes.is_recent(1)) is False
@@ -0,0 +1,91 @@
+"""
+Test suite for the completed document response cache.
+"""
+
+import asyncio
+
+from app.response_cache import ResponseCache, cache_key
+from fakes.fake_redis import FakeRedis, FakeAsyncRedis
+
+
+class DownRedis:
+
+    def pipeline(self, transaction=True):
+        raise ConnectionError("redis down")
+
+
+def make_cache(**kwargs):
+    client = FakeRedis()
+    return ResponseCache(client, FakeAsyncRedis(client), **kwargs), client
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestResponseCache:
+
+    def test_read_through_keyed_by_updated_at(self):
+        cache, _ = make_cache()
+        assert run(cache.get(1, "2024-01-01T00:00:00")) is None
+
+        run(cache.set(1, "2024-01-01T00:00:00", b'{"document_id":1}'))
+
+        assert run(cache.get(1, "2024-01-01T00:00:00")) == b'{"document_id":1}'
+        # The row changed without an invalidation: the old body is not served
+        assert run(cache.get(1, "2024-01-02T00:00:00")) is None
+
+    def test_invalidate_drops_entry(self):
+        cache, client = make_cache()
+        run(cache.set(1, "v1", b"{}"))
+
+        cache.invalidate([1])
+
+        assert run(cache.get(1, "v1")) is None
+        assert client.zcard("doccache:lru") == 0
+
+    def test_least_recently_used_documents_are_evicted(self):
+        cache, client = make_cache(max_entries=2)
+        run(cache.set(1, "v1", b"one"))
+        run(cache.set(2, "v1", b"two"))
+        run(cache.get(1, "v1"))
+
+        run(cache.set(3, "v1", b"three"))
+
+        assert client.exists(cache_key(2)) == 0
+        assert run(cache.get(1, "v1")) == b"one"
+        assert run(cache.get(3, "v1")) == b"three"
+
+    def test_oversized_bodies_are_not_cached(self):
+        cache, _ = make_cache(max_body_bytes=10)
+        assert run(cache.set(1, "v1", b"x" * 11)) is False
+        assert run(cache.get(1, "v1")) is None
+
+    def test_stats_report_hit_rate_across_processes(self):
+        cache, client = make_cache(max_entries=1)
+        other_process = ResponseCache(client, FakeAsyncRedis(client), max_entries=1)
+        run(cache.set(1, "v1", b"{}"))
+        run(cache.get(1, "v1"))
+        run(other_process.get(1, "v1"))
+        run(other_process.get(2, "v1"))
+        run(cache.set(2, "v1", b"{}"))
+        cache.invalidate([2])
+
+        stats = run(cache.stats())
+
+        assert stats["hits"] == 2 and stats["misses"] == 1
+        assert stats["hit_rate"] == round(2 / 3, 4)
+        assert stats["stores"] == 2 and stats["evictions"] == 1 and stats["invalidations"] == 1
+        assert stats["entries"] == 0
+
+    def test_redis_errors_are_cache_misses(self):
+        cache = ResponseCache(DownRedis(), DownRedis())
+        assert run(cache.get(1, "v1")) is None
+        assert run(cache.set(1, "v1", b"{}")) is False
+        cache.invalidate([1])
+        assert run(cache.stats()) is None
+
+    def test_disabled_cache_is_a_noop(self):
+        cache = ResponseCache()
+        assert run(cache.set(1, "v1", b"{}")) is False
+        assert run(cache.get(1, "v1")) is None
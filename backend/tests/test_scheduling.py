@@ -0,0 +1,185 @@
+"""
+Test suite for priority lanes and the per-tenant fair scheduler.
+"""
+
+import time
+
+import pytest
+
+import app.scheduling
+import app.tasks as tasks
+from app.metrics import metrics
+from app.scheduling import (
+    FairScheduler, LANE_BULK, LANE_INTERACTIVE, PENDING_KEY,
+    choose_lane, estimate_pages, lane_latency_stats, observe_lane_latency, parse_weights
+)
+from fakes.fake_redis import FakeRedis
+
+
+class BulkQueue:
+    """Stands in for the bulk broker queue: released entries wait here until 'processed'."""
+
+    def __init__(self):
+        self.entries = []
+
+    def dispatch(self, entry):
+        self.entries.append(entry)
+
+    def depth(self):
+        return len(self.entries)
+
+    def process(self, count=1):
+        done, self.entries = self.entries[:count], self.entries[count:]
+        return done
+
+
+def scheduler_for(queue, **kwargs):
+    options = {"weights": {}, "quantum": 10, "target_depth": 4}
+    options.update(kwargs)
+    return FairScheduler(FakeRedis(), dispatch=queue.dispatch, queue_depth=queue.depth, **options)
+
+
+def docs(start, count, pages=1):
+    return [{"document_id": start + i, "pages": pages} for i in range(count)]
+
+
+def drain(scheduler, queue):
+    """Process the bulk queue one document at a time, pumping after each (as workers do)."""
+    order = []
+    scheduler.pump()
+    while queue.depth():
+        order.extend(entry["tenant"] for entry in queue.process())
+        scheduler.pump()
+    return order
+
+
+class TestFairScheduler:
+
+    def test_pump_fills_bulk_queue_to_target_depth(self):
+        queue = BulkQueue()
+        scheduler = scheduler_for(queue)
+        scheduler.enqueue("firm-a", docs(1, 50))
+
+        released = scheduler.pump()
+
+        assert released == [1, 2, 3, 4]
+        assert scheduler.pending_count() == 46
+        assert scheduler.pump() == []
+
+    def test_small_tenant_is_not_starved_by_bulk_upload(self):
+        queue = BulkQueue()
+        scheduler = scheduler_for(queue, quantum=5)
+        scheduler.enqueue("firm-a", docs(1, 1000, pages=5))
+        scheduler.pump()
+        scheduler.enqueue("firm-b", docs(5000, 3, pages=5))
+
+        order = drain(scheduler, queue)
+
+        # firm-b's documents are interleaved near the front, not after firm-a's 1000
+        last_b = max(i for i, tenant in enumerate(order) if tenant == "firm-b")
+        assert last_b < 12
+        assert order.count("firm-a") == 1000
+
+    def test_capacity_is_shared_by_weight_in_pages(self):
+        queue = BulkQueue()
+        scheduler = scheduler_for(queue, weights={"firm-a": 3}, quantum=10, target_depth=1)
+        scheduler.enqueue("firm-a", docs(1, 200, pages=10))
+        scheduler.enqueue("firm-b", docs(1000, 200, pages=10))
+
+        order = drain(scheduler, queue)[:80]
+
+        assert order.count("firm-a") == pytest.approx(60, abs=2)
+        assert order.count("firm-b") == pytest.approx(20, abs=2)
+
+    def test_large_documents_accumulate_credit(self):
+        queue = BulkQueue()
+        scheduler = scheduler_for(queue, quantum=10, target_depth=10)
+        scheduler.enqueue("firm-a", docs(1, 1, pages=35))
+        scheduler.enqueue("firm-b", docs(100, 5, pages=10))
+
+        order = drain(scheduler, queue)
+
+        assert sorted(order) == ["firm-a"] + ["firm-b"] * 5
+        # 35 pages need four visits of 10 pages of credit
+        assert order.index("firm-a") == 3
+
+    def test_tenant_reactivated_when_enqueued_after_retiring(self):
+        queue = BulkQueue()
+        scheduler = scheduler_for(queue, target_depth=100)
+        scheduler.enqueue("firm-a", docs(1, 2))
+        assert scheduler.pump() == [1, 2]
+
+        scheduler.enqueue("firm-a", docs(3, 2))
+
+        assert scheduler.pump() == [3, 4]
+        assert scheduler.client.get(PENDING_KEY) == b"0"
+
+    def test_concurrent_pump_is_skipped(self):
+        queue = BulkQueue()
+        scheduler = scheduler_for(queue)
+        scheduler.enqueue("firm-a", docs(1, 5))
+        scheduler.client.set("fair:lock", "other-worker")
+
+        assert scheduler.pump() == []
+
+
+class TestLanes:
+
+    def test_lane_choice(self):
+        assert choose_lane(3) == LANE_INTERACTIVE
+        assert choose_lane(500) == LANE_BULK
+        assert choose_lane(1, bulk_upload=True) == LANE_BULK
+
+    def test_page_estimate_falls_back_to_file_size(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(app.scheduling, "ESTIMATED_BYTES_PER_PAGE", 1000)
+        path = tmp_path / "scan.pdf"
+        path.write_bytes(b"x" * 2500)
+
+        assert estimate_pages(str(path), exact=False) == 3
+        assert estimate_pages(str(path)) == 3  # not a parseable PDF
+
+    def test_parse_weights(self):
+        assert parse_weights("firm-a=2, firm-b=0.5,bad,zero=0") == {"firm-a": 2.0, "firm-b": 0.5}
+
+    def test_lane_latency_is_recorded_per_lane(self):
+        metrics.reset()
+        observe_lane_latency(LANE_INTERACTIVE, 0.0, "wait")
+        observe_lane_latency(None, 0.0, "wait")
+
+        observations = metrics.snapshot()["observations"]
+        assert list(observations) == ["lane.interactive.wait_seconds"]
+
+    def test_lane_latency_is_shared_across_workers(self):
+        now = time.time()
+        for seconds in (0.5, 2, 3, 40):
+            observe_lane_latency(LANE_INTERACTIVE, now - seconds, "time_to_result")
+
+        interactive = lane_latency_stats()[LANE_INTERACTIVE]
+        assert interactive["time_to_result"]["count"] == 4
+        assert interactive["time_to_result"]["p50_seconds_at_most"] == 5.0
+        assert interactive["time_to_result"]["p95_seconds_at_most"] == 60.0
+        assert 11 < interactive["time_to_result"]["avg_seconds"] < 12
+        assert interactive["wait"]["count"] == 0
+        assert lane_latency_stats()[LANE_BULK]["time_to_result"]["p95_seconds_at_most"] is None
+
+
+class TestDispatch:
+
+    def test_bulk_documents_go_through_fair_scheduler(self, monkeypatch):
+        sent = []
+        monkeypatch.setattr(
+            tasks.process_document, "apply_async",
+            lambda args, kwargs, **options: sent.append((args[0], kwargs["lane"], options["queue"]))
+        )
+        client = FakeRedis()
+        scheduler = FairScheduler(
+            client, dispatch=tasks._release_to_bulk_queue,
+            queue_depth=lambda: len(sent), weights={}, target_depth=2
+        )
+        monkeypatch.setattr(app.scheduling, "_scheduler", scheduler)
+
+        assert tasks.dispatch_documents(docs(1, 5), tenant_id="firm-a") == [1, 2]
+        tasks.enqueue_document(99, LANE_INTERACTIVE)
+
+        assert sent == [(1, "bulk", "bulk"), (2, "bulk", "bulk"), (99, "interactive", "interactive")]
+        assert scheduler.pending_count() == 3
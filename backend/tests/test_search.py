@@ -0,0 +1,165 @@
+"""
+Test suite for search across processed documents.
+"""
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import app.page_store
+from app.materialization import materialize_extraction
+from app.models import Document, DocumentStatus, DocumentType, PageText
+from app.page_store import OCRPageStore
+from app.search import (
+    code_query,
+    hit_terms,
+    index_document_pages,
+    is_code,
+    load_hit_pages,
+    owner_hits,
+    owner_refs_query,
+    page_hit,
+    page_text_query,
+    provider_query,
+    query_terms,
+    snippet,
+    word_boxes
+)
+
+
+def page(number, text, width=612, height=792):
+    return {
+        "page_number": number,
+        "width": width,
+        "height": height,
+        "words": [
+            {"text": word, "bounding_box": {"left": 50 + 40 * i, "top": 100, "width": 36, "height": 12}}
+            for i, word in enumerate(text.split())
+        ]
+    }
+
+
+PAGES = [
+    page(1, "Patient presented with acute appendicitis. Diagnosis K35.20"),
+    page(2, ""),
+    page(3, "Follow-up visit: lumbar fractures healing well")
+]
+
+
+def ref(field, text, page_number):
+    return {
+        "field": field,
+        "page_number": page_number,
+        "bounding_box": {"left": 0.1, "top": 0.2, "width": 0.3, "height": 0.04},
+        "confidence": 0.9,
+        "matched_text": text
+    }
+
+
+CHRONOLOGY = {
+    "patient_name": "Jennifer Martinez",
+    "events": [{
+        "date": "2024-02-14",
+        "provider": "Memorial Regional Hospital",
+        "encounter_type": "Emergency Visit",
+        "summary": "Acute appendicitis.",
+        "diagnosis_codes": ["R10.31", "K35.20"],
+        "source_refs": [
+            ref("provider", "Memorial Regional Hospital", 1),
+            ref("diagnosis_code", "R10.31", 2),
+            ref("diagnosis_code", "K35.20", 1)
+        ]
+    }]
+}
+
+
+@pytest.fixture
+def indexed(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(app.page_store, "OCR_STORE_DIR", tmp_path)
+    document = Document(filename="record.pdf", status=DocumentStatus.COMPLETED, document_type=DocumentType.CHRONOLOGY)
+    db.add(document)
+    db.flush()
+    with OCRPageStore.for_document(document.id).open_for_write() as store:
+        for item in PAGES:
+            store.append(item)
+    index_document_pages(db, document.id, OCRPageStore.for_document(document.id))
+    materialize_extraction(db, document.id, DocumentType.CHRONOLOGY, CHRONOLOGY)
+    db.commit()
+    return document.id
+
+
+class TestQueryParsing:
+
+    def test_codes(self):
+        assert is_code("99214") and is_code("k35.20") and is_code("J1100") and is_code("M54")
+        assert not is_code("appendicitis") and not is_code("1234")
+
+    def test_terms(self):
+        assert query_terms('"acute appendicitis" or fracture -chronic') == ["acute", "appendicitis", "fracture"]
+        assert hit_terms("K35.20") == ["k35.20"]
+
+
+class TestIndexing:
+
+    def test_blank_pages_are_not_indexed(self, db, indexed):
+        assert [number for number, in db.query(PageText.page_number).order_by(PageText.page_number)] == [1, 3]
+
+    def test_reindexing_replaces_pages(self, db, indexed):
+        assert index_document_pages(db, indexed, PAGES[:1], batch_size=1) == 1
+        db.commit()
+        assert db.query(PageText).count() == 1
+
+
+class TestSearch:
+
+    def test_word_query_hits_page_with_boxes(self, db, indexed):
+        rows = db.execute(page_text_query("lumbar fracture", "sqlite")).all()
+
+        assert [(row.document_id, row.page_number) for row in rows] == [(indexed, 3)]
+        hit = page_hit(rows[0], load_hit_pages(rows)[0], query_terms("lumbar fracture"))
+        assert hit["snippet"].startswith("Follow-up visit: lumbar")
+        # "lumbar" and "fractures" (prefix of a 4+ letter term), page-relative
+        assert len(hit["bounding_boxes"]) == 2
+        assert hit["bounding_boxes"][0]["left"] == pytest.approx((50 + 40 * 2) / 612)
+
+    def test_code_query_matches_page_text_and_events(self, db, indexed):
+        rows = db.execute(page_text_query("k35.20", "sqlite")).all()
+        assert [row.page_number for row in rows] == [1]
+
+        owner_rows = [row for statement in code_query("k35.20") for row in db.execute(statement).all()]
+        hits = owner_hits(owner_rows, db.execute(owner_refs_query(owner_rows)).scalars().all())
+
+        assert len(hits) == 1
+        # Located on the page of the matching code's ref, not the event's first code
+        assert hits[0]["kind"] == "icd_code" and hits[0]["value"] == "K35.20"
+        assert hits[0]["page_number"] == 1 and len(hits[0]["bounding_boxes"]) == 1
+
+    def test_provider_query(self, db, indexed):
+        owner_rows = [row for statement in provider_query("regional") for row in db.execute(statement).all()]
+        hits = owner_hits(owner_rows, db.execute(owner_refs_query(owner_rows)).scalars().all())
+
+        assert [(hit["kind"], hit["value"], hit["page_number"]) for hit in hits] == [
+            ("provider", "Memorial Regional Hospital", 1)
+        ]
+
+    def test_like_wildcards_are_escaped(self, db, indexed):
+        assert db.execute(page_text_query("100%", "sqlite")).all() == []
+        assert page_text_query("-only", "sqlite") is None
+
+    def test_postgres_query_uses_index_expression(self):
+        sql = str(page_text_query("appendicitis", "postgresql").compile(dialect=postgresql.dialect()))
+
+        assert "to_tsvector('english'::regconfig, page_texts.text) @@ websearch_to_tsquery" in sql
+        assert "ts_rank" in sql
+
+
+class TestHelpers:
+
+    def test_snippet_centers_on_first_term(self):
+        text = "x" * 200 + " appendicitis " + "y" * 200
+        result = snippet(text, ["appendicitis"], width=20)
+        assert result.startswith("…") and result.endswith("…") and "appendicitis" in result
+
+    def test_word_boxes_of_normalized_page(self):
+        normalized = {"words": [{"text": "K35.20,", "bounding_box": {"left": 0.1, "top": 0.1, "width": 0.1, "height": 0.02}}]}
+        assert word_boxes(normalized, ["k35.20"]) == [{"left": 0.1, "top": 0.1, "width": 0.1, "height": 0.02}]
+        assert word_boxes(None, ["k35.20"]) == []
@@ -0,0 +1,62 @@
+"""
+Test suite for document response serialization.
+"""
+
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from fastapi.responses import JSONResponse
+
+from app.models import DocumentStatus, DocumentType
+from app.serialization import document_response, document_row_response, encode_json
+
+
+def chronology(events):
+    return {
+        "events": [
+            {
+                "date": "2024-03-01",
+                "provider": "Dr. Müller",
+                "description": f"Follow-up visit {i}",
+                "source_refs": [{"page": 1, "bbox": [0.1, 0.2, 0.3, 0.05], "score": 0.97}]
+            }
+            for i in range(events)
+        ],
+        "_match_summary": {"matched": events, "unmatched": 0}
+    }
+
+
+class TestSerialization:
+
+    def test_encoding_matches_json_response(self):
+        payload = {"filename": "résumé.pdf", "extraction_result": chronology(3), "ocr_result": None}
+
+        encoded = encode_json(payload)
+
+        assert encoded == JSONResponse(payload).body
+        assert json.loads(encoded) == payload
+
+    def test_row_response(self):
+        created = datetime(2024, 3, 1, 9, 30)
+        row = SimpleNamespace(
+            id=7, filename="bill.pdf", status=DocumentStatus.COMPLETED,
+            created_at=created, updated_at=created, document_type=DocumentType.BILL,
+            extraction_result={"line_items": []}, ocr_result='{"page_count": 1}'
+        )
+
+        assert document_row_response(row) == {
+            "document_id": 7,
+            "filename": "bill.pdf",
+            "status": "COMPLETED",
+            "created_at": "2024-03-01T09:30:00",
+            "updated_at": "2024-03-01T09:30:00",
+            "document_type": "BILL",
+            "extraction_result": {"line_items": []},
+            "ocr_result": '{"page_count": 1}'
+        }
+
+    def test_unclassified_document(self):
+        now = datetime(2024, 3, 1)
+        response = document_response(1, "scan.pdf", DocumentStatus.QUEUED, now, now)
+        assert response["document_type"] is None and response["extraction_result"] is None
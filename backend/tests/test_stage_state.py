@@ -0,0 +1,130 @@
+"""
+Test suite for the stage-state write path of process_document.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import event
+
+import app.admission
+import app.llm_cache
+import app.page_store
+import app.response_cache
+import app.stage_state
+import app.tasks as tasks
+from app.admission import UploadAdmission
+from app.models import Document, DocumentStatus, Event, LineItem, PageText
+from app.response_cache import ResponseCache
+from app.serialization import document_row_response
+from app.ocr_service import MockOCRService
+from app.stage_state import StageState, MemoryStageStore, merge_stage_state
+from app.worker_resources import WorkerResources
+
+
+class BrokenStore:
+
+    def update(self, document_id, fields):
+        raise ConnectionError("redis down")
+
+    def get(self, document_id):
+        raise ConnectionError("redis down")
+
+    def clear(self, document_id):
+        raise ConnectionError("redis down")
+
+
+@pytest.fixture
+def pipeline(engine, session_factory, db, tmp_path, monkeypatch):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+
+    stage_state = StageState(MemoryStageStore())
+    monkeypatch.setattr(app.stage_state, "_stage_state", stage_state)
+    monkeypatch.setattr(app.response_cache, "_response_cache", ResponseCache())
+    monkeypatch.setattr(app.admission, "_admission", UploadAdmission(None))
+    monkeypatch.setattr(tasks, "SessionLocal", session_factory)
+    monkeypatch.setattr(app.page_store, "OCR_STORE_DIR", tmp_path / "ocr")
+    monkeypatch.setattr(app.llm_cache, "LLM_CACHE_DIR", tmp_path / "llm_cache")
+    resources = WorkerResources(ocr_backend=MockOCRService(page_latency=0))
+    monkeypatch.setattr(tasks, "get_worker_resources", lambda: resources)
+
+    file_path = tmp_path / "scan.png"
+    file_path.write_bytes(b"not a pdf")
+    document = Document(filename="scan.png", status=DocumentStatus.QUEUED, file_path=str(file_path))
+    db.add(document)
+    db.commit()
+    statements.clear()
+
+    yield db, document.id, statements, stage_state
+
+
+class TestStageStateWritePath:
+
+    def test_document_row_is_written_twice(self, pipeline):
+        db, document_id, statements, stage_state = pipeline
+
+        result = tasks.process_document(document_id)
+
+        assert result["status"] == "success"
+        document_updates = [sql for sql in statements if sql.startswith("UPDATE documents")]
+        assert len(document_updates) == 2
+        # The final write carries all payload columns at once
+        assert "ocr_result" in document_updates[1] and "extraction_result" in document_updates[1]
+
+        db.expire_all()
+        document = db.query(Document).filter(Document.id == document_id).first()
+        assert document.status == DocumentStatus.COMPLETED
+        assert document.document_type is not None
+        assert document.extraction_result["_match_summary"]
+        # Stage state is dropped once the row holds the final result
+        assert stage_state.get(document_id) == {}
+
+    def test_final_write_stores_encoded_response(self, pipeline):
+        db, document_id, _, _ = pipeline
+
+        tasks.process_document(document_id)
+
+        db.expire_all()
+        document = db.query(Document).filter(Document.id == document_id).first()
+        # The stored body is exactly what the API would build from the row
+        assert json.loads(document.response_body) == document_row_response(document)
+        # Events / line items are materialized and pages indexed with the same commit
+        assert db.query(Event).count() + db.query(LineItem).count() > 0
+        assert db.query(PageText).filter(PageText.document_id == document_id).count() == 1
+
+    def test_failure_is_recorded_in_stage_state(self, pipeline, monkeypatch):
+        db, document_id, _, stage_state = pipeline
+        monkeypatch.setattr(tasks, "_extract_and_link", lambda *args: 1 / 0)
+
+        assert tasks.process_document(document_id)["status"] == "error"
+
+        state = stage_state.get(document_id)
+        assert state["stage"] == "failed"
+        assert "division by zero" in state["error"]
+        assert state["ocr"]["page_count"] == 1
+
+
+class TestStageState:
+
+    def test_in_flight_fields_are_merged_into_response(self):
+        stage_state = StageState(MemoryStageStore())
+        stage_state.set_stage(7, "ocr_complete", ocr={"page_count": 3})
+        stage_state.set_stage(7, "extracting", document_type="BILL")
+        stage_state.update(7, partial_result={"_partial": True, "line_items": [{"cpt_code": "99214"}]})
+
+        response = merge_stage_state(
+            {"document_type": None, "ocr_result": None, "extraction_result": None},
+            stage_state.get(7)
+        )
+
+        assert response["stage"] == "extracting"
+        assert response["document_type"] == "BILL"
+        assert '"page_count": 3' in response["ocr_result"]
+        assert response["extraction_result"]["line_items"] == [{"cpt_code": "99214"}]
+
+    def test_store_errors_are_not_raised(self):
+        stage_state = StageState(BrokenStore())
+        stage_state.set_stage(1, "ocr")
+        assert stage_state.get(1) == {}
+        stage_state.clear(1)
@@ -0,0 +1,100 @@
+"""
+Test suite for incremental JSON parsing and streaming extraction.
+"""
+
+import json
+import time
+
+import pytest
+from app.json_stream import IncrementalItemParser
+from app.llm_cache import CachedLLMService, DiskCacheStore
+from app.llm_service import MockLLMService
+from app.ocr_service import MOCK_PAGE
+from app.streaming_extraction import stream_extract
+from app.verification_service import link_verification
+
+OCR_MAP = {"pages": [MOCK_PAGE]}
+
+
+class SlowStreamLLM(MockLLMService):
+    """Streams the mock replies in small fragments with a delay per fragment."""
+
+    def __init__(self, delay=0.01, chunk_size=20):
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.finished_at = None
+
+    def _stream_json(self, document, chunk_size=None):
+        text = json.dumps(document)
+        for i in range(0, len(text), self.chunk_size):
+            time.sleep(self.delay)
+            yield text[i:i + self.chunk_size]
+        self.finished_at = time.monotonic()
+
+
+class TestIncrementalItemParser:
+
+    def test_items_are_emitted_as_soon_as_they_close(self):
+        doc = {"patient_name": "A", "events": [{"a": 1, "b": {"c": [1, 2]}}, {"s": "}]\" {"}]}
+        text = "```json\n" + json.dumps(doc) + "\n```"
+        parser = IncrementalItemParser("events")
+
+        emitted = []
+        for i, char in enumerate(text):
+            for item in parser.feed(char):
+                emitted.append((item, i))
+
+        assert [item for item, _ in emitted] == doc["events"]
+        # The first event is emitted before the second one starts
+        assert emitted[0][1] < text.index('{"s"')
+        assert parser.finish() == doc
+
+    def test_nested_arrays_with_same_key_are_ignored(self):
+        doc = {"meta": {"events": [{"x": 1}]}, "events": [{"y": 2}]}
+        parser = IncrementalItemParser("events")
+        assert parser.feed(json.dumps(doc)) == [{"y": 2}]
+
+    def test_truncated_stream_raises(self):
+        parser = IncrementalItemParser("line_items")
+        parser.feed('{"line_items": [{"cpt_code": "99214"}, {"cpt')
+        assert parser.items_emitted == 1
+        with pytest.raises(ValueError):
+            parser.finish()
+
+
+class TestStreamExtract:
+
+    @pytest.mark.parametrize("doc_type", ["CHRONOLOGY", "BILL"])
+    def test_result_matches_blocking_extraction(self, doc_type):
+        llm = MockLLMService()
+        blocking = llm.extract_chronology("x") if doc_type == "CHRONOLOGY" else llm.extract_bill("x")
+
+        streamed = stream_extract(llm, doc_type, "x", OCR_MAP, "1")
+
+        assert streamed == link_verification(blocking, OCR_MAP, "1")
+
+    def test_first_item_is_linked_before_the_stream_ends(self):
+        llm = SlowStreamLLM()
+        seen = []
+
+        def on_item(item, items):
+            seen.append((time.monotonic(), len(items), "source_refs" in item))
+
+        result = stream_extract(llm, "BILL", "x", OCR_MAP, "1", on_item=on_item)
+
+        assert [count for _, count, _ in seen] == [1, 2, 3, 4, 5]
+        assert all(linked for _, _, linked in seen)
+        assert seen[0][0] < llm.finished_at
+        assert len(result["line_items"]) == 5
+
+    def test_cached_stream_replays_from_cache(self, tmp_path):
+        cached = CachedLLMService(SlowStreamLLM(delay=0), DiskCacheStore(tmp_path))
+
+        first = stream_extract(cached, "CHRONOLOGY", "x", OCR_MAP, "1")
+        second = stream_extract(cached, "CHRONOLOGY", "x", OCR_MAP, "1")
+
+        assert first == second
+        assert cached.stats["misses"] == 1 and cached.stats["hits"] == 1
+        # Stream and blocking calls share cache entries
+        assert cached.extract_chronology("x") == MockLLMService().extract_chronology("x")
+        assert cached.stats["hits"] == 2
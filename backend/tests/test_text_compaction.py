@@ -0,0 +1,100 @@
+"""
+Test suite for OCR text compaction.
+"""
+
+from app.text_compaction import TextCompactor, group_lines, page_for_offset
+
+
+def word(text, left, top, confidence=0.99, height=10):
+    return {
+        "text": text,
+        "confidence": confidence,
+        "bounding_box": {"left": left, "top": top, "width": 8 * len(text), "height": height}
+    }
+
+
+def line(text, top, confidence=0.99):
+    words, left = [], 50
+    for token in text.split():
+        words.append(word(token, left, top, confidence))
+        left += 8 * len(token) + 5
+    return words
+
+
+def make_page(number, total, body_lines):
+    words = line("MEMORIAL REGIONAL HOSPITAL - CONFIDENTIAL", 20)
+    words += line(f"FAX 03/15/2024 10:{number:02d} P.{number:03d}", 35)
+    for i, text in enumerate(body_lines):
+        words += line(text, 100 + 20 * i)
+    words += line(f"Page {number} of {total}", 760)
+    return {"page_number": number, "width": 612, "height": 792, "words": words}
+
+
+class TestGroupLines:
+
+    def test_words_are_ordered_into_lines(self):
+        words = [word("b", 100, 52), word("c", 10, 80), word("a", 10, 50)]
+        assert [[w["text"] for w in l] for l in group_lines(words)] == [["a", "b"], ["c"]]
+
+    def test_words_without_boxes_stay_on_one_line(self):
+        words = [{"text": "x"}, {"text": "y"}]
+        assert group_lines(words) == [words]
+
+
+class TestTextCompactor:
+
+    def test_boilerplate_kept_once_and_content_preserved(self):
+        compactor = TextCompactor()
+        for n in range(1, 5):
+            compactor.add_page(make_page(n, 4, [f"Visit note {n}: chest pain", "BP 120/80"]))
+
+        page_texts = compactor.compact()
+
+        assert len(page_texts) == 4
+        joined = "\n".join(page_texts)
+        assert joined.count("MEMORIAL REGIONAL HOSPITAL") == 1
+        assert joined.count("Page ") == 1
+        assert joined.count("FAX") == 1
+        # Body lines differing only in numbers are not boilerplate
+        assert all(f"Visit note {n}:" in page_texts[n - 1] for n in range(1, 5))
+        assert joined.count("BP 120/80") == 4
+
+    def test_page_relative_boxes(self):
+        # Backends like Textract report boxes as fractions of the page
+        compactor = TextCompactor()
+        for n in range(1, 5):
+            page = make_page(n, 4, ["BP 120/80"])
+            for w in page["words"]:
+                box = w["bounding_box"]
+                w["bounding_box"] = {
+                    "left": box["left"] / 612, "top": box["top"] / 792,
+                    "width": box["width"] / 612, "height": box["height"] / 792
+                }
+            compactor.add_page(page)
+
+        joined = "\n".join(compactor.compact())
+
+        assert joined.count("MEMORIAL REGIONAL HOSPITAL") == 1
+        assert joined.count("BP 120/80") == 4
+        assert compactor.stats["boilerplate_lines_removed"] == 9
+        assert compactor.stats["reduction_ratio"] > 0.3
+
+    def test_noise_tokens_and_separator_runs_are_dropped(self):
+        words = line("CPT 99214 | ~ ........ $285.00", 100)
+        words.append(word("xq#", 400, 100, confidence=0.2))
+        compactor = TextCompactor(min_confidence=0.5)
+        compactor.add_page({"page_number": 1, "words": words})
+
+        assert compactor.compact() == ["CPT 99214 $285.00"]
+        assert compactor.stats["noise_tokens_dropped"] == 4
+
+    def test_single_page_has_no_boilerplate(self):
+        compactor = TextCompactor()
+        compactor.add_page(make_page(1, 1, ["Assessment: appendicitis"]))
+        assert "MEMORIAL" in compactor.compact()[0]
+        assert compactor.stats["boilerplate_lines_removed"] == 0
+
+    def test_offsets_map_back_to_pages(self):
+        page_texts = ["abc", "", "de"]
+        joined = "\n".join(page_texts)
+        assert [page_for_offset(page_texts, i) for i in range(len(joined))] == [1, 1, 1, 1, 2, 3, 3]
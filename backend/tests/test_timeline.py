@@ -0,0 +1,149 @@
+"""
+Test suite for incrementally maintained case timelines.
+"""
+
+from datetime import date
+
+import pytest
+
+from app.materialization import replace_document_rows
+from app.models import Case, CaseTimelineEntry, Document, DocumentStatus, DocumentType
+from app.timeline import (
+    InvalidCursorError,
+    decode_cursor,
+    entry_response,
+    timeline_page,
+    timeline_query
+)
+
+
+def event(day, provider, encounter_type, summary, codes=()):
+    return {
+        "date": day,
+        "provider": provider,
+        "encounter_type": encounter_type,
+        "summary": summary,
+        "diagnosis_codes": list(codes)
+    }
+
+
+ER_VISIT = event("2024-02-14", "Memorial Regional Hospital", "Emergency Visit", "Abdominal pain.", ["R10.31"])
+SURGERY = event("2024-02-15", "Dr. William Chen", "Surgery", "Laparoscopic appendectomy.", ["K35.30"])
+# The ER visit again, as reported by the hospital's own records
+ER_VISIT_HOSPITAL = event(
+    "02/14/2024", "MEMORIAL REGIONAL HOSPITAL", "Emergency visit",
+    "Severe RLQ pain, CT confirmed acute appendicitis.", ["K35.20"]
+)
+FOLLOW_UP = event("2024-03-01", "Dr. William Chen", "Follow-up", "Wound healing well.")
+
+
+@pytest.fixture
+def case_id(db):
+    case = Case(name="Martinez v. Acme", patient_name="Jennifer Martinez")
+    db.add(case)
+    db.commit()
+    return case.id
+
+
+def add_document(db, case_id):
+    document = Document(filename="record.pdf", status=DocumentStatus.PROCESSING, case_id=case_id)
+    db.add(document)
+    db.commit()
+    return document.id
+
+
+def complete(db, document_id, case_id, events):
+    replace_document_rows(
+        db, document_id, case_id, DocumentType.CHRONOLOGY, {"patient_name": "Jennifer Martinez", "events": events}
+    )
+    db.commit()
+
+
+def timeline(db, case_id, **filters):
+    return db.query(CaseTimelineEntry).filter(CaseTimelineEntry.case_id == case_id, **filters).order_by(
+        CaseTimelineEntry.event_date
+    ).all()
+
+
+class TestIncrementalTimeline:
+
+    def test_same_encounter_from_two_documents_is_merged(self, db, case_id):
+        first, second = add_document(db, case_id), add_document(db, case_id)
+
+        complete(db, first, case_id, [ER_VISIT, SURGERY])
+        complete(db, second, case_id, [ER_VISIT_HOSPITAL, FOLLOW_UP])
+
+        entries = timeline(db, case_id)
+        assert [entry.event_date for entry in entries] == [date(2024, 2, 14), date(2024, 2, 15), date(2024, 3, 1)]
+        er_visit = entries[0]
+        assert er_visit.source_count == 2
+        assert [source["document_id"] for source in er_visit.sources] == [first, second]
+        # Longest summary, union of codes, display fields of the first source
+        assert er_visit.summary == ER_VISIT_HOSPITAL["summary"]
+        assert er_visit.diagnosis_codes == ["R10.31", "K35.20"]
+        assert er_visit.provider == "Memorial Regional Hospital"
+
+    def test_reprocessing_updates_entries_in_place(self, db, case_id):
+        first, second = add_document(db, case_id), add_document(db, case_id)
+        complete(db, first, case_id, [ER_VISIT, SURGERY])
+        complete(db, second, case_id, [ER_VISIT_HOSPITAL])
+        er_visit_id = timeline(db, case_id)[0].id
+
+        # The first document no longer reports the ER visit or the surgery
+        complete(db, first, case_id, [FOLLOW_UP])
+
+        entries = timeline(db, case_id)
+        assert [(entry.encounter_type, entry.source_count) for entry in entries] == [
+            ("Emergency visit", 1), ("Follow-up", 1)
+        ]
+        assert entries[0].id == er_visit_id
+
+    def test_failed_document_leaves_the_timeline(self, db, case_id):
+        first, second = add_document(db, case_id), add_document(db, case_id)
+        complete(db, first, case_id, [ER_VISIT, SURGERY])
+        complete(db, second, case_id, [ER_VISIT_HOSPITAL])
+
+        replace_document_rows(db, first, case_id)
+        db.commit()
+
+        entries = timeline(db, case_id)
+        assert [(entry.event_date, entry.source_count) for entry in entries] == [(date(2024, 2, 14), 1)]
+
+    def test_documents_without_case_do_not_feed_timelines(self, db, case_id):
+        complete(db, add_document(db, None), None, [ER_VISIT])
+
+        assert timeline(db, case_id) == []
+
+
+class TestPagination:
+
+    @pytest.fixture
+    def entries(self, db, case_id):
+        events = [event(f"2024-01-{day:02d}", "Clinic", "Visit", f"Visit {day}") for day in range(1, 11)]
+        events.append(event("unknown", "Clinic", "Visit", "Undated"))
+        complete(db, add_document(db, case_id), case_id, events)
+
+    def pages(self, db, case_id, limit, **filters):
+        cursor, pages = None, []
+        while True:
+            rows = db.execute(timeline_query(case_id, cursor=cursor, limit=limit, **filters)).scalars().all()
+            page, cursor = timeline_page(rows, limit)
+            pages.append([entry_response(entry)["date"] for entry in page])
+            if cursor is None:
+                return pages
+
+    def test_keyset_pages_cover_timeline_once(self, db, case_id, entries):
+        pages = self.pages(db, case_id, limit=4)
+
+        assert [len(page) for page in pages] == [4, 4, 3]
+        # Undated entries come last
+        assert [date for page in pages for date in page] == [f"2024-01-{day:02d}" for day in range(1, 11)] + ["unknown"]
+
+    def test_date_range(self, db, case_id, entries):
+        pages = self.pages(db, case_id, limit=2, date_from=date(2024, 1, 4), date_to=date(2024, 1, 6))
+
+        assert pages == [["2024-01-04", "2024-01-05"], ["2024-01-06"]]
+
+    def test_invalid_cursor(self):
+        with pytest.raises(InvalidCursorError):
+            decode_cursor("not-a-cursor")
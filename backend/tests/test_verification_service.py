@@ -9,6 +9,8 @@ Tests all 5 matching strategies:
 5. Multi-word description span
 """
 
+from datetime import date
+
 import pytest
 from app.verification_service import VerificationLinker, link_verification
 
@@ -159,6 +161,36 @@ class TestVerificationLinkage:
         
         print(f"✓ Test Case 3 passed: {date_ref}")
     
+    def test_partial_date_is_not_completed_from_today(self):
+        """
+        Test edge case: OCR word without a year ("10/19")
+
+        Expected: no date match, even when the extracted date is today
+        """
+        today = date.today()
+        extracted = {"line_items": [{"date_of_service": today.isoformat()}]}
+        ocr_map = {
+            "pages": [
+                {
+                    "page_number": 1,
+                    "width": 612,
+                    "height": 792,
+                    "words": [
+                        {
+                            "text": today.strftime("%m/%d"),
+                            "bounding_box": {"left": 0.16, "top": 0.15, "width": 0.10, "height": 0.02},
+                            "confidence": 0.98
+                        }
+                    ]
+                }
+            ]
+        }
+
+        result = link_verification(extracted, ocr_map, file_id="test-file-3b")
+
+        refs = result["line_items"][0]["source_refs"]
+        assert not any(r["strategy"] == "date" for r in refs)
+    
     def test_case_4_fuzzy_provider_match(self):
         """
         Test Case 4: Fuzzy Provider Name Match (OCR Error)
@@ -0,0 +1,68 @@
+"""
+Test suite for per-worker-process service singletons.
+"""
+
+import pytest
+
+import app.llm_cache
+import app.worker_resources as worker_resources
+from app.metrics import metrics
+from app.ocr_service import MockOCRService
+from app.verification_service import VerificationLinker, verification_cache_info
+
+
+@pytest.fixture(autouse=True)
+def fresh_resources(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.llm_cache, "LLM_CACHE_DIR", tmp_path / "llm_cache")
+    worker_resources.reset_worker_resources()
+    metrics.reset()
+    yield
+    worker_resources.reset_worker_resources()
+
+
+class TestWorkerResources:
+
+    def test_singleton_per_process(self):
+        first = worker_resources.get_worker_resources()
+        assert worker_resources.get_worker_resources() is first
+
+        # worker_process_init rebuilds instead of reusing state from the parent process
+        worker_resources.init_worker_resources()
+        assert worker_resources.get_worker_resources() is not first
+
+    def test_setup_time_saved_is_recorded(self):
+        resources = worker_resources.get_worker_resources()
+
+        first = resources.record_task()
+        resources.record_task()
+        third = resources.record_task()
+
+        assert first["setup_seconds_saved"] == 0
+        assert third["tasks_served"] == 3
+        assert third["setup_seconds_saved"] == pytest.approx(2 * resources.setup_seconds, abs=1e-3)
+        assert metrics.snapshot()["counters"]["worker.setup_seconds_saved"] == pytest.approx(2 * resources.setup_seconds)
+
+    def test_page_pool_is_reused_across_documents(self, tmp_path):
+        resources = worker_resources.WorkerResources(ocr_backend=MockOCRService(page_latency=0))
+        document = tmp_path / "scan.png"
+        document.write_bytes(b"not a pdf")
+
+        list(resources.page_executor.iter_pages(str(document)))
+        pool = resources.page_executor._pool
+        list(resources.page_executor.iter_pages(str(document)))
+
+        assert pool is not None
+        assert resources.page_executor._pool is pool
+        resources.close()
+
+    def test_linker_date_cache_stays_warm(self):
+        page = {"page_number": 1, "width": 612, "height": 792, "words": [
+            {"text": "02/14/2024", "confidence": 0.99, "bounding_box": {"left": 1, "top": 1, "width": 10, "height": 10}}
+        ]}
+        before = verification_cache_info()["dates"]["hits"]
+
+        for _ in range(3):
+            refs = VerificationLinker()._find_matches("2024-02-14", {"pages": [page]}, "date", None)
+            assert refs
+
+        assert verification_cache_info()["dates"]["hits"] >= before + 4
@@ -0,0 +1,20 @@
+#!/bin/sh
+# Read replica: on first start, clone the primary with pg_basebackup
+# (-R writes standby.signal and primary_conninfo), then run as a hot standby.
+set -e
+
+PRIMARY_HOST="${PRIMARY_HOST:-db}"
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_isready -h "$PRIMARY_HOST" -p 5432 -U replicator; do
+        echo "Waiting for primary at $PRIMARY_HOST..."
+        sleep 1
+    done
+    mkdir -p "$PGDATA"
+    chown postgres:postgres "$PGDATA"
+    chmod 0700 "$PGDATA"
+    PGPASSWORD="${REPLICATION_PASSWORD:-replicator}" su-exec postgres \
+        pg_basebackup -h "$PRIMARY_HOST" -p 5432 -U replicator -D "$PGDATA" -X stream -R
+fi
+
+exec docker-entrypoint.sh postgres